@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析DB ベンチマーク
+
+DataManagerのスキーマに大量の分析結果（デフォルト10万件）を投入し、
+履歴・統計クエリの所要時間とクエリプラン（EXPLAIN QUERY PLAN）を
+インデックスあり／なしで比較します。
+
+使い方:
+    python benchmarks/analysis_db_benchmark.py
+    python benchmarks/analysis_db_benchmark.py --analyses 100000 --steps 5 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'enhanced-deepresearch'))
+
+from data_manager import DataManager, _step_row
+
+
+PHASES = ["decomposition", "reasoning", "reasoning", "verification", "synthesis"]
+
+
+@dataclass
+class SyntheticStep:
+    """ThinkingStepと同じ属性を持つ合成ステップ"""
+    step_id: int
+    phase: str
+    input_data: str
+    output_data: str
+    confidence: float
+    timestamp: datetime
+    duration: float
+
+
+def populate(manager: DataManager, analyses: int, steps: int) -> float:
+    """
+    ダミーの分析結果を投入
+
+    Returns:
+        float: 投入にかかった秒数
+    """
+    random.seed(42)
+    now = datetime.now()
+    started = time.perf_counter()
+
+    batch = 5000
+    for offset in range(0, analyses, batch):
+        records = []
+        steps_by_analysis = []
+        for i in range(offset, min(offset + batch, analyses)):
+            analysis_id = f"analysis_{i:08d}"
+            created_at = now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+            records.append((
+                analysis_id,
+                f"トピック {i % 500}",
+                '{"final_answer": "' + "分析結果" * 50 + '"}',
+                "{}",
+                created_at.isoformat(),
+                random.random(),
+                random.uniform(10, 300),
+                '["news"]'
+            ))
+            steps_by_analysis.append((analysis_id, [
+                SyntheticStep(
+                    step_id=step_id,
+                    phase=PHASES[(step_id - 1) % len(PHASES)],
+                    input_data="入力" * 20,
+                    output_data="出力" * 40,
+                    confidence=random.random(),
+                    timestamp=created_at,
+                    duration=random.uniform(0.1, 5.0)
+                )
+                for step_id in range(1, steps + 1)
+            ]))
+
+        with manager.store.write() as conn:
+            conn.executemany(manager.INSERT_RECORD_SQL, records)
+            # DataManager.save_analysis_result() と同じ変換で行を作る（スキーマ変更に追従する）
+            conn.executemany(manager.INSERT_STEP_SQL, [
+                _step_row(conn, analysis_id, step)
+                for analysis_id, analysis_steps in steps_by_analysis
+                for step in analysis_steps
+            ])
+
+    # 直接INSERTしたため統計ロールアップはまとめて作り直す
+    manager.rebuild_statistics()
+    return time.perf_counter() - started
+
+
+def queries(manager: DataManager):
+    """計測対象のクエリ（DataManagerが実際に発行するSQL）"""
+    since = (datetime.now() - timedelta(days=6)).date().isoformat()
+    return [
+        ("history (get_recent_analyses)", manager.SELECT_RECENT_SQL, (10,)),
+        ("history (list_analyses)", manager.SELECT_SUMMARY_SQL, (11,)),
+        ("stats: totals (rollup)", manager.STATS_TOTALS_SQL, ()),
+        ("stats: recent 7 days (rollup)", manager.STATS_RECENT_SQL, (since,)),
+        ("steps of one analysis", "SELECT * FROM thinking_steps WHERE analysis_id = ? ORDER BY step_id",
+         ("analysis_00012345",))
+    ]
+
+
+def measure(manager: DataManager, repeat: int, label: str) -> None:
+    """各クエリのプランと平均所要時間を表示"""
+    print(f"\n📊 {label}")
+    with manager.store.read() as conn:
+        for name, sql, params in queries(manager):
+            plan = " / ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(sql, params).fetchall()
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            print(f"  {name:<32} {elapsed_ms:>9.2f} ms   {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析DB ベンチマーク')
+    parser.add_argument('--analyses', type=int, default=100000, help='投入する分析結果の件数')
+    parser.add_argument('--steps', type=int, default=5, help='分析1件あたりの思考ステップ数')
+    parser.add_argument('--repeat', type=int, default=20, help='クエリごとの繰り返し回数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = DataManager(data_dir=data_dir)
+        elapsed = populate(manager, args.analyses, args.steps)
+        print(f"💾 {args.analyses}件（思考ステップ {args.analyses * args.steps}件）を投入: {elapsed:.1f}秒")
+
+        with manager.store.write() as conn:
+            conn.execute("ANALYZE")
+        measure(manager, args.repeat, "インデックスあり（マイグレーション適用後）")
+
+        with manager.store.write() as conn:
+            conn.execute("DROP INDEX idx_analysis_records_created_at")
+            conn.execute("DROP INDEX idx_analysis_records_created_at_id")
+            conn.execute("DROP INDEX idx_thinking_steps_analysis_id")
+        # EXPLAINはプリペア時のプランを返すため、キャッシュ済みステートメントを持つ接続を破棄する
+        manager.store.close()
+        measure(manager, args.repeat, "インデックスなし（従来のスキーマ）")
+
+        print(f"\n📈 get_analysis_statistics(): {manager.get_analysis_statistics()}")
+        print(f"🗜️ get_payload_statistics(): {manager.get_payload_statistics()}")
+
+        manager.store.close()
+
+
+if __name__ == "__main__":
+    main()
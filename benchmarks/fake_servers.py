@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ベンチマーク用の擬似サーバー
+
+- FakeOllamaServer: Ollama互換の /api/tags・/api/generate・/api/chat・/api/embed を提供し、
+  呼び出し種別（prompt_templates のテンプレート）ごとの定型応答を
+  トークン単位の遅延付きNDJSONでストリーミングします。
+  埋め込みは単語のハッシュによる疑似的な意味ベクトルで、AI関連の語を含む記事は
+  news_analyzer の優先トピックとの類似度が閾値を超える（実機と同程度の件数がフィルタを通る）。
+- FakeFeedServer: 記録済みのRSSフィード（benchmarks/fixtures/feeds/*.xml）を配信します。
+  pubDate は最新の記事が現在時刻になるようずらすため、期間フィルタの結果は常に同じになります。
+
+どちらも標準ライブラリの ThreadingHTTPServer をバックグラウンドスレッドで動かします。
+
+使い方（単体起動して実機の代わりに使う）:
+    python benchmarks/fake_servers.py --ollama-port 11434 --feed-port 8765 --token-latency 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from prompt_templates import (ARTICLE_SUMMARY, WEEKLY_SUMMARY, BATCH_ANALYSIS, NEWS_WEEKLY_SUMMARY,
+                              DECOMPOSITION, AXIS_REASONING, CONSISTENCY_VERIFICATION, SYNTHESIS,
+                              CROSS_REFERENCE, FACT_CHECK)
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DEFAULT_RESPONSES_PATH = os.path.join(FIXTURES_DIR, 'ollama_responses.json')
+DEFAULT_FEEDS_DIR = os.path.join(FIXTURES_DIR, 'feeds')
+DEFAULT_MODELS = ("qwen3:30b-a3b", "qwen3:8b", "qwen3:4b", "nomic-embed-text:latest")
+EMBEDDING_DIM = 64
+# 埋め込みの0次元目を共有する「AI関連」の語と、その成分の大きさ
+TOPIC_TERMS = frozenset({
+    "ai", "llm", "gpt", "chatgpt", "claude", "gemini", "gemma", "model", "models", "learning", "neural",
+    "generative", "intelligence", "chatbot", "network", "language", "reasoning", "agents", "agentic", "人工知能"
+})
+TOPIC_WEIGHT = 4.0
+
+# プロンプト先頭の指示文で呼び出し種別を判定する
+TEMPLATES = (ARTICLE_SUMMARY, WEEKLY_SUMMARY, BATCH_ANALYSIS, NEWS_WEEKLY_SUMMARY, DECOMPOSITION,
+             AXIS_REASONING, CONSISTENCY_VERIFICATION, SYNTHESIS, CROSS_REFERENCE, FACT_CHECK)
+BATCH_ITEM_PATTERN = re.compile(r'^(\d+)\. タイトル:', re.MULTILINE)
+PUBDATE_PATTERN = re.compile(r'<pubDate>(.*?)</pubDate>')
+WORD_PATTERN = re.compile(r'[a-z0-9]+|[^\x00-\x7f]+')
+
+
+def detect_call_type(prompt: str) -> str:
+    """
+    プロンプトから呼び出し種別を判定
+
+    Args:
+        prompt (str): /api/generate に渡されたプロンプト
+
+    Returns:
+        str: テンプレートの call_type（該当なしは "default"）
+    """
+    prompt = prompt.lstrip()
+    for template in TEMPLATES:
+        if prompt.startswith(template.instructions.strip()):
+            return template.call_type
+    return "default"
+
+
+def split_tokens(text: str, chars_per_token: int) -> List[str]:
+    """応答テキストをストリーミング用のトークン列に分割"""
+    return [text[i:i + chars_per_token] for i in range(0, len(text), chars_per_token)] or [""]
+
+
+def fake_embedding(text: str) -> List[float]:
+    """
+    テキストから決定的な埋め込みベクトルを生成
+
+    単語ごとにハッシュで次元と符号を決めて足し合わせ（同じ語を含むほど類似）、
+    TOPIC_TERMS の語を含む場合は共通の0次元目に TOPIC_WEIGHT を置く。
+    別々の記事どうしの類似度は重複判定の閾値（0.92）より十分低くなる。
+    """
+    values = [0.0] * EMBEDDING_DIM
+    words = WORD_PATTERN.findall(text.lower())
+    for word in words:
+        digest = hashlib.sha256(word.encode('utf-8')).digest()
+        values[1 + digest[0] % (EMBEDDING_DIM - 1)] += 1.0 if digest[1] & 1 else -1.0
+    if any(word in TOPIC_TERMS for word in words):
+        values[0] = TOPIC_WEIGHT
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return [v / norm for v in values]
+
+
+class _BackgroundServer:
+    """ThreadingHTTPServer をバックグラウンドスレッドで動かす共通部分"""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """ベースURL"""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "_BackgroundServer":
+        """サーバーを起動（port=0 なら空きポートを割り当て）"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), self.handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    """アクセスログを出さないハンドラ"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw.decode('utf-8'))
+        except ValueError:
+            return {}
+
+
+class _OllamaHandler(_QuietHandler):
+    """Ollama API互換ハンドラ"""
+
+    def do_GET(self):
+        server: FakeOllamaServer = self.server.owner
+        if self.path.rstrip("/") == "/api/tags":
+            self._send_json({"models": [{"name": name, "model": name} for name in server.models]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        server: FakeOllamaServer = self.server.owner
+        body = self._read_json()
+        path = self.path.rstrip("/")
+
+        if path == "/api/generate":
+            self._generate(server, body, body.get("prompt", ""), chat=False)
+        elif path == "/api/chat":
+            messages = body.get("messages") or [{}]
+            self._generate(server, body, messages[-1].get("content", ""), chat=True)
+        elif path == "/api/embed":
+            inputs = body.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            server.record("embed", prompt_chars=sum(len(text) for text in inputs), tokens=0)
+            self._send_json({"model": body.get("model", ""), "embeddings": [fake_embedding(t) for t in inputs]})
+        elif path == "/api/embeddings":
+            server.record("embed", prompt_chars=len(body.get("prompt", "")), tokens=0)
+            self._send_json({"embedding": fake_embedding(body.get("prompt", ""))})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _generate(self, server: "FakeOllamaServer", body: Dict[str, Any], prompt: str, chat: bool) -> None:
+        """定型応答を返す（stream=True ならトークンごとに遅延を入れてNDJSONで送信）"""
+        started = time.perf_counter()
+        call_type = detect_call_type(prompt)
+        tokens = split_tokens(server.response_for(call_type, prompt), server.chars_per_token)
+        server.record(call_type, prompt_chars=len(prompt), tokens=len(tokens))
+        model = body.get("model", "")
+
+        def chunk(text: str, done: bool) -> Dict[str, Any]:
+            payload = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if chat:
+                payload["message"] = {"role": "assistant", "content": text}
+            else:
+                payload["response"] = text
+            if done:
+                elapsed_ns = int((time.perf_counter() - started) * 1e9)
+                payload.update({
+                    "done_reason": "stop",
+                    "total_duration": elapsed_ns,
+                    "load_duration": 0,
+                    "prompt_eval_count": max(1, len(prompt) // 4),
+                    "prompt_eval_duration": 0,
+                    "eval_count": len(tokens),
+                    "eval_duration": elapsed_ns
+                })
+            return payload
+
+        if not body.get("stream", True):
+            time.sleep(server.token_latency * len(tokens))
+            self._send_json(chunk("".join(tokens), done=True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                if server.token_latency:
+                    time.sleep(server.token_latency)
+                self._write_chunk(json.dumps(chunk(token, done=False), ensure_ascii=False) + "\n")
+            self._write_chunk(json.dumps(chunk("", done=True), ensure_ascii=False) + "\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOllamaServer(_BackgroundServer):
+    """
+    Ollamaの代わりに定型応答を返すサーバー
+
+    応答は呼び出し種別ごとに fixtures/ollama_responses.json から取り、
+    バッチ分析はプロンプト内の記事数に合わせて analyses を生成します。
+    """
+
+    handler_class = _OllamaHandler
+
+    def __init__(self, token_latency: float = 0.0, chars_per_token: int = 4,
+                 responses_path: str = DEFAULT_RESPONSES_PATH, models=DEFAULT_MODELS,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        初期化
+
+        Args:
+            token_latency (float): 1トークンあたりの遅延（秒）
+            chars_per_token (int): 1トークンとして送る文字数
+            responses_path (str): 定型応答のJSONファイル
+            models: /api/tags で返すモデル名
+            host (str): 待ち受けアドレス
+            port (int): 待ち受けポート（0なら自動）
+        """
+        super().__init__(host, port)
+        self.token_latency = token_latency
+        self.chars_per_token = max(1, chars_per_token)
+        self.models = list(models)
+        with open(responses_path, 'r', encoding='utf-8') as f:
+            self.responses = json.load(f)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def response_for(self, call_type: str, prompt: str) -> str:
+        """呼び出し種別に対応する応答テキスト"""
+        response = self.responses.get(call_type, self.responses.get("default", ""))
+        if call_type == BATCH_ANALYSIS.call_type:
+            indexes = sorted({int(i) for i in BATCH_ITEM_PATTERN.findall(prompt)}) or [0]
+            response = {"analyses": [dict(response, index=i) for i in indexes]}
+        return response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
+
+    def record(self, call_type: str, prompt_chars: int, tokens: int) -> None:
+        """呼び出し種別ごとのリクエスト数・入力文字数・出力トークン数を記録"""
+        with self._stats_lock:
+            entry = self.stats.setdefault(call_type, {"requests": 0, "prompt_chars": 0, "tokens": 0})
+            entry["requests"] += 1
+            entry["prompt_chars"] += prompt_chars
+            entry["tokens"] += tokens
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """記録のコピー"""
+        with self._stats_lock:
+            return {name: dict(entry) for name, entry in self.stats.items()}
+
+
+class _FeedHandler(_QuietHandler):
+    """記録済みフィードの配信ハンドラ"""
+
+    def do_GET(self):
+        server: FakeFeedServer = self.server.owner
+        name = os.path.basename(self.path.split("?", 1)[0])
+        body = server.render_feed(name)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        server.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeFeedServer(_BackgroundServer):
+    """
+    記録済みRSSフィードを配信するサーバー（/feeds/<名前>.xml）
+    """
+
+    handler_class = _FeedHandler
+
+    def __init__(self, feeds_dir: str = DEFAULT_FEEDS_DIR, host: str = "127.0.0.1", port: int = 0):
+        """
+        初期化
+
+        Args:
+            feeds_dir (str): フィードXMLを置いたディレクトリ
+            host (str): 待ち受けアドレス
+            port (int): 待ち受けポート（0なら自動）
+        """
+        super().__init__(host, port)
+        self.feeds_dir = feeds_dir
+        self.requests = 0
+
+    @property
+    def feed_names(self) -> List[str]:
+        """配信できるフィード名（拡張子なし）"""
+        return sorted(name[:-4] for name in os.listdir(self.feeds_dir) if name.endswith(".xml"))
+
+    def feed_url(self, name: str) -> str:
+        """フィードのURL"""
+        return f"{self.url}/feeds/{name}.xml"
+
+    def render_feed(self, filename: str) -> Optional[bytes]:
+        """
+        フィードを読み込み、最新の pubDate が現在時刻になるよう全記事の日付をずらす
+
+        Args:
+            filename (str): ファイル名（例: "openai.xml"）
+
+        Returns:
+            Optional[bytes]: フィード本文（存在しない場合はNone）
+        """
+        path = os.path.join(self.feeds_dir, filename)
+        if not filename.endswith(".xml") or not os.path.isfile(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        dates = [parsedate_to_datetime(value) for value in PUBDATE_PATTERN.findall(text)]
+        if dates:
+            offset = datetime.now(timezone.utc) - max(dates)
+            text = PUBDATE_PATTERN.sub(
+                lambda m: f"<pubDate>{format_datetime(parsedate_to_datetime(m.group(1)) + offset, usegmt=True)}</pubDate>",
+                text
+            )
+        return text.encode('utf-8')
+
+
+def main():
+    """擬似サーバーを単体で起動"""
+    parser = argparse.ArgumentParser(description='ベンチマーク用の擬似Ollama・RSSサーバー')
+    parser.add_argument('--ollama-port', type=int, default=11434, help='擬似Ollamaのポート')
+    parser.add_argument('--feed-port', type=int, default=8765, help='フィードサーバーのポート')
+    parser.add_argument('--token-latency', type=float, default=0.02, help='1トークンあたりの遅延（秒）')
+    args = parser.parse_args()
+
+    ollama = FakeOllamaServer(token_latency=args.token_latency, port=args.ollama_port).start()
+    feeds = FakeFeedServer(port=args.feed_port).start()
+    print(f"🤖 擬似Ollama: {ollama.url}（{args.token_latency * 1000:.0f}ms/トークン）")
+    print(f"📡 フィード: {', '.join(feeds.feed_url(name) for name in feeds.feed_names)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 停止します")
+    finally:
+        ollama.stop()
+        feeds.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプライン スループット ベンチマーク
+
+擬似Ollama（定型応答をトークン単位の遅延付きでストリーミング）と
+記録済みRSSフィードの配信サーバー（benchmarks/fake_servers.py）を立ち上げ、
+以下のシナリオをエンドツーエンドで繰り返し実行します。
+
+- ai_news:       AINewsPipeline.run_pipeline（収集 → フィルタ → バッチ分析 → 週次サマリー → 出力）
+- deep_research: EnhancedQwen3Llm.deep_research（分解 → 軸ごとの推論 → 検証 → 統合）
+- verify_claims: VerificationEngine.verify_claims（クロスリファレンス → ファクトチェック）
+- summarize:     LocalLLMSummarizer.process_news_articles（記事間の1秒待ちを含む）
+- report:        ReportGenerator.generate_all_reports（data/integrated_data.json から3形式）
+
+各実行は使い捨ての作業ディレクトリ（擬似サーバーを指す config/ と data/ を配置）で
+別プロセスとして行うため、記事ストア・分析キャッシュ・共有ルーターは毎回空の状態から始まります。
+実行ごとの所要時間の p50/p95、スループット（件/秒）、LLMリクエスト数を表示し、
+保存済みのベースラインより悪化していれば終了コード1で終了します。
+ベースラインは計測環境に依存するためリポジトリには含めず、最初に --save-baseline で作成します。
+
+使い方:
+    python benchmarks/pipeline_benchmark.py
+    python benchmarks/pipeline_benchmark.py --scenario ai_news --scenario report --iterations 10
+    python benchmarks/pipeline_benchmark.py --token-latency 0.02 --save-baseline
+    python benchmarks/pipeline_benchmark.py --baseline benchmarks/baseline.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.join(BENCHMARK_DIR, '..')
+
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'enhanced-deepresearch'))
+
+from fake_servers import FakeOllamaServer, FakeFeedServer, DEFAULT_FEEDS_DIR
+
+
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+SETTINGS_PATH = os.path.join(PROJECT_ROOT, 'config', 'settings.json')
+INTEGRATED_DATA_PATH = os.path.join(PROJECT_ROOT, 'data', 'integrated_data.json')
+REPORT_GENERATOR_PATH = os.path.join(PROJECT_ROOT, 'scripts', 'report-generator.py')
+
+# 子プロセスが計測結果を出力する行の接頭辞
+RESULT_MARKER = "@@pipeline_benchmark "
+
+# フィード名 → 企業ID・表示名（news_analyzer の企業別乗数に合わせる）
+FEED_COMPANIES = {
+    "openai": ("openai", "OpenAI"),
+    "deepmind": ("google_ai", "Google AI"),
+    "anthropic": ("anthropic", "Anthropic"),
+}
+
+
+@dataclass
+class Scenario:
+    """ベンチマークシナリオ"""
+    name: str
+    description: str
+    run: Callable[[int], int]
+    default_items: int
+
+
+# ----------------------------------------------------------------------
+# シナリオ（子プロセスで作業ディレクトリをカレントにして実行）
+# ----------------------------------------------------------------------
+
+def load_fixture_articles() -> List[Dict[str, str]]:
+    """記録済みフィードの記事（タイトル・説明・URL）を読み込み"""
+    articles = []
+    for name in sorted(os.listdir(DEFAULT_FEEDS_DIR)):
+        if not name.endswith(".xml"):
+            continue
+        root = ET.parse(os.path.join(DEFAULT_FEEDS_DIR, name)).getroot()
+        for item in root.iter("item"):
+            articles.append({
+                "title": item.findtext("title", ""),
+                "description": item.findtext("description", ""),
+                "url": item.findtext("link", ""),
+                "published_at": item.findtext("pubDate", "")
+            })
+    return articles
+
+
+def take(items: List[Any], count: int) -> List[Any]:
+    """先頭から count 件（足りなければ繰り返す）"""
+    return [items[i % len(items)] for i in range(count)]
+
+
+def run_ai_news(items: int) -> int:
+    """
+    AINewsPipeline.run_pipeline（分析件数はフィードとフィルタで決まる）
+
+    件数はフィルタを通ってAI分析した記事数で数え、items 件に満たなければ失敗とする
+    （少数の記事だけを計測して速く見えることを防ぐ）。上位件数にも items を使う。
+    """
+    from ai_news_pipeline import AINewsPipeline
+
+    pipeline = AINewsPipeline(config_path="config/target_companies.yaml")
+    result = asyncio.run(pipeline.run_pipeline(top_n=items))
+    if "error" in result:
+        raise RuntimeError(f"パイプライン失敗: {result.get('failed_stage', '')} {result['error']}")
+    analyzed = result["total_items"]
+    if analyzed < items:
+        raise RuntimeError(f"分析した記事が {analyzed}件で、指定の {items}件に届きません"
+                           f"（フィードの記事数・フィルタ条件を確認してください）")
+    return analyzed
+
+
+def run_deep_research(items: int) -> int:
+    """記事タイトルをトピックにして deep_research を順に実行"""
+    from reasoning_engine import EnhancedQwen3Llm
+
+    engine = EnhancedQwen3Llm()
+    topics = [article["title"] for article in take(load_fixture_articles(), items)]
+
+    async def research_all():
+        for topic in topics:
+            result = await engine.deep_research(topic, {"source": "benchmark"})
+            if not result.quality_metrics:
+                raise RuntimeError(result.final_answer)
+
+    asyncio.run(research_all())
+    return len(topics)
+
+
+def run_verify_claims(items: int) -> int:
+    """記事の説明文を主張として verify_claims を実行（重複しないためキャッシュは効かない）"""
+    from verification_engine import VerificationEngine
+
+    engine = VerificationEngine()
+    claims = [f"{article['title']}: {article['description']}" for article in take(load_fixture_articles(), items)]
+    results = asyncio.run(engine.verify_claims(claims))
+    if all(result.verification_status == "unknown" for result in results):
+        raise RuntimeError("全件の検証に失敗しました")
+    return len(results)
+
+
+def run_summarize(items: int) -> int:
+    """LocalLLMSummarizer.process_news_articles"""
+    from local_llm_summarizer import LocalLLMSummarizer
+
+    summarizer = LocalLLMSummarizer()
+    if not summarizer.available:
+        raise RuntimeError("擬似Ollamaに接続できません")
+    processed = summarizer.process_news_articles(take(load_fixture_articles(), items))
+    return len(processed)
+
+
+def run_report(items: int) -> int:
+    """ReportGenerator.generate_all_reports を items 回実行"""
+    spec = importlib.util.spec_from_file_location("report_generator", REPORT_GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    generator = module.ReportGenerator()
+    for i in range(items):
+        generator.generate_all_reports(output_prefix=f"benchmark_{i}")
+    return items
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario("ai_news", "AINewsPipeline.run_pipeline", run_ai_news, 15),
+        Scenario("deep_research", "EnhancedQwen3Llm.deep_research", run_deep_research, 2),
+        Scenario("verify_claims", "VerificationEngine.verify_claims", run_verify_claims, 4),
+        Scenario("summarize", "LocalLLMSummarizer.process_news_articles", run_summarize, 3),
+        Scenario("report", "ReportGenerator.generate_all_reports", run_report, 1),
+    )
+}
+
+
+def run_worker(name: str, items: int) -> None:
+    """
+    子プロセス側: シナリオを1回実行し、所要時間とスパン種別ごとの合計時間を出力
+
+    Args:
+        name (str): シナリオ名
+        items (int): 処理件数
+    """
+    from instrumentation import get_tracer
+
+    started = time.perf_counter()
+    processed = SCENARIOS[name].run(items)
+    elapsed = time.perf_counter() - started
+
+    span_seconds: Dict[str, float] = {}
+    for entry in get_tracer().summary().values():
+        span_seconds[entry["kind"]] = span_seconds.get(entry["kind"], 0.0) + entry["total_duration"]
+
+    print(RESULT_MARKER + json.dumps({"elapsed": elapsed, "items": processed, "spans": span_seconds}), flush=True)
+
+
+# ----------------------------------------------------------------------
+# 親プロセス側
+# ----------------------------------------------------------------------
+
+def prepare_workdir(ollama: FakeOllamaServer, feeds: FakeFeedServer, concurrency: int) -> str:
+    """
+    擬似サーバーを指す設定ファイルと入力データを置いた作業ディレクトリを作成
+
+    Args:
+        ollama (FakeOllamaServer): 擬似Ollama
+        feeds (FakeFeedServer): フィードサーバー
+        concurrency (int): バックエンドの同時実行数上限
+
+    Returns:
+        str: 作業ディレクトリのパス
+    """
+    import yaml
+
+    workdir = tempfile.mkdtemp(prefix="weeklybrief-bench-")
+    # 出力先はリポジトリと同じ構成にする（web/ は既存ディレクトリとして扱われる）
+    for directory in ("config", "data", "reports", "web"):
+        os.makedirs(os.path.join(workdir, directory))
+
+    with open(SETTINGS_PATH, 'r', encoding='utf-8') as f:
+        settings = json.load(f)
+    llm_config = settings.setdefault("data_sources", {}).setdefault("local_llm", {})
+    llm_config.update({
+        "enabled": True,
+        "ollama_url": ollama.url,
+        "backends": [{"name": "fake", "url": ollama.url, "max_concurrency": concurrency, "priority": 0}]
+    })
+    with open(os.path.join(workdir, "config", "settings.json"), 'w', encoding='utf-8') as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
+
+    # keywords を入れないので NewsAPI への問い合わせは発生しない
+    companies = {}
+    for name in feeds.feed_names:
+        company_id, display_name = FEED_COMPANIES.get(name, (name, name))
+        companies[company_id] = {"name": display_name, "blog_rss": feeds.feed_url(name), "priority": 10}
+    with open(os.path.join(workdir, "config", "target_companies.yaml"), 'w', encoding='utf-8') as f:
+        yaml.safe_dump({"companies": companies}, f, allow_unicode=True, sort_keys=False)
+
+    shutil.copy(INTEGRATED_DATA_PATH, os.path.join(workdir, "data", "integrated_data.json"))
+    return workdir
+
+
+def run_once(name: str, items: int, workdir: str, verbose: bool) -> Dict[str, Any]:
+    """
+    シナリオを別プロセスで1回実行
+
+    Args:
+        name (str): シナリオ名
+        items (int): 処理件数
+        workdir (str): 作業ディレクトリ
+        verbose (bool): 子プロセスの出力をそのまま表示するか
+
+    Returns:
+        Dict: elapsed・items・spans
+
+    Raises:
+        RuntimeError: 子プロセスが失敗した場合
+    """
+    env = dict(os.environ, PYTHONUNBUFFERED="1", HF_HUB_OFFLINE="1")
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", name, "--items", str(items)],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if verbose:
+        print(completed.stdout, end="")
+        print(completed.stderr, end="", file=sys.stderr)
+
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+
+    tail = "\n".join((completed.stdout + completed.stderr).splitlines()[-15:])
+    raise RuntimeError(f"{name} の実行に失敗しました（終了コード {completed.returncode}）\n{tail}")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """線形補間でパーセンタイルを計算"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure_scenario(scenario: Scenario, items: int, args, ollama: FakeOllamaServer,
+                     feeds: FakeFeedServer) -> Dict[str, Any]:
+    """
+    ウォームアップの後に指定回数実行して集計
+
+    Returns:
+        Dict: p50・p95・スループット・LLMリクエスト数などの集計値
+    """
+    samples = []
+    for i in range(args.warmup + args.iterations):
+        workdir = prepare_workdir(ollama, feeds, args.concurrency)
+        before = ollama.snapshot()
+        try:
+            sample = run_once(scenario.name, items, workdir, args.verbose)
+        finally:
+            if not args.keep_workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+        after = ollama.snapshot()
+        sample["llm_requests"] = sum(entry["requests"] - before.get(call_type, {}).get("requests", 0)
+                                     for call_type, entry in after.items())
+        if i >= args.warmup:
+            samples.append(sample)
+            print(f"   #{len(samples)}: {sample['elapsed']:.2f}秒 / {sample['items']}件 "
+                  f"（LLM {sample['llm_requests']}回）")
+
+    elapsed = [sample["elapsed"] for sample in samples]
+    total_items = sum(sample["items"] for sample in samples)
+    llm_seconds = sum(sample["spans"].get("llm", 0.0) for sample in samples)
+    return {
+        "runs": len(samples),
+        "items_per_run": statistics.mean(sample["items"] for sample in samples),
+        "p50": percentile(elapsed, 0.5),
+        "p95": percentile(elapsed, 0.95),
+        "mean": statistics.mean(elapsed),
+        "throughput": total_items / sum(elapsed) if sum(elapsed) else 0.0,
+        "llm_requests_per_run": statistics.mean(sample["llm_requests"] for sample in samples),
+        "llm_share": llm_seconds / sum(elapsed) if sum(elapsed) else 0.0
+    }
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    """集計結果を表形式で表示"""
+    print("\n📊 結果")
+    print(f"{'scenario':<14} {'runs':>4} {'items':>6} {'p50 s':>8} {'p95 s':>8} {'items/s':>9} "
+          f"{'LLM req':>8} {'LLM %':>6}")
+    for name, result in results.items():
+        print(f"{name:<14} {result['runs']:>4} {result['items_per_run']:>6.1f} {result['p50']:>8.2f} "
+              f"{result['p95']:>8.2f} {result['throughput']:>9.2f} {result['llm_requests_per_run']:>8.1f} "
+              f"{result['llm_share']:>6.0%}")
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, Any]], settings: Dict[str, Any],
+                          baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    ベースラインと比較して悪化したシナリオを列挙
+
+    p95 が (1 + tolerance) 倍を超えるか、スループットが (1 - tolerance) 倍を下回ると悪化とみなす。
+
+    Args:
+        results (Dict): 今回の集計値
+        settings (Dict): 今回の計測条件
+        baseline (Dict): 保存済みのベースライン
+        tolerance (float): 許容する変化率
+
+    Returns:
+        List[str]: 悪化の内容
+    """
+    regressions = []
+    print(f"\n📏 ベースライン比較（{baseline.get('created_at', '')}、許容 ±{tolerance:.0%}）")
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"   {name}: ベースラインなし")
+            continue
+        if baseline.get("settings", {}).get(name) != settings[name]:
+            print(f"   {name}: 計測条件が異なるため比較しません（{baseline.get('settings', {}).get(name)} → {settings[name]}）")
+            continue
+
+        p95_change = result["p95"] / base["p95"] - 1 if base["p95"] else 0.0
+        throughput_change = result["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        regressed = p95_change > tolerance or throughput_change < -tolerance
+        print(f"   {'❌' if regressed else '✅'} {name}: p95 {base['p95']:.2f} → {result['p95']:.2f}秒 "
+              f"({p95_change:+.0%}), {base['throughput']:.2f} → {result['throughput']:.2f}件/秒 "
+              f"({throughput_change:+.0%})")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='パイプライン スループット ベンチマーク')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), metavar='NAME',
+                        help=f"実行するシナリオ（複数指定可、省略時は全て: {', '.join(SCENARIOS)}）")
+    parser.add_argument('--iterations', type=int, default=5, help='シナリオごとの計測回数')
+    parser.add_argument('--warmup', type=int, default=1, help='計測に含めない実行回数')
+    parser.add_argument('--items', type=int, help='1回あたりの処理件数（省略時はシナリオごとの既定値）')
+    parser.add_argument('--token-latency', type=float, default=0.005, help='擬似Ollamaの1トークンあたりの遅延（秒）')
+    parser.add_argument('--chars-per-token', type=int, default=4, help='擬似Ollamaが1トークンとして送る文字数')
+    parser.add_argument('--concurrency', type=int, default=2, help='擬似Ollamaバックエンドの同時実行数上限')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='ベースラインJSONのパス')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='悪化とみなすp95・スループットの変化率')
+    parser.add_argument('--save-baseline', action='store_true', help='今回の結果をベースラインとして保存')
+    parser.add_argument('--output', help='集計結果をJSONで保存するパス')
+    parser.add_argument('--keep-workdir', action='store_true', help='作業ディレクトリを削除しない')
+    parser.add_argument('--verbose', action='store_true', help='各実行の出力を表示')
+    parser.add_argument('--worker', choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.items or SCENARIOS[args.worker].default_items)
+        return
+
+    names = args.scenario or list(SCENARIOS)
+    settings = {
+        name: {
+            "items": args.items or SCENARIOS[name].default_items,
+            "token_latency": args.token_latency,
+            "chars_per_token": args.chars_per_token,
+            "concurrency": args.concurrency
+        }
+        for name in names
+    }
+
+    results = {}
+    with FakeOllamaServer(token_latency=args.token_latency, chars_per_token=args.chars_per_token) as ollama, \
+            FakeFeedServer() as feeds:
+        print(f"🤖 擬似Ollama: {ollama.url}（{args.token_latency * 1000:.1f}ms/トークン）")
+        print(f"📡 フィード: {feeds.url}（{len(feeds.feed_names)}件）")
+        for name in names:
+            scenario = SCENARIOS[name]
+            print(f"\n⏱️ {name}: {scenario.description}（{settings[name]['items']}件 × {args.iterations}回）")
+            try:
+                results[name] = measure_scenario(scenario, settings[name]["items"], args, ollama, feeds)
+            except RuntimeError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+
+    print_results(results)
+
+    summary = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine()},
+        "settings": settings,
+        "scenarios": results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 集計結果: {args.output}")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        # 今回実行したシナリオだけ置き換える
+        baseline.update({"created_at": summary["created_at"], "machine": summary["machine"]})
+        baseline.setdefault("settings", {}).update(settings)
+        baseline.setdefault("scenarios", {}).update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 ベースラインを保存: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ ベースラインがありません（--save-baseline で {args.baseline} に保存できます）")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, settings, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ 性能が悪化しました: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ ベースラインからの悪化はありません")
+
+
+if __name__ == "__main__":
+    main()
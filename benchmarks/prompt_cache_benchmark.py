@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+プロンプトKVキャッシュ ベンチマーク
+
+記事要約を連続で呼び出し、従来のプロンプト（記事テキストが指示の途中に入る）と
+共有プレフィックス型テンプレート（scripts/prompt_templates.py）で
+Ollamaが返す prompt_eval_count / prompt_eval_duration を比較します。
+
+使い方:
+    python benchmarks/prompt_cache_benchmark.py --articles 10
+    python benchmarks/prompt_cache_benchmark.py --ollama-url http://localhost:11434 --model qwen3:30b-a3b
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Any
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from prompt_templates import ARTICLE_SUMMARY, CallProfiles
+
+
+SAMPLE_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'sample-data.json')
+
+# 記事本文の水増し用（実記事程度の長さにする）
+FILLER_SENTENCES = [
+    "The company said the update improves reasoning and coding benchmarks.",
+    "Analysts expect the release to intensify competition among AI vendors.",
+    "Pricing for enterprise customers will be announced later this quarter.",
+    "The model is available through the API and consumer applications.",
+    "Researchers highlighted improvements in multilingual performance, including Japanese."
+]
+
+
+def legacy_article_prompt(full_text: str) -> str:
+    """変更前の要約プロンプト（記事テキストが指示の途中に入る形式）"""
+    return f"""You are a professional Japanese business news summarizer.
+
+Article: {full_text[:800]}
+
+Task: Create a concise Japanese summary (max 50 characters) that includes:
+1. What happened (具体的な出来事)
+2. Who is involved (関係者・企業名)
+3. Key impact (重要な影響)
+
+Requirements:
+- Output ONLY the Japanese summary
+- No thinking, no explanation, no analysis
+- Direct answer only
+
+Japanese summary:"""
+
+
+def shared_prefix_article_prompt(full_text: str) -> str:
+    """共有プレフィックス型の要約プロンプト"""
+    return ARTICLE_SUMMARY.render(article=full_text[:800])
+
+
+def load_articles(count: int) -> List[str]:
+    """ベンチマーク用の記事テキストを生成"""
+    with open(SAMPLE_DATA_PATH, 'r', encoding='utf-8') as f:
+        samples = json.load(f)["sample_news_data"]
+
+    articles = []
+    for i in range(count):
+        sample = samples[i % len(samples)]
+        body = " ".join(FILLER_SENTENCES[(i + j) % len(FILLER_SENTENCES)] for j in range(4))
+        articles.append(f"{sample['title']} (#{i + 1}). {sample['description']}. {body}")
+    return articles
+
+
+def run_series(ollama_url: str, model: str, prompts: List[str], options: Dict[str, Any],
+               keep_alive: Any) -> List[Dict[str, float]]:
+    """
+    プロンプトを順番に送信し、呼び出しごとの計測値を取得
+
+    Returns:
+        List[Dict]: 呼び出しごとの prompt_eval_count / prompt_eval_ms / total_ms
+    """
+    results = []
+    for prompt in prompts:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "think": False,
+            "options": options
+        }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        started = time.perf_counter()
+        response = requests.post(f"{ollama_url}/api/generate", json=payload, timeout=120)
+        response.raise_for_status()
+        body = response.json()
+        results.append({
+            "prompt_eval_count": body.get("prompt_eval_count", 0),
+            "prompt_eval_ms": body.get("prompt_eval_duration", 0) / 1e6,
+            "load_ms": body.get("load_duration", 0) / 1e6,
+            "total_ms": (time.perf_counter() - started) * 1000
+        })
+    return results
+
+
+def print_series(label: str, results: List[Dict[str, float]]) -> None:
+    """計測結果を表示"""
+    print(f"\n📊 {label}")
+    print(f"{'#':>3} {'eval tokens':>12} {'prompt eval ms':>15} {'load ms':>9} {'total ms':>9}")
+    for i, result in enumerate(results, 1):
+        print(f"{i:>3} {result['prompt_eval_count']:>12} {result['prompt_eval_ms']:>15.1f} "
+              f"{result['load_ms']:>9.1f} {result['total_ms']:>9.1f}")
+
+    # 1件目はモデルロード・キャッシュ構築を含むため除外して集計
+    warm = results[1:] or results
+    print(f"    平均（2件目以降）: prompt eval {statistics.mean(r['prompt_eval_ms'] for r in warm):.1f} ms, "
+          f"評価トークン {statistics.mean(r['prompt_eval_count'] for r in warm):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='プロンプトKVキャッシュ ベンチマーク')
+    parser.add_argument('--ollama-url', default='http://localhost:11434', help='OllamaサーバーURL')
+    parser.add_argument('--model', default='qwen3:30b-a3b', help='モデル名')
+    parser.add_argument('--articles', type=int, default=8, help='連続で要約する記事数')
+    args = parser.parse_args()
+
+    profiles = CallProfiles.from_settings()
+    articles = load_articles(args.articles)
+    options = profiles.options("article_summary")
+
+    legacy = run_series(args.ollama_url, args.model, [legacy_article_prompt(a) for a in articles],
+                        options, keep_alive=None)
+    shared = run_series(args.ollama_url, args.model, [shared_prefix_article_prompt(a) for a in articles],
+                        options, keep_alive=profiles.keep_alive)
+
+    print_series("従来プロンプト（記事が指示の途中）", legacy)
+    print_series(f"共有プレフィックス + keep_alive={profiles.keep_alive}", shared)
+
+
+if __name__ == "__main__":
+    main()
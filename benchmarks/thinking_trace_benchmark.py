@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+思考トレース可視化 ベンチマーク
+
+合成した長い思考トレース（デフォルト1万ステップ）で、ThinkingVisualizerの
+統計・メタデータ集計と可視化データ生成の所要時間を計測します。
+
+- 従来の集計（フェーズごとにステップ列を再走査する多パス方式）
+- TraceStatistics の逐次集計（1パス）
+- TraceStatistics のnumpy一括計算（numpyがある場合）
+- generate_thinking_flow() / generate_html_report() 全体
+
+使い方:
+    python benchmarks/thinking_trace_benchmark.py
+    python benchmarks/thinking_trace_benchmark.py --steps 10000 --phases 8 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'enhanced-deepresearch'))
+
+import thinking_visualizer
+from thinking_visualizer import ThinkingVisualizer, TraceStatistics
+
+
+PHASES = ["decomposition", "reasoning", "verification", "synthesis",
+          "collection", "analysis", "validation", "conclusion"]
+VERIFICATION_STATUSES = ["verified", "pending", "partial", "rejected"]
+
+
+@dataclass
+class SyntheticStep:
+    """ThinkingStepと同じ属性を持つ合成ステップ"""
+    step_id: int
+    phase: str
+    input_data: str
+    output_data: str
+    confidence: float
+    timestamp: datetime
+    duration: float
+    verification_status: str
+
+
+@dataclass
+class SyntheticResult:
+    """ResearchResultと同じ属性を持つ合成結果"""
+    topic: str
+    final_answer: str
+    confidence_score: float
+    thinking_steps: List[SyntheticStep]
+    time_taken: float
+
+
+def build_trace(steps: int, phases: int) -> SyntheticResult:
+    """合成の思考トレースを作成"""
+    random.seed(42)
+    started = datetime.now()
+    trace = [
+        SyntheticStep(
+            step_id=i,
+            phase=PHASES[random.randrange(phases)],
+            input_data="入力" * 10,
+            output_data="出力" * 20,
+            confidence=random.random(),
+            timestamp=started + timedelta(milliseconds=i * 250),
+            duration=random.uniform(0.05, 3.0),
+            verification_status=random.choice(VERIFICATION_STATUSES)
+        )
+        for i in range(1, steps + 1)
+    ]
+    return SyntheticResult("合成トレース", "", 0.8, trace, steps * 0.25)
+
+
+def legacy_statistics(steps: List[SyntheticStep]) -> Dict[str, Any]:
+    """従来の集計（フェーズ平均・分散・複雑度・検証率・時間的スパンをそれぞれ別の走査で計算）"""
+    phase_stats = {}
+    trajectory = []
+    for step in steps:
+        phase_stats.setdefault(step.phase, {"count": 0, "total_duration": 0})
+        phase_stats[step.phase]["count"] += 1
+        phase_stats[step.phase]["total_duration"] += step.duration
+        trajectory.append(step.confidence)
+    for phase in phase_stats:
+        phase_steps = [s for s in steps if s.phase == phase]
+        phase_stats[phase]["avg_confidence"] = sum(s.confidence for s in phase_steps) / len(phase_steps)
+    mean = sum(trajectory) / len(trajectory)
+    variance = sum((x - mean) ** 2 for x in trajectory) / len(trajectory)
+    complexity = len(set(s.phase for s in steps)) * 2 + len(steps) * 0.1
+    verified = sum(1 for s in steps if s.verification_status == 'verified') / len(steps)
+
+    # _generate_statistics() はノードに対して同じ集計をもう一度行っていた
+    node_phases = {}
+    for step in steps:
+        node_phases.setdefault(step.phase, {"count": 0, "total_duration": 0})
+        node_phases[step.phase]["count"] += 1
+        node_phases[step.phase]["total_duration"] += step.duration
+    for phase in node_phases:
+        phase_steps = [s for s in steps if s.phase == phase]
+        node_phases[phase]["avg_confidence"] = sum(s.confidence for s in phase_steps) / len(phase_steps)
+    confidences = [s.confidence for s in steps]
+    node_mean = sum(confidences) / len(confidences)
+    node_variance = sum((x - node_mean) ** 2 for x in confidences) / len(confidences)
+    timestamps = [s.timestamp for s in steps]
+    temporal_span = (max(timestamps) - min(timestamps)).total_seconds()
+
+    return {"phases": phase_stats, "variance": variance, "complexity": complexity, "verified": verified,
+            "node_phases": node_phases, "node_variance": node_variance, "temporal_span": temporal_span}
+
+
+def trace_statistics(steps: List[SyntheticStep], expected: int) -> TraceStatistics:
+    """TraceStatisticsで集計（expected でnumpy一括計算の有無が決まる）"""
+    trace = TraceStatistics(expected)
+    for step in steps:
+        trace.add_step(step.phase, step.confidence, step.duration, step.verification_status, step.timestamp)
+    return trace.finalize()
+
+
+def measure(name: str, func: Callable[[], Any], repeat: int) -> float:
+    """平均所要時間（ミリ秒）を表示"""
+    func()  # ウォームアップ（テンプレートのコンパイル等）
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    print(f"  {name:<40} {elapsed_ms:>10.2f} ms")
+    return elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='思考トレース可視化 ベンチマーク')
+    parser.add_argument('--steps', type=int, default=10000, help='合成トレースのステップ数')
+    parser.add_argument('--phases', type=int, default=len(PHASES), choices=range(1, len(PHASES) + 1),
+                        metavar=f"1-{len(PHASES)}", help='使用するフェーズ数')
+    parser.add_argument('--repeat', type=int, default=5, help='計測ごとの繰り返し回数')
+    args = parser.parse_args()
+
+    result = build_trace(args.steps, args.phases)
+    steps = result.thinking_steps
+    visualizer = ThinkingVisualizer()
+    print(f"🧪 合成トレース: {args.steps}ステップ, {args.phases}フェーズ "
+          f"(numpy: {'あり' if thinking_visualizer.NUMPY_AVAILABLE else 'なし'}, "
+          f"一括計算の閾値: {thinking_visualizer.VECTORIZE_MIN_STEPS}ステップ)")
+
+    print("\n📊 統計・メタデータの集計")
+    measure("従来（多パス）", lambda: legacy_statistics(steps), args.repeat)
+    measure("TraceStatistics（逐次・1パス）", lambda: trace_statistics(steps, 0), args.repeat)
+    if thinking_visualizer.NUMPY_AVAILABLE:
+        measure("TraceStatistics（numpy一括）", lambda: trace_statistics(steps, len(steps)), args.repeat)
+
+    print("\n🧠 可視化データ生成")
+    measure("generate_thinking_flow()", lambda: visualizer.generate_thinking_flow(result), args.repeat)
+    measure("generate_html_report()", lambda: visualizer.generate_html_report(result), args.repeat)
+
+    html = visualizer.generate_html_report(result)
+    print(f"\n📄 HTMLレポート: {len(html.encode('utf-8')) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
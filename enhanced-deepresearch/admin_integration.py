@@ -6,20 +6,27 @@ Enhanced DeepResearch - 管理者サイト連携API
 Flask ベースのRESTful API として実装
 """
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 import asyncio
 import json
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 # Enhanced DeepResearch コンポーネントのインポート
-from reasoning_engine import EnhancedQwen3Llm, ResearchResult
+from reasoning_engine import EnhancedQwen3Llm, ResearchResult, ThinkingStep
 from verification_engine import VerificationEngine
 from data_collector import DataCollector
 from thinking_visualizer import ThinkingVisualizer
 from data_manager import DataManager
+from row_export import CONTENT_TYPES, EXPORT_FORMATS, PYARROW_AVAILABLE, STREAMING_FORMATS, iter_text_chunks
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, get_registry
 
 # 設定ファイル読み込み
 settings = {}
@@ -43,22 +50,71 @@ verification_engine = VerificationEngine()
 data_collector = DataCollector()
 thinking_visualizer = ThinkingVisualizer()
 data_manager = DataManager()
+metrics_registry = get_registry()
+
+# レイアウト済みの思考フロー（分析ID・レイアウト種別ごと、最近使った順に保持）
+# 保存済みの分析は更新されないため、表示範囲を変えるたびに読み込み・レイアウトし直す必要はない
+FLOW_CACHE_MAX_ENTRIES = 32
+_flow_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_flow_cache_lock = threading.Lock()
+
+@app.before_request
+def start_request_metrics():
+    """リクエストの処理時間の計測開始"""
+    g.request_started = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    """ルート別の処理時間を記録（ストリーミング応答は応答開始までの時間）"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        # パスではなくルートのパターンを使い、分析IDごとに系列が増えないようにする
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_DURATION.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """処理中リクエスト数を戻す（例外時も呼ばれる）"""
+    HTTP_REQUESTS_IN_FLIGHT.dec()
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus形式のメトリクス"""
+    return Response(metrics_registry.render(), mimetype=METRICS_CONTENT_TYPE)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """ヘルスチェック"""
+    """ヘルスチェック（データベースへの接続とOllamaバックエンドの状態を確認）"""
+    try:
+        with data_manager.store.read() as conn:
+            conn.execute("SELECT 1").fetchone()
+        database_status = "ready"
+    except Exception as e:
+        database_status = f"error: {e}"
+    
+    # バックエンドの状態はルーターのヘルスチェック・呼び出し結果を使う（ここでは通信しない）
+    backends = deepresearch_engine.router.get_status()
+    llm_status = "ready" if any(backend["healthy"] for backend in backends) else "unavailable"
+    
+    components = {
+        "reasoning_engine": llm_status,
+        "verification_engine": llm_status,
+        "data_collector": "ready",
+        "thinking_visualizer": "ready",
+        "data_manager": database_status
+    }
+    healthy = all(status == "ready" for status in components.values())
     return jsonify({
-        "status": "healthy",
+        "status": "healthy" if healthy else "degraded",
         "timestamp": datetime.now().isoformat(),
         "version": "2.0.0",
-        "components": {
-            "reasoning_engine": "ready",
-            "verification_engine": "ready", 
-            "data_collector": "ready",
-            "thinking_visualizer": "ready",
-            "data_manager": "ready"
-        }
-    })
+        "components": components,
+        "llm_backends": backends
+    }), 200 if healthy else 503
 
 @app.route('/api/deepresearch/analyze', methods=['POST'])
 def analyze_topic():
@@ -144,6 +200,9 @@ def collect_news():
                 data_collector.collect_for_research(topics[0] if topics else "AI news")
             )
             
+            # 収集記事を全文検索に登録
+            data_manager.index_articles(collected_items)
+            
             # データを管理者向け形式に変換
             news_data = []
             for item in collected_items:
@@ -255,6 +314,9 @@ def generate_report():
             report_id = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             report_path = f"data/{report_id}.html"
             
+            # レポートが参照するCSS・JavaScript（初回のみ書き込み）
+            thinking_visualizer.write_assets("data")
+            
             with open(report_path, 'w', encoding='utf-8') as f:
                 f.write(html_report)
             
@@ -327,30 +389,74 @@ def upload_sales_data():
 
 @app.route('/api/analysis/history', methods=['GET'])
 def get_analysis_history():
-    """分析履歴取得API"""
+    """分析履歴取得API（cursor で次ページを取得、分析結果本体は含まない）"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        records = data_manager.get_recent_analyses(limit)
+        cursor = request.args.get('cursor')
+        try:
+            summaries, next_cursor = data_manager.list_analyses(limit, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         history_data = []
-        for record in records:
+        for summary in summaries:
             history_data.append({
-                "id": record.id,
-                "topic": record.topic,
-                "created_at": record.created_at.isoformat(),
-                "confidence_score": record.confidence_score,
-                "analysis_time": record.analysis_time,
-                "data_sources": record.data_sources
+                "id": summary.id,
+                "topic": summary.topic,
+                "created_at": summary.created_at.isoformat(),
+                "confidence_score": summary.confidence_score,
+                "analysis_time": summary.analysis_time,
+                "data_sources": summary.data_sources
             })
         
         return jsonify({
             "history": history_data,
-            "total_count": len(history_data)
+            "total_count": len(history_data),
+            "next_cursor": next_cursor
         })
         
     except Exception as e:
         return jsonify({"error": f"履歴取得エラー: {str(e)}"}), 500
 
+@app.route('/api/analysis/<analysis_id>/result', methods=['GET'])
+def get_analysis_result_detail(analysis_id):
+    """分析結果本体の取得API（履歴一覧から個別に読み込む）"""
+    try:
+        blobs = data_manager.load_analysis_blobs(analysis_id)
+        if blobs is None:
+            return jsonify({"error": "分析結果が見つかりません"}), 404
+        
+        return jsonify({"analysis_id": analysis_id, **blobs})
+        
+    except Exception as e:
+        return jsonify({"error": f"分析結果取得エラー: {str(e)}"}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search_documents():
+    """過去の分析結果・収集記事の全文検索API"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "検索語（q）が指定されていません"}), 400
+        
+        kind = request.args.get('kind')
+        if kind not in (None, 'analysis', 'article'):
+            return jsonify({"error": "kind は analysis または article を指定してください"}), 400
+        
+        limit = request.args.get('limit', 20, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        hits, next_offset = data_manager.search(query, kind=kind, limit=limit, offset=offset)
+        
+        return jsonify({
+            "query": query,
+            "results": [asdict(hit) for hit in hits],
+            "count": len(hits),
+            "next_offset": next_offset
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"検索エラー: {str(e)}"}), 500
+
 @app.route('/api/analysis/<analysis_id>/visualization', methods=['GET'])
 def get_analysis_visualization(analysis_id):
     """分析結果の可視化データ取得"""
@@ -374,6 +480,160 @@ def get_analysis_visualization(analysis_id):
     except Exception as e:
         return jsonify({"error": f"可視化データ取得エラー: {str(e)}"}), 500
 
+def load_analysis_flow(analysis_id: str, layout_type: str) -> Optional[Dict[str, Any]]:
+    """
+    レイアウト済みの思考フローを取得（2回目以降はキャッシュから返す）
+
+    Args:
+        analysis_id (str): 分析ID
+        layout_type (str): hierarchical または force-directed
+
+    Returns:
+        Optional[Dict]: レイアウト・タイル情報付きの可視化データ（分析が無い場合はNone）
+    """
+    key = (analysis_id, layout_type)
+    with _flow_cache_lock:
+        flow_data = _flow_cache.get(key)
+        if flow_data is not None:
+            _flow_cache.move_to_end(key)
+            return flow_data
+    
+    record = data_manager.load_analysis_result(analysis_id)
+    if not record:
+        return None
+    
+    steps = [
+        ThinkingStep(
+            step_id=step["step_id"],
+            phase=step["phase"],
+            input_data=step["input_data"],
+            output_data=step["output_data"],
+            confidence=step["confidence"],
+            timestamp=datetime.fromisoformat(step["timestamp"]),
+            duration=step["duration"]
+        )
+        for step in data_manager.load_thinking_steps(analysis_id)
+    ]
+    research_result = ResearchResult(
+        topic=record.topic,
+        final_answer="",
+        confidence_score=record.confidence_score,
+        thinking_steps=steps,
+        verification_results=record.verification_result,
+        sources_analyzed=record.data_sources,
+        time_taken=record.analysis_time,
+        quality_metrics={}
+    )
+    flow_data = thinking_visualizer.generate_thinking_flow(research_result, layout_type)
+    
+    with _flow_cache_lock:
+        _flow_cache[key] = flow_data
+        _flow_cache.move_to_end(key)
+        while len(_flow_cache) > FLOW_CACHE_MAX_ENTRIES:
+            _flow_cache.popitem(last=False)
+    return flow_data
+
+@app.route('/api/analysis/<analysis_id>/flow', methods=['GET'])
+def get_analysis_flow(analysis_id):
+    """
+    思考フローのレイアウト済みデータ取得API（表示範囲のタイル単位）
+
+    クエリ:
+        layout: hierarchical（デフォルト）または force-directed
+        level: steps（全ステップ）・phase_runs（同一フェーズを集約）・auto（大きなフローは集約）
+        bbox: 表示範囲 "x0,y0,x1,y1"（省略時は全体）
+    """
+    try:
+        layout_type = request.args.get('layout', 'hierarchical')
+        if layout_type not in ('hierarchical', 'force-directed'):
+            return jsonify({"error": "layout は hierarchical または force-directed を指定してください"}), 400
+        
+        level = request.args.get('level', 'auto')
+        if level not in ('auto', 'steps', 'phase_runs'):
+            return jsonify({"error": "level は auto・steps・phase_runs のいずれかを指定してください"}), 400
+        
+        bbox = None
+        if request.args.get('bbox'):
+            try:
+                bbox = [float(value) for value in request.args['bbox'].split(',')]
+            except ValueError:
+                bbox = []
+            if len(bbox) != 4:
+                return jsonify({"error": "bbox は x0,y0,x1,y1 の形式で指定してください"}), 400
+        
+        # レイアウト・タイル索引は分析ごとにキャッシュされ、表示範囲の取得ではタイルを引くだけ
+        flow_data = load_analysis_flow(analysis_id, layout_type)
+        if flow_data is None:
+            return jsonify({"error": "分析結果が見つかりません"}), 404
+        
+        if level == 'auto':
+            level = 'phase_runs' if 'levels' in flow_data else 'steps'
+        
+        view = thinking_visualizer.layout_engine.viewport(
+            flow_data, bbox or flow_data["layout"]["bounds"], level
+        )
+        return jsonify({
+            "analysis_id": analysis_id,
+            "metadata": flow_data["metadata"],
+            "legend": flow_data["legend"],
+            **view
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"思考フロー取得エラー: {str(e)}"}), 500
+
+@app.route('/api/export/<table>', methods=['GET'])
+def export_table(table):
+    """
+    分析履歴・思考ステップの全件エクスポートAPI（BIツール向け）
+
+    CSV・JSON Lines は1行ずつ生成しながら返す（全件をメモリに載せない）。
+    Parquet はファイルに書き出してから返す。
+
+    クエリ:
+        format: csv（デフォルト）・jsonl・parquet
+        since: この日時以降（ISO形式、含む）
+        until: この日時より前（ISO形式、含まない）
+    """
+    try:
+        if table not in DataManager.EXPORT_TABLES:
+            return jsonify({"error": f"table は {' / '.join(DataManager.EXPORT_TABLES)} のいずれかを指定してください"}), 400
+        
+        format_type = request.args.get('format', 'csv')
+        if format_type not in EXPORT_FORMATS:
+            return jsonify({"error": f"format は {' / '.join(EXPORT_FORMATS)} のいずれかを指定してください"}), 400
+        if format_type == 'parquet' and not PYARROW_AVAILABLE:
+            return jsonify({"error": "Parquet形式でエクスポートするには pyarrow が必要です"}), 501
+        
+        since = request.args.get('since') or None
+        until = request.args.get('until') or None
+        for value in (since, until):
+            if value is not None:
+                try:
+                    datetime.fromisoformat(value)
+                except ValueError:
+                    return jsonify({"error": f"日時はISO形式で指定してください: {value}"}), 400
+        
+        filename = f"{table}.{format_type}"
+        if format_type in STREAMING_FORMATS:
+            rows, columns = data_manager.export_rows(table, since, until)
+            return Response(
+                stream_with_context(iter_text_chunks(rows, columns, format_type)),
+                content_type=CONTENT_TYPES[format_type],
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            )
+        
+        output_path = os.path.join(data_manager.data_dir, "exports", f"{table}_{uuid.uuid4().hex}.parquet")
+        data_manager.export_table(table, output_path, format_type, since, until)
+        # 開いた後に削除しても、送信が終わるまでは読める
+        export_file = open(output_path, 'rb')
+        os.remove(output_path)
+        return send_file(export_file, mimetype=CONTENT_TYPES[format_type],
+                         as_attachment=True, download_name=filename)
+        
+    except Exception as e:
+        return jsonify({"error": f"エクスポートエラー: {str(e)}"}), 500
+
 if __name__ == '__main__':
     import argparse
     
@@ -392,6 +652,11 @@ if __name__ == '__main__':
     print("   - POST /api/news/analyze        - ニュース分析")
     print("   - POST /api/reports/generate    - レポート生成")
     print("   - POST /api/sales/upload        - 売上データアップロード")
+    print("   - GET  /api/analysis/<id>/result - 分析結果本体")
+    print("   - GET  /api/search              - 分析結果・収集記事の全文検索")
+    print("   - GET  /api/analysis/<id>/flow  - 思考フロー（レイアウト済み・表示範囲単位）")
+    print("   - GET  /api/export/<table>      - 分析履歴・思考ステップの全件エクスポート")
+    print("   - GET  /metrics                 - Prometheus形式のメトリクス")
     
     # 設定の優先順位: コマンドライン引数 > 設定ファイル > デフォルト値
     port = args.port or settings.get('system', {}).get('api_port', 5001)
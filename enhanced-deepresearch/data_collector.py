@@ -15,6 +15,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 from company_news_collector import CompanyNewsCollector
+from article_embeddings import article_text
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -180,12 +181,18 @@ class DataCollector(CompanyNewsCollector):
         # データクリーニングと重複排除
         cleaned_items = await self._clean_and_deduplicate(all_items)
         
+        # 埋め込みによる意味的重複除去と関連度スコア（利用不可の場合はキーワード一致のスコアのまま）
+        cleaned_items = self._apply_embedding_scores(cleaned_items, topics)
+        
         # 関連性フィルタリング
         relevant_items = self._filter_by_relevance(cleaned_items, topics)
         
         # 収集統計更新
         self._update_collection_stats(all_items, cleaned_items, relevant_items)
         
+        # 記事ストアに保存（新規・更新の判定結果を metadata に付与）
+        self._store_articles(relevant_items)
+        
         print(f"✅ データ収集完了: {len(relevant_items)}件（元: {len(all_items)}件）")
         
         self.collected_items = relevant_items
@@ -424,10 +431,52 @@ class DataCollector(CompanyNewsCollector):
         content_sample = (title + " " + content)[:200].lower().strip()
         return hashlib.md5(content_sample.encode()).hexdigest()
     
+    def _apply_embedding_scores(self, items: List[CollectedItem], topics: List[str]) -> List[CollectedItem]:
+        """
+        埋め込みベクトルで重複除去と関連度スコアを1回の類似度計算で行う
+        
+        Args:
+            items: クリーニング済みアイテム
+            topics: 収集対象トピック
+        
+        Returns:
+            List[CollectedItem]: 重複を除き、関連度スコアを更新したアイテム
+        """
+        if not items or not topics or not self.embedder.available:
+            return items
+        
+        try:
+            index = self.embedder.build_index([article_text(item.title, item.content) for item in items])
+            relevance = index.relevance(self.embedder.embed(topics))
+            duplicate = index.duplicate_mask(self.embedder.dedup_threshold)
+        except Exception as e:
+            print(f"⚠️ 埋め込み計算エラー（キーワード一致で代替）: {e}")
+            return items
+        
+        unique_items = []
+        for item, score, is_duplicate in zip(items, relevance, duplicate):
+            if is_duplicate:
+                continue
+            item.relevance_score = float(score)
+            item.metadata["relevance_method"] = "embedding"
+            unique_items.append(item)
+        
+        duplicates_removed = len(items) - len(unique_items)
+        if duplicates_removed > 0:
+            print(f"🔄 意味的重複除去: {duplicates_removed}件")
+        
+        return unique_items
+    
     def _filter_by_relevance(self, items: List[CollectedItem], topics: List[str]) -> List[CollectedItem]:
         """関連性によるフィルタリング"""
-        threshold = self.collection_config["relevance_threshold"]
-        relevant_items = [item for item in items if item.relevance_score >= threshold]
+        keyword_threshold = self.collection_config["relevance_threshold"]
+        relevant_items = [
+            item for item in items
+            if item.relevance_score >= (
+                self.embedder.relevance_threshold
+                if item.metadata.get("relevance_method") == "embedding" else keyword_threshold
+            )
+        ]
         
         filtered_count = len(items) - len(relevant_items)
         if filtered_count > 0:
@@ -438,6 +487,24 @@ class DataCollector(CompanyNewsCollector):
         
         return relevant_items
     
+    def _store_articles(self, items: List[CollectedItem]) -> None:
+        """収集アイテムを記事ストアに保存"""
+        articles = [
+            {
+                "title": item.title,
+                "url": item.url,
+                "summary": item.content[:1000],
+                "published_at": item.published_at.isoformat(),
+                "source_type": item.data_type,
+                "source_url": item.source
+            }
+            for item in items
+        ]
+        self.article_store.upsert_articles(articles)
+        for item, article in zip(items, articles):
+            if "article_status" in article:
+                item.metadata["article_status"] = article["article_status"]
+    
     def _generate_item_id(self, url: str) -> str:
         """アイテムIDを生成"""
         return hashlib.md5(url.encode()).hexdigest()[:16]
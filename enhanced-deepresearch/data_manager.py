@@ -7,6 +7,7 @@ Enhanced DeepResearch - データ管理エンジン
 - 分析結果の永続化
 - キャッシュ管理
 - JSON/CSV エクスポート
+- 分析履歴・思考ステップの全件ストリーミングエクスポート（CSV / JSON Lines / Parquet）
 """
 
 import sys
@@ -15,13 +16,206 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 import json
 import csv
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
-from datetime import datetime
-import sqlite3
-import pickle
+from datetime import date, datetime, timedelta
 import hashlib
 
+import sqlite3
+import zlib
+
+from sqlite_store import get_store
+from cache_store import get_cache
+from row_export import write_rows
+
+# zstandardのインポート（フォールバック対応）
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# これより短いペイロードは圧縮しても小さくならないためそのまま保存
+PAYLOAD_COMPRESS_MIN_BYTES = 256
+
+def _compress_payload(text: str) -> Tuple[str, bytes]:
+    """
+    思考ステップのペイロードを圧縮
+    
+    Args:
+        text (str): 入力・出力データ
+    
+    Returns:
+        Tuple[str, bytes]: (コーデック名, 保存するバイト列)
+    """
+    raw = text.encode("utf-8")
+    if len(raw) < PAYLOAD_COMPRESS_MIN_BYTES:
+        return "raw", raw
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+def _decompress_payload(codec: str, data: bytes) -> str:
+    """
+    圧縮されたペイロードを復元
+    
+    Args:
+        codec (str): コーデック名（raw / zlib / zstd）
+        data (bytes): 保存されているバイト列
+    
+    Returns:
+        str: 入力・出力データ
+    """
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd圧縮のペイロードを読むには zstandard が必要です")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return raw.decode("utf-8")
+
+def _store_payload(conn, text: Optional[str]) -> Optional[str]:
+    """
+    ペイロードを内容ハッシュで保存（同じ内容は1回だけ保存される）
+    
+    Args:
+        conn: 書き込みトランザクション中の接続
+        text (str): 入力・出力データ
+    
+    Returns:
+        Optional[str]: ペイロードのハッシュ（textがNoneの場合はNone）
+    """
+    if text is None:
+        return None
+    payload_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    if conn.execute("SELECT 1 FROM step_payloads WHERE hash = ?", (payload_hash,)).fetchone() is None:
+        codec, data = _compress_payload(text)
+        conn.execute(
+            "INSERT INTO step_payloads (hash, codec, data, raw_size) VALUES (?, ?, ?, ?)",
+            (payload_hash, codec, data, len(text.encode("utf-8")))
+        )
+    return payload_hash
+
+def _step_row(conn, analysis_id: str, step) -> Tuple[Any, ...]:
+    """
+    思考ステップ1件を DataManager.INSERT_STEP_SQL のパラメータに変換
+    
+    Args:
+        conn: 書き込みトランザクション中の接続（ペイロードの保存に使う）
+        analysis_id (str): 分析ID
+        step: ThinkingStep（同じ属性を持つオブジェクト）
+    
+    Returns:
+        Tuple: INSERT_STEP_SQL の列順のパラメータ
+    """
+    return (
+        analysis_id,
+        step.step_id,
+        step.phase,
+        step.confidence,
+        _store_payload(conn, step.input_data),
+        _store_payload(conn, step.output_data),
+        step.timestamp.isoformat(),
+        getattr(step, 'duration', 0.0)
+    )
+
+def _move_step_payloads(conn) -> None:
+    """
+    既存の思考ステップの入力・出力データを step_payloads に移す（マイグレーション用）
+    
+    Args:
+        conn: 書き込みトランザクション中の接続
+    """
+    rows = conn.execute(
+        "SELECT id, input_data, output_data FROM thinking_steps "
+        "WHERE input_data IS NOT NULL OR output_data IS NOT NULL"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE thinking_steps SET input_hash = ?, output_hash = ?, input_data = NULL, output_data = NULL "
+        "WHERE id = ?",
+        [(_store_payload(conn, input_data), _store_payload(conn, output_data), step_id)
+         for step_id, input_data, output_data in rows]
+    )
+
+def _rebuild_statistics(conn) -> None:
+    """
+    統計ロールアップを analysis_records から作り直す（マイグレーション時のバックフィル用）
+    
+    Args:
+        conn: 書き込みトランザクション中の接続
+    """
+    conn.execute("DELETE FROM analysis_stats")
+    conn.execute("DELETE FROM analysis_daily_stats")
+    conn.execute("""
+        INSERT INTO analysis_stats (id, total_analyses, sum_confidence, sum_analysis_time)
+        SELECT 1, COUNT(*), TOTAL(confidence_score), TOTAL(analysis_time) FROM analysis_records
+    """)
+    conn.execute("""
+        INSERT INTO analysis_daily_stats (day, analyses, sum_confidence, sum_analysis_time)
+        SELECT substr(created_at, 1, 10), COUNT(*), TOTAL(confidence_score), TOTAL(analysis_time)
+        FROM analysis_records
+        GROUP BY substr(created_at, 1, 10)
+    """)
+
+def _create_search_index(conn) -> None:
+    """
+    全文検索インデックスを作成（trigramトークナイザが無い古いSQLiteではunicode61）
+    
+    trigramは日本語のように単語を空白で区切らない文章も部分一致で検索できる
+    
+    Args:
+        conn: 書き込みトランザクション中の接続
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_documents (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            ref_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            body TEXT NOT NULL,
+            url TEXT,
+            created_at TEXT NOT NULL,
+            UNIQUE (kind, ref_id)
+        )
+    """)
+    
+    fts_sql = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+            title, body, content='search_documents', content_rowid='id', tokenize='{tokenizer}'
+        )
+    """
+    try:
+        conn.execute(fts_sql.format(tokenizer="trigram"))
+    except sqlite3.OperationalError:
+        conn.execute(fts_sql.format(tokenizer="unicode61"))
+    
+    # search_documents の変更をFTSインデックスに反映（外部コンテンツテーブルの定型トリガー）
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN
+            INSERT INTO search_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN
+            INSERT INTO search_fts (search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN
+            INSERT INTO search_fts (search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO search_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+    """)
+    
+    # 既存の分析結果を登録
+    conn.execute("""
+        INSERT OR IGNORE INTO search_documents (kind, ref_id, title, body, created_at)
+        SELECT 'analysis', id, topic, COALESCE(json_extract(analysis_result, '$.final_answer'), ''), created_at
+        FROM analysis_records
+    """)
+
 @dataclass
 class AnalysisRecord:
     """分析記録"""
@@ -34,13 +228,255 @@ class AnalysisRecord:
     analysis_time: float
     data_sources: List[str]
 
+@dataclass
+class AnalysisSummary:
+    """分析記録の一覧表示用（分析結果・検証結果のJSONは含まない）"""
+    id: str
+    topic: str
+    created_at: datetime
+    confidence_score: float
+    analysis_time: float
+    data_sources: List[str]
+
+@dataclass
+class SearchHit:
+    """全文検索の結果1件"""
+    kind: str  # "analysis" | "article"
+    ref_id: str
+    title: str
+    snippet: str
+    url: Optional[str]
+    created_at: str
+    score: float
+
 class DataManager:
     """
     データ管理エンジン
     
     分析結果の保存、管理、エクスポート機能を提供
+    
+    SQLiteへの接続はプールして使い回し（WALモード）、
+    分析結果の保存中もステータス・履歴の読み取りをブロックしない
     """
     
+    # 同一文字列のSQLは接続ごとのステートメントキャッシュで再利用される
+    INSERT_RECORD_SQL = """
+        INSERT OR REPLACE INTO analysis_records 
+        (id, topic, analysis_result, verification_result, created_at, 
+         confidence_score, analysis_time, data_sources)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    # 入力・出力データ本体は step_payloads に圧縮して保存し、ハッシュで参照する
+    INSERT_STEP_SQL = """
+        INSERT INTO thinking_steps 
+        (analysis_id, step_id, phase, confidence, input_hash, output_hash, timestamp, duration)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    SELECT_STEPS_SQL = """
+        SELECT s.step_id, s.phase, s.confidence, s.timestamp, s.duration,
+               s.input_data, i.codec, i.data, s.output_data, o.codec, o.data
+        FROM thinking_steps s
+        LEFT JOIN step_payloads i ON i.hash = s.input_hash
+        LEFT JOIN step_payloads o ON o.hash = s.output_hash
+        WHERE s.analysis_id = ?
+        ORDER BY s.step_id
+    """
+    UPSERT_SEARCH_DOCUMENT_SQL = """
+        INSERT INTO search_documents (kind, ref_id, title, body, url, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (kind, ref_id) DO UPDATE SET
+            title = excluded.title,
+            body = excluded.body,
+            url = excluded.url,
+            created_at = excluded.created_at
+        WHERE title IS NOT excluded.title OR body IS NOT excluded.body OR url IS NOT excluded.url
+    """
+    # bm25はスコアが小さいほど関連度が高い（タイトルの一致を本文の2倍に重み付け）
+    SEARCH_SQL = """
+        SELECT d.kind, d.ref_id, d.title,
+               snippet(search_fts, 1, '[', ']', '…', 24), d.url, d.created_at,
+               bm25(search_fts, 2.0, 1.0) AS score
+        FROM search_fts
+        JOIN search_documents d ON d.id = search_fts.rowid
+        WHERE search_fts MATCH ? {kind_filter}
+        ORDER BY score
+        LIMIT ? OFFSET ?
+    """
+    # trigramは3文字未満の語を索引で引けないため、短い語はLIKEで探す
+    SEARCH_LIKE_SQL = """
+        SELECT kind, ref_id, title, substr(body, 1, 120), url, created_at, 0.0
+        FROM search_documents
+        WHERE ({like_filter}) {kind_filter}
+        ORDER BY created_at DESC
+        LIMIT ? OFFSET ?
+    """
+    PAYLOAD_STATS_SQL = "SELECT COUNT(*), TOTAL(raw_size), TOTAL(length(data)) FROM step_payloads"
+    SELECT_RECORD_SQL = "SELECT * FROM analysis_records WHERE id = ?"
+    # 統計は保存時に更新するロールアップ（全体合計と日別バケット）から読む
+    SELECT_EXISTING_SQL = "SELECT created_at, confidence_score, analysis_time FROM analysis_records WHERE id = ?"
+    UPDATE_STATS_SQL = """
+        UPDATE analysis_stats
+        SET total_analyses = total_analyses + ?,
+            sum_confidence = sum_confidence + ?,
+            sum_analysis_time = sum_analysis_time + ?
+        WHERE id = 1
+    """
+    UPSERT_DAILY_STATS_SQL = """
+        INSERT INTO analysis_daily_stats (day, analyses, sum_confidence, sum_analysis_time)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (day) DO UPDATE SET
+            analyses = analyses + excluded.analyses,
+            sum_confidence = sum_confidence + excluded.sum_confidence,
+            sum_analysis_time = sum_analysis_time + excluded.sum_analysis_time
+    """
+    STATS_TOTALS_SQL = "SELECT total_analyses, sum_confidence, sum_analysis_time FROM analysis_stats WHERE id = 1"
+    STATS_RECENT_SQL = "SELECT TOTAL(analyses) FROM analysis_daily_stats WHERE day >= ?"
+    SELECT_RECENT_SQL = """
+        SELECT * FROM analysis_records 
+        ORDER BY created_at DESC 
+        LIMIT ?
+    """
+    # 一覧用の射影クエリ（created_at, id のキーセットでページング）
+    SELECT_SUMMARY_SQL = """
+        SELECT id, topic, created_at, confidence_score, analysis_time, data_sources
+        FROM analysis_records
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """
+    SELECT_SUMMARY_AFTER_SQL = """
+        SELECT id, topic, created_at, confidence_score, analysis_time, data_sources
+        FROM analysis_records
+        WHERE (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """
+    SELECT_BLOBS_SQL = "SELECT analysis_result, verification_result FROM analysis_records WHERE id = ?"
+    # エクスポート用（古い順にキーセットで読み進める、最終回答はSQLite側でJSONから取り出す）
+    EXPORT_ANALYSES_SQL = """
+        SELECT id, topic, created_at, confidence_score, analysis_time,
+               json_array_length(data_sources), json_extract(analysis_result, '$.final_answer')
+        FROM analysis_records
+        WHERE (created_at, id) > (?, ?) AND created_at < ?
+        ORDER BY created_at, id
+        LIMIT ?
+    """
+    EXPORT_ANALYSIS_IDS_SQL = """
+        SELECT created_at, id
+        FROM analysis_records
+        WHERE (created_at, id) > (?, ?) AND created_at < ?
+        ORDER BY created_at, id
+        LIMIT ?
+    """
+    
+    # 一覧取得の1ページあたりの上限
+    MAX_PAGE_SIZE = 1000
+    
+    # エクスポートする表と列定義（列名, 型）
+    ANALYSIS_EXPORT_COLUMNS = [
+        ("id", "string"), ("topic", "string"), ("created_at", "string"),
+        ("confidence_score", "float"), ("analysis_time", "float"),
+        ("data_source_count", "int"), ("final_answer", "string")
+    ]
+    STEP_EXPORT_COLUMNS = [
+        ("analysis_id", "string"), ("step_id", "int"), ("phase", "string"), ("confidence", "float"),
+        ("timestamp", "string"), ("duration", "float"), ("input_data", "string"), ("output_data", "string")
+    ]
+    EXPORT_TABLES = ("analyses", "thinking_steps")
+    EXPORT_MAX_TIMESTAMP = "9999-12-31T23:59:59.999999"
+    # エクスポート時に1回のクエリで読む分析記録の件数
+    EXPORT_BATCH_SIZE = 500
+    
+    # スキーマのマイグレーション（PRAGMA user_version で管理、追加のみ）
+    MIGRATIONS = [
+        (1, [
+            """
+            CREATE TABLE IF NOT EXISTS analysis_records (
+                id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                analysis_result TEXT NOT NULL,
+                verification_result TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                confidence_score REAL NOT NULL,
+                analysis_time REAL NOT NULL,
+                data_sources TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS thinking_steps (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                analysis_id TEXT NOT NULL,
+                step_id INTEGER NOT NULL,
+                phase TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                input_data TEXT,
+                output_data TEXT,
+                timestamp TEXT NOT NULL,
+                FOREIGN KEY (analysis_id) REFERENCES analysis_records (id)
+            )
+            """
+        ]),
+        (2, [
+            # 履歴の並び替え・期間集計用（統計値も表本体を読まずに済むようカバリングにする）
+            """
+            CREATE INDEX IF NOT EXISTS idx_analysis_records_created_at
+            ON analysis_records (created_at, confidence_score, analysis_time)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_thinking_steps_analysis_id
+            ON thinking_steps (analysis_id, step_id)
+            """
+        ]),
+        (3, [
+            # 一覧のキーセットページング用（created_at が同じ行は id で順序を確定）
+            """
+            CREATE INDEX IF NOT EXISTS idx_analysis_records_created_at_id
+            ON analysis_records (created_at, id)
+            """
+        ]),
+        (4, [
+            # 統計ロールアップ（/api/deepresearch/status を履歴件数に依存せず返すため）
+            """
+            CREATE TABLE IF NOT EXISTS analysis_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_analyses INTEGER NOT NULL DEFAULT 0,
+                sum_confidence REAL NOT NULL DEFAULT 0,
+                sum_analysis_time REAL NOT NULL DEFAULT 0
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS analysis_daily_stats (
+                day TEXT PRIMARY KEY,
+                analyses INTEGER NOT NULL DEFAULT 0,
+                sum_confidence REAL NOT NULL DEFAULT 0,
+                sum_analysis_time REAL NOT NULL DEFAULT 0
+            )
+            """,
+            _rebuild_statistics
+        ]),
+        (5, [
+            # 思考ステップの入力・出力データを内容ハッシュで重複排除して圧縮保存
+            """
+            CREATE TABLE IF NOT EXISTS step_payloads (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL,
+                raw_size INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+            "ALTER TABLE thinking_steps ADD COLUMN input_hash TEXT",
+            "ALTER TABLE thinking_steps ADD COLUMN output_hash TEXT",
+            _move_step_payloads
+        ]),
+        (6, [
+            # 分析結果・収集記事の全文検索
+            _create_search_index
+        ]),
+        (7, [
+            # 思考ステップの処理時間（秒、これより前に保存したステップは0）
+            "ALTER TABLE thinking_steps ADD COLUMN duration REAL NOT NULL DEFAULT 0"
+        ])
+    ]
+    
     def __init__(self, data_dir: str = "data"):
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "enhanced_deepresearch.db")
@@ -50,38 +486,16 @@ class DataManager:
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs(self.cache_dir, exist_ok=True)
         
-        # データベース初期化
+        # データベース初期化（同じDBファイルの接続管理はプロセス内で共有）
+        self.store = get_store(self.db_path)
         self._init_database()
+        
+        # ファイルキャッシュ（TTL・サイズ上限付き、期限切れはバックグラウンドで削除）
+        self.cache = get_cache(self.cache_dir)
     
     def _init_database(self):
-        """データベース初期化"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS analysis_records (
-                    id TEXT PRIMARY KEY,
-                    topic TEXT NOT NULL,
-                    analysis_result TEXT NOT NULL,
-                    verification_result TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    confidence_score REAL NOT NULL,
-                    analysis_time REAL NOT NULL,
-                    data_sources TEXT NOT NULL
-                )
-            """)
-            
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS thinking_steps (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    analysis_id TEXT NOT NULL,
-                    step_id INTEGER NOT NULL,
-                    phase TEXT NOT NULL,
-                    confidence REAL NOT NULL,
-                    input_data TEXT,
-                    output_data TEXT,
-                    timestamp TEXT NOT NULL,
-                    FOREIGN KEY (analysis_id) REFERENCES analysis_records (id)
-                )
-            """)
+        """データベース初期化（未適用のマイグレーションを適用）"""
+        self.store.migrate(self.MIGRATIONS)
     
     def save_analysis_result(
         self, 
@@ -103,13 +517,13 @@ class DataManager:
         )
         
         # データベースに保存
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO analysis_records 
-                (id, topic, analysis_result, verification_result, created_at, 
-                 confidence_score, analysis_time, data_sources)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        with self.store.write() as conn:
+            # 同じIDを置き換える場合は、旧レコードの分を統計から差し引く
+            existing = conn.execute(self.SELECT_EXISTING_SQL, (record.id,)).fetchone()
+            if existing:
+                self._update_statistics(conn, existing[0], -1, -existing[1], -existing[2])
+            
+            conn.execute(self.INSERT_RECORD_SQL, (
                 record.id,
                 record.topic,
                 json.dumps(record.analysis_result, ensure_ascii=False),
@@ -120,31 +534,27 @@ class DataManager:
                 json.dumps(record.data_sources)
             ))
             
-            # 思考ステップも保存
-            for step in research_result.thinking_steps:
-                conn.execute("""
-                    INSERT INTO thinking_steps 
-                    (analysis_id, step_id, phase, confidence, input_data, output_data, timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    analysis_id,
-                    step.step_id,
-                    step.phase,
-                    step.confidence,
-                    step.input_data,
-                    step.output_data,
-                    step.timestamp.isoformat()
-                ))
+            # 思考ステップも同じトランザクションでまとめて保存
+            conn.executemany(self.INSERT_STEP_SQL, [
+                _step_row(conn, analysis_id, step) for step in research_result.thinking_steps
+            ])
+            
+            self._update_statistics(
+                conn, record.created_at.isoformat(), 1, record.confidence_score, record.analysis_time
+            )
+            
+            conn.execute(self.UPSERT_SEARCH_DOCUMENT_SQL, (
+                "analysis", record.id, record.topic,
+                record.analysis_result.get("final_answer", "") or "", None, record.created_at.isoformat()
+            ))
         
         print(f"💾 分析結果を保存: {analysis_id}")
         return analysis_id
     
     def load_analysis_result(self, analysis_id: str) -> Optional[AnalysisRecord]:
         """分析結果を読み込み"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT * FROM analysis_records WHERE id = ?
-            """, (analysis_id,))
+        with self.store.read() as conn:
+            cursor = conn.execute(self.SELECT_RECORD_SQL, (analysis_id,))
             
             row = cursor.fetchone()
             if not row:
@@ -163,12 +573,8 @@ class DataManager:
     
     def get_recent_analyses(self, limit: int = 10) -> List[AnalysisRecord]:
         """最近の分析結果を取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT * FROM analysis_records 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (limit,))
+        with self.store.read() as conn:
+            cursor = conn.execute(self.SELECT_RECENT_SQL, (limit,))
             
             records = []
             for row in cursor.fetchall():
@@ -186,6 +592,296 @@ class DataManager:
             
             return records
     
+    def load_thinking_steps(self, analysis_id: str) -> List[Dict[str, Any]]:
+        """
+        思考ステップを読み込み（圧縮されたペイロードを復元）
+        
+        Args:
+            analysis_id (str): 分析ID
+        
+        Returns:
+            List[Dict]: step_id順の思考ステップ
+        """
+        with self.store.read() as conn:
+            rows = conn.execute(self.SELECT_STEPS_SQL, (analysis_id,)).fetchall()
+        
+        steps = []
+        for (step_id, phase, confidence, timestamp, duration,
+             input_inline, input_codec, input_blob, output_inline, output_codec, output_blob) in rows:
+            steps.append({
+                "step_id": step_id,
+                "phase": phase,
+                "confidence": confidence,
+                "timestamp": timestamp,
+                "duration": duration,
+                # マイグレーション前に保存された行はデータが列に直接入っている
+                "input_data": input_inline if input_codec is None else _decompress_payload(input_codec, input_blob),
+                "output_data": output_inline if output_codec is None else _decompress_payload(output_codec, output_blob)
+            })
+        return steps
+    
+    @staticmethod
+    def _date_bound(value: Union[None, str, datetime, date], default: str) -> str:
+        """期間指定を created_at と比較できるISO形式の文字列に変換"""
+        if value is None:
+            return default
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+    
+    def iter_analyses(self, since: Union[None, str, datetime, date] = None,
+                      until: Union[None, str, datetime, date] = None) -> Iterator[Dict[str, Any]]:
+        """
+        分析履歴を古い順に1件ずつ取得（件数の上限なし、EXPORT_BATCH_SIZE 件ずつ読み込む）
+        
+        分析結果・検証結果のJSON本体は読み込まず、最終回答だけをSQLite側で取り出す。
+        読み取り接続はバッチごとに返すため、呼び出し側の処理が遅くても書き込みを妨げない。
+        
+        Args:
+            since: この日時以降（含む、ISO形式の文字列・datetime・date）
+            until: この日時より前（含まない）
+        
+        Yields:
+            Dict: ANALYSIS_EXPORT_COLUMNS の列を持つ行
+        """
+        created_at, analysis_id = self._date_bound(since, ""), ""
+        until = self._date_bound(until, self.EXPORT_MAX_TIMESTAMP)
+        while True:
+            with self.store.read() as conn:
+                rows = conn.execute(self.EXPORT_ANALYSES_SQL,
+                                    (created_at, analysis_id, until, self.EXPORT_BATCH_SIZE)).fetchall()
+            for row in rows:
+                yield dict(zip((name for name, _ in self.ANALYSIS_EXPORT_COLUMNS), row))
+            if len(rows) < self.EXPORT_BATCH_SIZE:
+                return
+            created_at, analysis_id = rows[-1][2], rows[-1][0]
+    
+    def iter_thinking_steps(self, since: Union[None, str, datetime, date] = None,
+                            until: Union[None, str, datetime, date] = None) -> Iterator[Dict[str, Any]]:
+        """
+        思考ステップを分析の古い順・step_id順に1件ずつ取得（期間は分析の作成日時で指定）
+        
+        メモリに載るのは1回の分析分の思考ステップだけ。
+        
+        Args:
+            since: この日時以降（含む、ISO形式の文字列・datetime・date）
+            until: この日時より前（含まない）
+        
+        Yields:
+            Dict: STEP_EXPORT_COLUMNS の列を持つ行
+        """
+        created_at, analysis_id = self._date_bound(since, ""), ""
+        until = self._date_bound(until, self.EXPORT_MAX_TIMESTAMP)
+        while True:
+            with self.store.read() as conn:
+                keys = conn.execute(self.EXPORT_ANALYSIS_IDS_SQL,
+                                    (created_at, analysis_id, until, self.EXPORT_BATCH_SIZE)).fetchall()
+            for _, key_id in keys:
+                for step in self.load_thinking_steps(key_id):
+                    yield {"analysis_id": key_id, **step}
+            if len(keys) < self.EXPORT_BATCH_SIZE:
+                return
+            created_at, analysis_id = keys[-1]
+    
+    def export_table(self, table: str, output_path: str, format_type: str = "csv",
+                     since: Union[None, str, datetime, date] = None,
+                     until: Union[None, str, datetime, date] = None) -> int:
+        """
+        分析履歴・思考ステップを全件ファイルに書き出す（1行ずつ書き込み、全件をメモリに載せない）
+        
+        Args:
+            table (str): "analyses" または "thinking_steps"
+            output_path (str): 出力先
+            format_type (str): "csv" / "jsonl" / "parquet"（parquetはpyarrowが必要）
+            since: この日時以降（含む）
+            until: この日時より前（含まない）
+        
+        Returns:
+            int: 書き出した行数
+        
+        Raises:
+            ValueError: 未対応の表・形式の場合
+            RuntimeError: Parquetでpyarrowが無い場合
+        """
+        rows, columns = self.export_rows(table, since, until)
+        count = write_rows(output_path, rows, columns, format_type)
+        print(f"📤 {table} を {format_type} でエクスポート完了: {output_path} ({count}行)")
+        return count
+    
+    def export_rows(self, table: str, since: Union[None, str, datetime, date] = None,
+                    until: Union[None, str, datetime, date] = None) -> Tuple[Iterator[Dict[str, Any]], List[Tuple[str, str]]]:
+        """
+        エクスポートする行のイテレータと列定義を取得
+        
+        Args:
+            table (str): "analyses" または "thinking_steps"
+            since: この日時以降（含む）
+            until: この日時より前（含まない）
+        
+        Returns:
+            Tuple: (行のイテレータ, 列定義)
+        
+        Raises:
+            ValueError: 未対応の表の場合
+        """
+        if table == "analyses":
+            return self.iter_analyses(since, until), self.ANALYSIS_EXPORT_COLUMNS
+        if table == "thinking_steps":
+            return self.iter_thinking_steps(since, until), self.STEP_EXPORT_COLUMNS
+        raise ValueError(f"Unsupported export table: {table}")
+    
+    def list_analyses(self, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[AnalysisSummary], Optional[str]]:
+        """
+        分析記録の一覧を新しい順に取得（分析結果・検証結果のJSONは読み込まない）
+        
+        Args:
+            limit (int): 取得件数（最大 MAX_PAGE_SIZE）
+            cursor (str): 前ページの next_cursor（省略時は先頭から）
+        
+        Returns:
+            Tuple[List[AnalysisSummary], Optional[str]]: 一覧と次ページのカーソル（最終ページはNone）
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        
+        with self.store.read() as conn:
+            if cursor:
+                created_at, analysis_id = self._decode_cursor(cursor)
+                cursor_rows = conn.execute(self.SELECT_SUMMARY_AFTER_SQL, (created_at, analysis_id, limit + 1))
+            else:
+                cursor_rows = conn.execute(self.SELECT_SUMMARY_SQL, (limit + 1,))
+            rows = cursor_rows.fetchall()
+        
+        summaries = [
+            AnalysisSummary(
+                id=row[0],
+                topic=row[1],
+                created_at=datetime.fromisoformat(row[2]),
+                confidence_score=row[3],
+                analysis_time=row[4],
+                data_sources=json.loads(row[5])
+            )
+            for row in rows[:limit]
+        ]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = self._encode_cursor(last[2], last[0])
+        
+        return summaries, next_cursor
+    
+    def load_analysis_blobs(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        分析結果・検証結果のJSONを必要になった時点で読み込む
+        
+        Args:
+            analysis_id (str): 分析ID
+        
+        Returns:
+            Optional[Dict]: analysis_result と verification_result（存在しない場合はNone）
+        """
+        with self.store.read() as conn:
+            row = conn.execute(self.SELECT_BLOBS_SQL, (analysis_id,)).fetchone()
+        
+        if not row:
+            return None
+        
+        return {
+            "analysis_result": json.loads(row[0]),
+            "verification_result": json.loads(row[1])
+        }
+    
+    def index_articles(self, items: List[Any]) -> int:
+        """
+        収集記事を全文検索インデックスに登録（URL単位で更新）
+        
+        Args:
+            items (List): CollectedItem、または title・content・url を持つ辞書のリスト
+        
+        Returns:
+            int: 登録・更新した件数
+        """
+        rows = []
+        for item in items:
+            get = item.get if isinstance(item, dict) else lambda key, default=None: getattr(item, key, default)
+            url = get("url") or ""
+            if not url:
+                continue
+            published_at = get("published_at") or datetime.now()
+            rows.append((
+                "article",
+                hashlib.sha1(url.encode("utf-8")).hexdigest(),
+                get("title", "") or "",
+                get("summary") or get("content", "") or "",
+                url,
+                published_at.isoformat() if isinstance(published_at, datetime) else str(published_at)
+            ))
+        
+        if rows:
+            with self.store.write() as conn:
+                conn.executemany(self.UPSERT_SEARCH_DOCUMENT_SQL, rows)
+        return len(rows)
+    
+    def search(self, query: str, kind: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> Tuple[List[SearchHit], Optional[int]]:
+        """
+        分析結果・収集記事を全文検索（関連度順）
+        
+        Args:
+            query (str): 検索語（空白区切りはAND検索）
+            kind (str): "analysis" または "article" に絞り込み（省略時は両方）
+            limit (int): 取得件数（最大 MAX_PAGE_SIZE）
+            offset (int): 読み飛ばす件数
+        
+        Returns:
+            Tuple[List[SearchHit], Optional[int]]: 検索結果と次ページの offset（最終ページはNone）
+        """
+        terms = query.split()
+        if not terms:
+            return [], None
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        
+        kind_params = (kind,) if kind else ()
+        
+        if all(len(term) >= 3 for term in terms):
+            # 各語をフレーズとして引用し、FTS5の演算子として解釈されないようにする
+            match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            sql = self.SEARCH_SQL.format(kind_filter="AND d.kind = ?" if kind else "")
+            params = (match,) + kind_params + (limit + 1, offset)
+        else:
+            like_filter = " AND ".join("(title LIKE ? ESCAPE '\\' OR body LIKE ? ESCAPE '\\')" for _ in terms)
+            like_params = []
+            for term in terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                like_params += [pattern, pattern]
+            sql = self.SEARCH_LIKE_SQL.format(like_filter=like_filter, kind_filter="AND kind = ?" if kind else "")
+            params = tuple(like_params) + kind_params + (limit + 1, offset)
+        
+        with self.store.read() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        
+        hits = [
+            SearchHit(kind=row[0], ref_id=row[1], title=row[2], snippet=row[3] or "",
+                      url=row[4], created_at=row[5], score=-row[6] or 0.0)
+            for row in rows[:limit]
+        ]
+        next_offset = offset + limit if len(rows) > limit else None
+        return hits, next_offset
+    
+    @staticmethod
+    def _encode_cursor(created_at: str, analysis_id: str) -> str:
+        """ページングカーソルを作成（created_at と id の組）"""
+        return f"{created_at}|{analysis_id}"
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        """ページングカーソルを分解"""
+        created_at, separator, analysis_id = cursor.partition("|")
+        if not separator:
+            raise ValueError(f"不正なカーソル: {cursor}")
+        return created_at, analysis_id
+    
     def export_to_json(self, analysis_id: str, output_path: str) -> bool:
         """JSON形式でエクスポート"""
         try:
@@ -213,10 +909,8 @@ class DataManager:
             return False
     
     def export_summary_to_csv(self, output_path: str) -> bool:
-        """サマリーをCSV形式でエクスポート"""
+        """サマリーをCSV形式でエクスポート（全履歴を古い順に1行ずつ書き込む）"""
         try:
-            records = self.get_recent_analyses(limit=100)
-            
             with open(output_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 
@@ -227,18 +921,18 @@ class DataManager:
                 ])
                 
                 # データ
-                for record in records:
-                    final_answer = record.analysis_result.get("final_answer", "")
+                for row in self.iter_analyses():
+                    final_answer = row["final_answer"] or ""
                     if len(final_answer) > 100:
                         final_answer = final_answer[:97] + "..."
                     
                     writer.writerow([
-                        record.id,
-                        record.topic,
-                        record.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                        f"{record.confidence_score:.2f}",
-                        f"{record.analysis_time:.2f}",
-                        len(record.data_sources),
+                        row["id"],
+                        row["topic"],
+                        datetime.fromisoformat(row["created_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                        f"{row['confidence_score']:.2f}",
+                        f"{row['analysis_time']:.2f}",
+                        row["data_source_count"],
                         final_answer
                     ])
             
@@ -250,18 +944,9 @@ class DataManager:
             return False
     
     def cache_data(self, key: str, data: Any, ttl_hours: int = 24) -> bool:
-        """データをキャッシュ"""
+        """データをキャッシュ（JSONで表現できる値のみ）"""
         try:
-            cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
-            cache_data = {
-                "data": data,
-                "cached_at": datetime.now(),
-                "ttl_hours": ttl_hours
-            }
-            
-            with open(cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-            
+            self.cache.set(key, data, ttl=timedelta(hours=ttl_hours))
             return True
             
         except Exception as e:
@@ -269,61 +954,69 @@ class DataManager:
             return False
     
     def get_cached_data(self, key: str) -> Optional[Any]:
-        """キャッシュからデータを取得"""
+        """キャッシュからデータを取得（期限切れの場合はNone）"""
         try:
-            cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
-            
-            if not os.path.exists(cache_file):
-                return None
-            
-            with open(cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-            
-            # TTL チェック
-            cached_at = cache_data["cached_at"]
-            ttl_hours = cache_data["ttl_hours"]
-            expires_at = cached_at.replace(
-                hour=cached_at.hour + ttl_hours
-            )
-            
-            if datetime.now() > expires_at:
-                os.remove(cache_file)
-                return None
-            
-            return cache_data["data"]
+            return self.cache.get(key)
             
         except Exception as e:
             print(f"❌ キャッシュ読み込みエラー: {e}")
             return None
     
+    def _update_statistics(self, conn, created_at: str, count: int,
+                           confidence: float, analysis_time: float) -> None:
+        """
+        統計ロールアップを差分更新（保存と同じトランザクション内で呼ぶ）
+        
+        Args:
+            conn: 書き込みトランザクション中の接続
+            created_at (str): 分析記録の作成日時（ISO形式、先頭10文字が日別バケット）
+            count (int): 件数の増減
+            confidence (float): 信頼度合計の増減
+            analysis_time (float): 分析時間合計の増減
+        """
+        conn.execute(self.UPDATE_STATS_SQL, (count, confidence, analysis_time))
+        conn.execute(self.UPSERT_DAILY_STATS_SQL, (created_at[:10], count, confidence, analysis_time))
+    
+    def rebuild_statistics(self) -> None:
+        """統計ロールアップを analysis_records から作り直す"""
+        with self.store.write() as conn:
+            _rebuild_statistics(conn)
+    
     def get_analysis_statistics(self) -> Dict[str, Any]:
-        """分析統計を取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            # 基本統計
-            cursor = conn.execute("SELECT COUNT(*) FROM analysis_records")
-            total_analyses = cursor.fetchone()[0]
+        """分析統計を取得（ロールアップを読むだけなので履歴の件数に依存しない）"""
+        with self.store.read() as conn:
+            total_analyses, sum_confidence, sum_time = conn.execute(self.STATS_TOTALS_SQL).fetchone()
             
-            cursor = conn.execute("SELECT AVG(confidence_score) FROM analysis_records")
-            avg_confidence = cursor.fetchone()[0] or 0
-            
-            cursor = conn.execute("SELECT AVG(analysis_time) FROM analysis_records")
-            avg_time = cursor.fetchone()[0] or 0
-            
-            # 最近の活動
-            cursor = conn.execute("""
-                SELECT COUNT(*) FROM analysis_records 
-                WHERE created_at > datetime('now', '-7 days')
-            """)
-            recent_analyses = cursor.fetchone()[0]
-            
-            return {
-                "total_analyses": total_analyses,
-                "average_confidence": avg_confidence,
-                "average_analysis_time": avg_time,
-                "recent_analyses_7days": recent_analyses,
-                "database_path": self.db_path,
-                "cache_directory": self.cache_dir
-            }
+            # 最近の活動（今日を含む直近7日分の日別バケット）
+            since = (datetime.now() - timedelta(days=6)).date().isoformat()
+            recent_analyses = int(conn.execute(self.STATS_RECENT_SQL, (since,)).fetchone()[0])
+        
+        return {
+            "total_analyses": total_analyses,
+            "average_confidence": sum_confidence / total_analyses if total_analyses else 0,
+            "average_analysis_time": sum_time / total_analyses if total_analyses else 0,
+            "recent_analyses_7days": recent_analyses,
+            "database_path": self.db_path,
+            "cache_directory": self.cache_dir,
+            "cache": self.cache.get_status()
+        }
+    
+    def get_payload_statistics(self) -> Dict[str, Any]:
+        """
+        思考ステップのペイロード保存状況を取得（全件を集計するため管理用）
+        
+        Returns:
+            Dict: 重複排除後のペイロード数と、圧縮前・保存サイズ
+        """
+        with self.store.read() as conn:
+            payload_count, raw_bytes, stored_bytes = conn.execute(self.PAYLOAD_STATS_SQL).fetchone()
+        
+        return {
+            "unique_payloads": payload_count,
+            "raw_bytes": int(raw_bytes),
+            "stored_bytes": int(stored_bytes),
+            "codec": "zstd" if ZSTD_AVAILABLE else "zlib"
+        }
     
     def _generate_analysis_id(self, topic: str) -> str:
         """分析IDを生成"""
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Enhanced DeepResearch - 思考フローのレイアウト事前計算
+
+ブラウザでD3のフォースシミュレーションを走らせる代わりに、サーバー側で座標を計算します。
+数百ステップ以上の分析でも管理画面がすぐに表示されるようにするための処理です。
+
+- 階層レイアウト（最長パスによる層分け、層数が多い場合は折り返し）
+- フォースレイアウト（Fruchterman-Reingold、反発力は格子で近傍のみ計算）
+- フォースレイアウトの座標はグラフの形と設定のハッシュをキーにファイルキャッシュへ保存
+- 詳細度（LOD）: 連続する同一フェーズのステップを1つのクラスタノードに集約
+- ビューポート単位のタイル分割: 表示範囲のタイルに含まれるノード・コネクションだけを返す
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# scriptsディレクトリのモジュールをインポート
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+from cache_store import get_cache
+
+# 事前計算できるレイアウト
+PRECOMPUTED_LAYOUTS = ("hierarchical", "force-directed")
+
+DEFAULT_LAYOUT_SETTINGS = {
+    "node_spacing": 90,          # 同じ層のノード間隔（px）
+    "level_spacing": 160,        # 層の間隔（px）
+    "wrap_levels": 12,           # 1行に並べる層の数（これを超えたら折り返す）
+    "force_iterations": 60,
+    "force_seed": 42,
+    "force_max_nodes": 1500,     # これより多い場合は階層レイアウトを使う（全体像は集約レベルで見る）
+    "tile_size": 1024,           # タイルの一辺（px）
+    "lod_min_nodes": 150,        # このノード数以上で集約レベルを作成する
+    "cache_dir": os.path.join("data", "cache", "flow_layouts"),
+    "cache_ttl_days": 30
+}
+
+Position = Tuple[float, float]
+
+
+def graph_signature(node_ids: Sequence[str], edges: Sequence[Tuple[str, str]],
+                    layout_type: str, settings: Dict[str, Any]) -> str:
+    """
+    レイアウトのキャッシュキー（ノード・エッジ・レイアウトに影響する設定のハッシュ）
+
+    Args:
+        node_ids: ノードID（表示順）
+        edges: (接続元, 接続先) のリスト
+        layout_type (str): レイアウト種別
+        settings (Dict): レイアウト設定
+
+    Returns:
+        str: SHA-1ハッシュ
+    """
+    relevant = {key: settings[key] for key in
+                ("node_spacing", "level_spacing", "wrap_levels", "force_iterations", "force_seed")}
+    payload = json.dumps([layout_type, relevant, list(node_ids), [list(edge) for edge in edges]],
+                         ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def assign_levels(node_ids: Sequence[str], edges: Sequence[Tuple[str, str]]) -> Dict[str, int]:
+    """
+    最長パスで各ノードの層を決める（トポロジカル順、O(V+E)）
+
+    循環に含まれるノードは、既に決まった層の次の層に並び順で配置する。
+
+    Args:
+        node_ids: ノードID
+        edges: (接続元, 接続先) のリスト
+
+    Returns:
+        Dict[str, int]: ノードID → 層番号（0始まり）
+    """
+    known = set(node_ids)
+    successors: Dict[str, List[str]] = defaultdict(list)
+    in_degree = {node_id: 0 for node_id in node_ids}
+    for source, target in edges:
+        if source in known and target in known and source != target:
+            successors[source].append(target)
+            in_degree[target] += 1
+
+    levels = {node_id: 0 for node_id in node_ids}
+    queue = [node_id for node_id in node_ids if in_degree[node_id] == 0]
+    processed = 0
+    while processed < len(queue):
+        node_id = queue[processed]
+        processed += 1
+        for target in successors[node_id]:
+            levels[target] = max(levels[target], levels[node_id] + 1)
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                queue.append(target)
+
+    if processed < len(node_ids):
+        next_level = max((levels[node_id] for node_id in queue), default=-1) + 1
+        for node_id in node_ids:
+            if in_degree[node_id] > 0:
+                levels[node_id] = next_level
+                next_level += 1
+    return levels
+
+
+def hierarchical_layout(node_ids: Sequence[str], edges: Sequence[Tuple[str, str]],
+                        settings: Dict[str, Any]) -> Dict[str, Position]:
+    """
+    階層レイアウト（層を左から右へ並べ、wrap_levels 層ごとに折り返す）
+
+    思考ステップは基本的に一本の鎖なので、折り返さないと横に極端に長くなる。
+    折り返した行は左右交互に進む（蛇行）ため、隣接する層は常に隣に並ぶ。
+
+    Args:
+        node_ids: ノードID（同じ層の中ではこの順に並べる）
+        edges: (接続元, 接続先) のリスト
+        settings (Dict): レイアウト設定
+
+    Returns:
+        Dict[str, Position]: ノードID → (x, y)
+    """
+    levels = assign_levels(node_ids, edges)
+    members: Dict[int, List[str]] = defaultdict(list)
+    for node_id in node_ids:
+        members[levels[node_id]].append(node_id)
+
+    node_spacing = settings["node_spacing"]
+    level_spacing = settings["level_spacing"]
+    wrap = max(1, settings["wrap_levels"])
+    widest = max((len(ids) for ids in members.values()), default=1)
+    row_height = widest * node_spacing + level_spacing
+
+    positions = {}
+    for level, ids in members.items():
+        row, column = divmod(level, wrap)
+        if row % 2 == 1:
+            column = wrap - 1 - column
+        x = column * level_spacing
+        top = row * row_height + (widest - len(ids)) * node_spacing / 2
+        for index, node_id in enumerate(ids):
+            positions[node_id] = (float(x), float(top + index * node_spacing))
+    return positions
+
+
+def force_layout(node_ids: Sequence[str], edges: Sequence[Tuple[str, str]], settings: Dict[str, Any],
+                 initial: Optional[Dict[str, Position]] = None) -> Dict[str, Position]:
+    """
+    フォースレイアウト（Fruchterman-Reingold）
+
+    反発力は一辺 2k の格子で近傍セルのノードだけから受けるため、1反復あたりほぼ O(V+E)。
+    初期配置（省略時は階層レイアウト）と乱数シードを固定しているので結果は毎回同じ。
+
+    Args:
+        node_ids: ノードID
+        edges: (接続元, 接続先) のリスト
+        settings (Dict): レイアウト設定
+        initial (Dict): 初期配置
+
+    Returns:
+        Dict[str, Position]: ノードID → (x, y)
+    """
+    count = len(node_ids)
+    if count == 0:
+        return {}
+
+    start = initial or hierarchical_layout(node_ids, edges, settings)
+    rng = random.Random(settings["force_seed"])
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    xs = [start[node_id][0] + rng.uniform(-1, 1) for node_id in node_ids]
+    ys = [start[node_id][1] + rng.uniform(-1, 1) for node_id in node_ids]
+    links = [(index[s], index[t]) for s, t in edges if s in index and t in index and s != t]
+
+    # 理想的なノード間距離
+    k = float(settings["node_spacing"])
+    cell = 2 * k
+    width = (max(xs) - min(xs)) or k
+    height = (max(ys) - min(ys)) or k
+    temperature = max(width, height) / 10
+    iterations = settings["force_iterations"]
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        dx = [0.0] * count
+        dy = [0.0] * count
+
+        grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i in range(count):
+            grid[(int(xs[i] // cell), int(ys[i] // cell))].append(i)
+
+        # 反発力（近傍セルのみ）
+        for (gx, gy), bucket in grid.items():
+            neighbors = []
+            for ox in (-1, 0, 1):
+                for oy in (-1, 0, 1):
+                    neighbors.extend(grid.get((gx + ox, gy + oy), ()))
+            for i in bucket:
+                xi, yi = xs[i], ys[i]
+                for j in neighbors:
+                    if i == j:
+                        continue
+                    ddx = xi - xs[j]
+                    ddy = yi - ys[j]
+                    distance_sq = ddx * ddx + ddy * ddy
+                    if distance_sq > cell * cell:
+                        continue
+                    if distance_sq < 0.01:
+                        ddx, ddy, distance_sq = rng.uniform(-1, 1), rng.uniform(-1, 1), 1.0
+                    factor = k * k / distance_sq
+                    dx[i] += ddx * factor
+                    dy[i] += ddy * factor
+
+        # 引力（エッジ）
+        for i, j in links:
+            ddx = xs[i] - xs[j]
+            ddy = ys[i] - ys[j]
+            distance = math.sqrt(ddx * ddx + ddy * ddy) or 0.01
+            factor = distance / k
+            dx[i] -= ddx * factor
+            dy[i] -= ddy * factor
+            dx[j] += ddx * factor
+            dy[j] += ddy * factor
+
+        # 移動量を温度で制限
+        for i in range(count):
+            displacement = math.sqrt(dx[i] * dx[i] + dy[i] * dy[i])
+            if displacement > 0:
+                limited = min(displacement, temperature)
+                xs[i] += dx[i] / displacement * limited
+                ys[i] += dy[i] / displacement * limited
+        temperature -= cooling
+
+    # 左上を原点にそろえる
+    min_x, min_y = min(xs), min(ys)
+    return {node_id: (round(xs[i] - min_x, 1), round(ys[i] - min_y, 1)) for i, node_id in enumerate(node_ids)}
+
+
+def layout_bounds(positions: Dict[str, Position]) -> List[float]:
+    """座標の外接矩形 [x0, y0, x1, y1]"""
+    if not positions:
+        return [0.0, 0.0, 0.0, 0.0]
+    xs = [x for x, _ in positions.values()]
+    ys = [y for _, y in positions.values()]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def collapse_phase_runs(nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    連続する同一フェーズのノードを1つのクラスタに集約（詳細度を下げた表示用）
+
+    クラスタの座標はメンバーの重心、信頼度はメンバーの平均、処理時間は合計。
+    クラスタ間のコネクションは元のコネクションをまとめたもの。
+
+    Args:
+        nodes (List[Dict]): ステップ順のノード（x, y を含む）
+        connections (List[Dict]): コネクション（from, to, confidence, color, width）
+
+    Returns:
+        Dict: {"nodes": クラスタノード, "connections": クラスタ間のコネクション}
+    """
+    clusters: List[Dict[str, Any]] = []
+    cluster_of: Dict[str, str] = {}
+
+    for node in nodes:
+        current = clusters[-1] if clusters else None
+        if current is None or current["phase"] != node["phase"]:
+            current = {
+                "id": f"run_{len(clusters) + 1}",
+                "phase": node["phase"],
+                "color": node["color"],
+                "_icon": node.get("metadata", {}).get("phase_icon", ""),
+                "members": [],
+                "_confidence_sum": 0.0,
+                "_x_sum": 0.0,
+                "_y_sum": 0.0,
+                "duration": 0.0,
+                "timestamp": node["timestamp"],
+                "verification_status": node["verification_status"]
+            }
+            clusters.append(current)
+        current["members"].append(node["id"])
+        current["_confidence_sum"] += node["confidence"]
+        current["_x_sum"] += node.get("x", 0.0)
+        current["_y_sum"] += node.get("y", 0.0)
+        current["duration"] += node.get("duration", 0.0)
+        if current["verification_status"] != node["verification_status"]:
+            current["verification_status"] = "partial"
+        cluster_of[node["id"]] = current["id"]
+
+    for cluster in clusters:
+        count = len(cluster["members"])
+        icon = cluster.pop("_icon")
+        cluster["count"] = count
+        cluster["confidence"] = cluster.pop("_confidence_sum") / count
+        cluster["x"] = round(cluster.pop("_x_sum") / count, 1)
+        cluster["y"] = round(cluster.pop("_y_sum") / count, 1)
+        cluster["label"] = f"{icon} {cluster['phase']} ×{count}".strip()
+        cluster["size"] = 20 + min(30, 6 * math.log2(count + 1))
+
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for connection in connections:
+        source = cluster_of.get(connection["from"])
+        target = cluster_of.get(connection["to"])
+        if source is None or target is None or source == target:
+            continue
+        entry = merged.get((source, target))
+        if entry is None:
+            entry = merged[(source, target)] = {
+                "from": source, "to": target, "type": connection.get("type", "leads_to"),
+                "color": connection.get("color", "#95a5a6"), "count": 0, "_confidence_sum": 0.0
+            }
+        entry["count"] += 1
+        entry["_confidence_sum"] += connection.get("confidence", 0.0)
+
+    cluster_connections = []
+    for entry in merged.values():
+        entry["confidence"] = entry.pop("_confidence_sum") / entry["count"]
+        entry["width"] = max(1, entry["confidence"] * 5)
+        cluster_connections.append(entry)
+
+    return {"nodes": clusters, "connections": cluster_connections}
+
+
+def build_tile_index(nodes: List[Dict[str, Any]], tile_size: float) -> Dict[str, List[int]]:
+    """
+    ノードをタイルに振り分け
+
+    Args:
+        nodes (List[Dict]): x, y を持つノード
+        tile_size (float): タイルの一辺
+
+    Returns:
+        Dict[str, List[int]]: "tx,ty" → ノードの添字
+    """
+    tiles: Dict[str, List[int]] = defaultdict(list)
+    for i, node in enumerate(nodes):
+        tiles[f"{int(node['x'] // tile_size)},{int(node['y'] // tile_size)}"].append(i)
+    return dict(tiles)
+
+
+def select_viewport(nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]],
+                    tiles: Dict[str, List[int]], tile_size: float,
+                    bbox: Sequence[float]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    表示範囲に含まれるノードと、それにつながるコネクションを取得
+
+    Args:
+        nodes (List[Dict]): x, y を持つノード
+        connections (List[Dict]): コネクション
+        tiles (Dict): build_tile_index() の結果
+        tile_size (float): タイルの一辺
+        bbox: 表示範囲 [x0, y0, x1, y1]
+
+    Returns:
+        Dict: {"nodes": 範囲内のノード, "connections": 範囲内のノードにつながるコネクション}
+    """
+    x0, y0, x1, y1 = bbox
+    selected = []
+    for tx in range(int(x0 // tile_size), int(x1 // tile_size) + 1):
+        for ty in range(int(y0 // tile_size), int(y1 // tile_size) + 1):
+            for i in tiles.get(f"{tx},{ty}", ()):
+                node = nodes[i]
+                if x0 <= node["x"] <= x1 and y0 <= node["y"] <= y1:
+                    selected.append(i)
+    selected.sort()
+
+    visible = {nodes[i]["id"] for i in selected}
+    return {
+        "nodes": [nodes[i] for i in selected],
+        "connections": [c for c in connections if c["from"] in visible or c["to"] in visible]
+    }
+
+
+class FlowLayoutEngine:
+    """
+    思考フローのレイアウト計算（フォースレイアウトの座標はキャッシュし、同じグラフでは再計算しない）
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        """
+        初期化
+
+        Args:
+            settings (Dict): DEFAULT_LAYOUT_SETTINGS を上書きする設定
+        """
+        self.settings = dict(DEFAULT_LAYOUT_SETTINGS)
+        self.settings.update(settings or {})
+        self._cache = None  # 遅延初期化（キャッシュディレクトリは初回計算時に作成）
+
+    def _get_cache(self):
+        """座標キャッシュ（ディレクトリ単位でプロセス内共有）"""
+        if self._cache is None:
+            self._cache = get_cache(self.settings["cache_dir"])
+        return self._cache
+
+    def resolve_layout(self, layout_type: str, node_count: int) -> str:
+        """
+        実際に計算するレイアウト種別を決定
+
+        Args:
+            layout_type (str): 要求されたレイアウト種別
+            node_count (int): ノード数
+
+        Returns:
+            str: 計算するレイアウト種別
+
+        Raises:
+            ValueError: 事前計算できないレイアウト種別の場合
+        """
+        if layout_type not in PRECOMPUTED_LAYOUTS:
+            raise ValueError(f"事前計算できないレイアウトです: {layout_type}")
+        if layout_type == "force-directed" and node_count > self.settings["force_max_nodes"]:
+            return "hierarchical"
+        return layout_type
+
+    def compute(self, node_ids: Sequence[str], edges: Sequence[Tuple[str, str]],
+                layout_type: str = "hierarchical") -> Dict[str, Position]:
+        """
+        レイアウトを計算（フォースレイアウトはキャッシュがあればそれを返す）
+
+        Args:
+            node_ids: ノードID
+            edges: (接続元, 接続先) のリスト
+            layout_type (str): "hierarchical" または "force-directed"
+
+        Returns:
+            Dict[str, Position]: ノードID → (x, y)（ノード数が force_max_nodes を超える場合は階層レイアウト）
+
+        Raises:
+            ValueError: 事前計算できないレイアウト種別の場合
+        """
+        layout_type = self.resolve_layout(layout_type, len(node_ids))
+        if layout_type == "hierarchical":
+            # O(V+E) で求まるため、キャッシュから読むより計算し直す方が速い
+            return hierarchical_layout(node_ids, edges, self.settings)
+
+        key = "flow_layout:" + graph_signature(node_ids, edges, layout_type, self.settings)
+        cache = self._get_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            return {node_id: tuple(position) for node_id, position in cached.items()}
+
+        positions = force_layout(node_ids, edges, self.settings)
+        cache.set(key, positions, ttl=timedelta(days=self.settings["cache_ttl_days"]))
+        return positions
+
+    def apply(self, flow_data: Dict[str, Any], layout_type: str) -> Dict[str, Any]:
+        """
+        可視化データにレイアウトを適用
+
+        各ノードに x, y を設定し、flow_data["layout"] に種別・外接矩形・タイル情報を、
+        ノード数が lod_min_nodes 以上なら flow_data["levels"]["phase_runs"] に集約レベル（タイル情報付き）を追加する。
+
+        Args:
+            flow_data (Dict): ThinkingVisualizer.generate_thinking_flow() の結果
+            layout_type (str): "hierarchical" または "force-directed"
+
+        Returns:
+            Dict: flow_data（そのまま更新して返す）
+
+        Raises:
+            ValueError: 事前計算できないレイアウト種別の場合
+        """
+        nodes = flow_data["nodes"]
+        connections = flow_data["connections"]
+        layout_type = self.resolve_layout(layout_type, len(nodes))
+        positions = self.compute([node["id"] for node in nodes],
+                                 [(c["from"], c["to"]) for c in connections], layout_type)
+        for node in nodes:
+            node["x"], node["y"] = positions[node["id"]]
+
+        tile_size = self.settings["tile_size"]
+        flow_data["layout"] = {
+            "type": layout_type,
+            "bounds": layout_bounds(positions),
+            "tile_size": tile_size,
+            "tiles": build_tile_index(nodes, tile_size)
+        }
+        if len(nodes) >= self.settings["lod_min_nodes"]:
+            phase_runs = collapse_phase_runs(nodes, connections)
+            phase_runs["tiles"] = build_tile_index(phase_runs["nodes"], tile_size)
+            flow_data["levels"] = {"phase_runs": phase_runs}
+        return flow_data
+
+    def viewport(self, flow_data: Dict[str, Any], bbox: Sequence[float],
+                 level: str = "steps") -> Dict[str, Any]:
+        """
+        レイアウト済みの可視化データから表示範囲の部分だけを取り出す
+
+        Args:
+            flow_data (Dict): apply() 済みの可視化データ
+            bbox: 表示範囲 [x0, y0, x1, y1]
+            level (str): "steps"（全ステップ）または "phase_runs"（集約）
+
+        Returns:
+            Dict: 範囲内のノード・コネクションとレイアウト情報
+        """
+        tile_size = flow_data["layout"]["tile_size"]
+        if level == "phase_runs" and "phase_runs" in flow_data.get("levels", {}):
+            source = flow_data["levels"]["phase_runs"]
+            tiles = source["tiles"]
+        else:
+            level = "steps"
+            source = flow_data
+            tiles = flow_data["layout"]["tiles"]
+
+        selected = select_viewport(source["nodes"], source["connections"], tiles, tile_size, bbox)
+        return {
+            "level": level,
+            "bbox": list(bbox),
+            "layout": {key: value for key, value in flow_data["layout"].items() if key != "tiles"},
+            "nodes": selected["nodes"],
+            "connections": selected["connections"],
+            "total_nodes": len(source["nodes"])
+        }
@@ -14,11 +14,14 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 from qwen3_llm import Qwen3Llm
+from prompt_templates import DECOMPOSITION, AXIS_REASONING, CONSISTENCY_VERIFICATION, SYNTHESIS
+from instrumentation import traced
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import asyncio
+import time
 
 @dataclass
 class ThinkingStep:
@@ -30,6 +33,7 @@ class ThinkingStep:
     confidence: float
     timestamp: datetime = field(default_factory=datetime.now)
     reasoning_chain: List[str] = field(default_factory=list)
+    duration: float = 0.0  # LLM呼び出し・解析を含む処理時間（秒）
 
 @dataclass
 class ResearchResult:
@@ -68,6 +72,7 @@ class EnhancedQwen3Llm(Qwen3Llm):
             "verification_required": True
         }
     
+    @traced("stage", "deepresearch.research")
     async def deep_research(self, topic: str, context: Dict[str, Any] = None) -> ResearchResult:
         """
         多段階深層分析のメインメソッド
@@ -132,39 +137,22 @@ class EnhancedQwen3Llm(Qwen3Llm):
                 quality_metrics={}
             )
     
+    @traced("stage", "deepresearch.decomposition")
     async def _decompose_problem(self, topic: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """問題分解フェーズ"""
         self.current_step_id += 1
+        started = time.perf_counter()
         
-        decomposition_prompt = f"""あなたは高度な分析エキスパートです。以下のトピックを体系的に分解してください。
-
-トピック: {topic}
-コンテキスト: {json.dumps(context, ensure_ascii=False, indent=2)}
-
-以下の構造で分解してください：
-1. 主要な分析軸（3-5個）
-2. 各軸での具体的質問
-3. 必要な情報源
-4. 分析の優先順位
-
-回答は以下のJSON形式で：
-{{
-    "analysis_axes": [
-        {{
-            "axis": "技術的側面",
-            "questions": ["具体的な技術は何か？", "革新性は？"],
-            "priority": 1
-        }}
-    ],
-    "information_sources": ["ニュース記事", "技術文書"],
-    "complexity_level": "高",
-    "estimated_depth": 3
-}}
-"""
+        # 静的な指示を先頭に、トピックとコンテキストは末尾に置く（KVキャッシュ再利用のため）
+        decomposition_prompt = DECOMPOSITION.render(
+            topic=topic,
+            context=json.dumps(context, ensure_ascii=False, indent=2)
+        )
         
         response = await self.generate_content_async(
             decomposition_prompt, 
-            agent_name="問題分解エンジン"
+            agent_name="問題分解エンジン",
+            call_type=DECOMPOSITION.call_type
         )
         
         try:
@@ -185,7 +173,8 @@ class EnhancedQwen3Llm(Qwen3Llm):
             input_data=topic,
             output_data=json.dumps(decomposition_data, ensure_ascii=False),
             confidence=0.8,
-            reasoning_chain=[f"トピック '{topic}' を {len(decomposition_data.get('analysis_axes', []))} の分析軸に分解"]
+            reasoning_chain=[f"トピック '{topic}' を {len(decomposition_data.get('analysis_axes', []))} の分析軸に分解"],
+            duration=time.perf_counter() - started
         )
         self.steps_log.append(step)
         
@@ -209,6 +198,7 @@ class EnhancedQwen3Llm(Qwen3Llm):
             print(f"🤔 分析軸: {axis_name}")
             
             # 各軸での推論実行
+            started = time.perf_counter()
             axis_result = await self._reason_on_axis(axis_name, questions)
             reasoning_results["axis_results"].append(axis_result)
             reasoning_results["confidence_scores"].append(axis_result["confidence"])
@@ -221,42 +211,24 @@ class EnhancedQwen3Llm(Qwen3Llm):
                 input_data=f"軸: {axis_name}, 質問: {questions}",
                 output_data=json.dumps(axis_result, ensure_ascii=False),
                 confidence=axis_result["confidence"],
-                reasoning_chain=axis_result["reasoning_chain"]
+                reasoning_chain=axis_result["reasoning_chain"],
+                duration=time.perf_counter() - started
             )
             self.steps_log.append(step)
         
         return reasoning_results
     
+    @traced("stage", "deepresearch.reasoning")
     async def _reason_on_axis(self, axis_name: str, questions: List[str]) -> Dict[str, Any]:
         """特定の分析軸での推論"""
         questions_text = "\n".join([f"- {q}" for q in questions])
         
-        reasoning_prompt = f"""分析軸: {axis_name}
-
-以下の質問について段階的に推論してください：
-{questions_text}
-
-推論プロセス:
-1. 各質問に対する初期回答
-2. 回答間の関連性分析
-3. 矛盾点の特定と解決
-4. 統合された結論
-
-回答は以下のJSON形式で：
-{{
-    "axis_name": "{axis_name}",
-    "initial_answers": {{"質問1": "回答1"}},
-    "relationships": ["関連性1", "関連性2"],
-    "contradictions": ["矛盾点1"],
-    "integrated_conclusion": "統合結論",
-    "confidence": 0.8,
-    "reasoning_chain": ["推論ステップ1", "推論ステップ2"]
-}}
-"""
+        reasoning_prompt = AXIS_REASONING.render(axis_name=axis_name, questions=questions_text)
         
         response = await self.generate_content_async(
             reasoning_prompt,
-            agent_name=f"推論エンジン({axis_name})"
+            agent_name=f"推論エンジン({axis_name})",
+            call_type=AXIS_REASONING.call_type
         )
         
         try:
@@ -278,39 +250,24 @@ class EnhancedQwen3Llm(Qwen3Llm):
         
         return axis_result
     
+    @traced("stage", "deepresearch.verification")
     async def _verify_and_improve(self, reasoning_results: Dict[str, Any]) -> Dict[str, Any]:
         """検証・改善フェーズ"""
         self.current_step_id += 1
+        started = time.perf_counter()
         
         # 結果の一貫性チェック
         axis_results = reasoning_results.get("axis_results", [])
         confidence_scores = reasoning_results.get("confidence_scores", [])
         
-        verification_prompt = f"""以下の分析結果の一貫性と品質を検証してください：
-
-分析結果:
-{json.dumps(axis_results, ensure_ascii=False, indent=2)}
-
-検証項目:
-1. 各軸の結論間に矛盾はないか？
-2. 信頼度スコアは適切か？
-3. 追加で必要な分析はあるか？
-4. 結論の根拠は十分か？
-
-検証結果をJSON形式で：
-{{
-    "consistency_score": 0.8,
-    "contradictions_found": [],
-    "quality_issues": [],
-    "improvement_suggestions": [],
-    "verified_conclusions": {{}},
-    "overall_confidence": 0.8
-}}
-"""
+        verification_prompt = CONSISTENCY_VERIFICATION.render(
+            axis_results=json.dumps(axis_results, ensure_ascii=False, indent=2)
+        )
         
         verification_response = await self.generate_content_async(
             verification_prompt,
-            agent_name="検証エンジン"
+            agent_name="検証エンジン",
+            call_type=CONSISTENCY_VERIFICATION.call_type
         )
         
         try:
@@ -327,7 +284,8 @@ class EnhancedQwen3Llm(Qwen3Llm):
             phase="verification",
             input_data=json.dumps(reasoning_results, ensure_ascii=False),
             output_data=json.dumps(verification_results, ensure_ascii=False),
-            confidence=verification_results.get("overall_confidence", 0.5)
+            confidence=verification_results.get("overall_confidence", 0.5),
+            duration=time.perf_counter() - started
         )
         self.steps_log.append(step)
         
@@ -337,40 +295,24 @@ class EnhancedQwen3Llm(Qwen3Llm):
             "sources": ["深層推論分析", "多段階検証"]
         }
     
+    @traced("stage", "deepresearch.synthesis")
     async def _synthesize_final_answer(self, verified_result: Dict[str, Any]) -> Dict[str, Any]:
         """最終回答統合"""
         self.current_step_id += 1
+        started = time.perf_counter()
         
         axis_results = verified_result["reasoning_results"].get("axis_results", [])
         verification = verified_result["verification_results"]
         
-        synthesis_prompt = f"""以下の検証済み分析結果から最終的な回答を統合してください：
-
-分析結果:
-{json.dumps(axis_results, ensure_ascii=False, indent=2)}
-
-検証結果:
-{json.dumps(verification, ensure_ascii=False, indent=2)}
-
-要求:
-1. 各軸の結論を統合した包括的回答
-2. 信頼度の高い情報を優先
-3. 矛盾点は明記
-4. 300-500文字で簡潔に
-
-回答をJSON形式で：
-{{
-    "answer": "統合された最終回答",
-    "confidence": 0.8,
-    "key_points": ["要点1", "要点2"],
-    "limitations": ["制限事項1"],
-    "synthesis_reasoning": ["統合理由1", "統合理由2"]
-}}
-"""
+        synthesis_prompt = SYNTHESIS.render(
+            axis_results=json.dumps(axis_results, ensure_ascii=False, indent=2),
+            verification=json.dumps(verification, ensure_ascii=False, indent=2)
+        )
         
         final_response = await self.generate_content_async(
             synthesis_prompt,
-            agent_name="統合エンジン"
+            agent_name="統合エンジン",
+            call_type=SYNTHESIS.call_type
         )
         
         try:
@@ -391,7 +333,8 @@ class EnhancedQwen3Llm(Qwen3Llm):
             phase="synthesis",
             input_data=json.dumps(verified_result, ensure_ascii=False),
             output_data=json.dumps(final_answer, ensure_ascii=False),
-            confidence=final_answer.get("confidence", 0.5)
+            confidence=final_answer.get("confidence", 0.5),
+            duration=time.perf_counter() - started
         )
         self.steps_log.append(step)
         
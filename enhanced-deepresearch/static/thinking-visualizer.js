@@ -0,0 +1,899 @@
+/*
+ * Enhanced DeepResearch - 思考プロセス可視化レポート
+ *
+ * レポートHTMLの <script type="application/json" id="flow-data"> に埋め込まれた
+ * 思考フローデータを読み込んで描画する。全レポートで共有する静的ファイル。
+ */
+
+// 埋め込みデータを読み込み
+const flowData = JSON.parse(document.getElementById('flow-data').textContent);
+
+// 現在の可視化データ
+let currentData = flowData;
+let networkSimulation = null;
+
+// 初期化
+document.addEventListener('DOMContentLoaded', function() {
+    // 大きなフローには集約表示があり、初期表示は集約表示にする
+    if (flowData.levels) {
+        document.getElementById('lod-control').classList.remove('hidden');
+    }
+    initializeNetworkVisualization();
+    initializeConfidenceChart();
+    generateDetailedAnalysis();
+    generatePhaseLegend();
+    initializeAdvancedControls();
+});
+
+// タブ切り替え
+function showTab(tabName) {
+    // すべてのタブコンテンツを非表示
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.classList.add('hidden');
+    });
+
+    // すべてのタブボタンを非アクティブ
+    document.querySelectorAll('.tab-button').forEach(button => {
+        button.classList.remove('active');
+    });
+
+    // 選択されたタブを表示
+    document.getElementById(tabName + '-tab').classList.remove('hidden');
+    event.target.classList.add('active');
+}
+
+// この数以上のノードを描画するときは表示範囲外のノードを描画しない
+const CULL_MIN_NODES = 300;
+// この倍率未満ではノードラベルを描画しない
+const LABEL_MIN_SCALE = 0.6;
+
+// 集約表示（連続する同一フェーズのステップをまとめたもの）を使うか
+function useCollapsedLevel() {
+    const toggle = document.getElementById('lod-toggle');
+    return Boolean(flowData.levels && toggle && toggle.checked);
+}
+
+// 集約表示の切り替え
+function toggleLevelOfDetail() {
+    updateVisualization();
+}
+
+// 表示範囲（データ座標）に含まれるノードID（サーバーで作成したタイル索引を使う）
+function visibleNodeIds(x0, y0, x1, y1) {
+    const layout = flowData.layout;
+    const size = layout.tile_size;
+    const ids = new Set();
+    for (let tx = Math.floor(x0 / size); tx <= Math.floor(x1 / size); tx++) {
+        for (let ty = Math.floor(y0 / size); ty <= Math.floor(y1 / size); ty++) {
+            (layout.tiles[`${tx},${ty}`] || []).forEach(i => {
+                const node = flowData.nodes[i];
+                if (node.x >= x0 && node.x <= x1 && node.y >= y0 && node.y <= y1) ids.add(node.id);
+            });
+        }
+    }
+    return ids;
+}
+
+// ネットワーク可視化初期化
+function initializeNetworkVisualization() {
+    const svg = d3.select("#network-viz");
+    const width = svg.node().getBoundingClientRect().width;
+    const height = 600;
+
+    svg.selectAll("*").remove(); // クリア
+
+    const g = svg.append("g");
+
+    // ノードとリンクのデータ準備
+    const collapsed = useCollapsedLevel();
+    const source = collapsed ? flowData.levels.phase_runs : filteredData;
+    const nodes = source.nodes.map(d => ({...d}));
+    const links = source.connections.map(d => ({
+        source: d.from,
+        target: d.to,
+        ...d
+    }));
+
+    // サーバーで座標を計算済みの場合はシミュレーションを回さずにそのまま描画する
+    const staticLayout = Boolean(flowData.layout);
+    // 他のレイアウト（円形・タイムライン等）で固定位置が指定されていなければ事前計算の座標
+    const precomputedPositions = staticLayout && !collapsed && nodes.every(d => d.fx == null);
+
+    if (staticLayout) {
+        nodes.forEach(d => {
+            if (d.fx != null) {
+                d.x = d.fx;
+                d.y = d.fy;
+            }
+            d.fx = d.x;
+            d.fy = d.y;
+        });
+        // リンクのID解決とドラッグ時の再描画のためだけに使う（力は加えない）
+        networkSimulation = d3.forceSimulation(nodes)
+            .force("link", d3.forceLink(links).id(d => d.id).strength(0))
+            .stop();
+    } else {
+        networkSimulation = d3.forceSimulation(nodes)
+            .force("link", d3.forceLink(links).id(d => d.id).distance(100))
+            .force("charge", d3.forceManyBody().strength(-300))
+            .force("center", d3.forceCenter(width / 2, height / 2))
+            .force("collision", d3.forceCollide().radius(d => d.size + 5));
+    }
+
+    // リンク描画
+    const link = g.append("g")
+        .selectAll("line")
+        .data(links)
+        .enter().append("line")
+        .attr("stroke", d => d.color)
+        .attr("stroke-width", d => d.width);
+
+    // ノード描画
+    const node = g.append("g")
+        .selectAll("circle")
+        .data(nodes)
+        .enter().append("circle")
+        .attr("r", d => d.size)
+        .attr("fill", d => d.color)
+        .attr("stroke", "#fff")
+        .attr("stroke-width", 2)
+        .call(d3.drag()
+            .on("start", dragstarted)
+            .on("drag", dragged)
+            .on("end", dragended));
+
+    // ノードラベル
+    const labels = g.append("g")
+        .selectAll("text")
+        .data(nodes)
+        .enter().append("text")
+        .text(d => d.label)
+        .attr("font-size", "12px")
+        .attr("text-anchor", "middle")
+        .attr("dy", ".35em");
+
+    // ツールチップ
+    node.append("title")
+        .text(d => collapsed
+            ? `${d.label}\n平均信頼度: ${d.confidence.toFixed(3)}\nステップ: ${d.members.join(', ')}`
+            : `${d.label}\n信頼度: ${d.confidence}\n検証: ${d.verification_status}`);
+
+    function ticked() {
+        link
+            .attr("x1", d => d.source.x)
+            .attr("y1", d => d.source.y)
+            .attr("x2", d => d.target.x)
+            .attr("y2", d => d.target.y);
+
+        node
+            .attr("cx", d => d.x)
+            .attr("cy", d => d.y);
+
+        labels
+            .attr("x", d => d.x)
+            .attr("y", d => d.y + d.size + 15);
+    }
+
+    // 表示範囲外のノード・リンクを非表示にし、縮小時はラベルを省く
+    function cullToViewport(transform) {
+        labels.attr("display", transform.k < LABEL_MIN_SCALE ? "none" : null);
+        if (!precomputedPositions || nodes.length < CULL_MIN_NODES) return;
+
+        const margin = 100;
+        const visible = visibleNodeIds(
+            (-transform.x) / transform.k - margin,
+            (-transform.y) / transform.k - margin,
+            (width - transform.x) / transform.k + margin,
+            (height - transform.y) / transform.k + margin
+        );
+        node.attr("display", d => visible.has(d.id) ? null : "none");
+        labels.filter(d => !visible.has(d.id)).attr("display", "none");
+        link.attr("display", d => visible.has(d.source.id) || visible.has(d.target.id) ? null : "none");
+    }
+
+    // ズーム機能
+    const zoom = d3.zoom()
+        .scaleExtent([0.05, 4])
+        .on("zoom", (event) => {
+            g.attr("transform", event.transform);
+        })
+        .on("end", (event) => cullToViewport(event.transform));
+
+    svg.call(zoom);
+
+    // シミュレーション更新
+    networkSimulation.on("tick", ticked);
+
+    if (staticLayout) {
+        ticked();
+        // 全体が収まるように初期表示を調整
+        const xs = nodes.map(d => d.x);
+        const ys = nodes.map(d => d.y);
+        const [minX, maxX, minY, maxY] = [Math.min(...xs), Math.max(...xs), Math.min(...ys), Math.max(...ys)];
+        const scale = Math.min(1, width / (maxX - minX + 120), height / (maxY - minY + 120));
+        svg.call(zoom.transform, d3.zoomIdentity
+            .translate(width / 2 - scale * (minX + maxX) / 2, height / 2 - scale * (minY + maxY) / 2)
+            .scale(scale));
+    }
+
+    function dragstarted(event, d) {
+        if (!event.active) networkSimulation.alphaTarget(0.3).restart();
+        d.fx = d.x;
+        d.fy = d.y;
+    }
+
+    function dragged(event, d) {
+        d.fx = event.x;
+        d.fy = event.y;
+    }
+
+    function dragended(event, d) {
+        if (!event.active) networkSimulation.alphaTarget(0);
+        // 座標が決まっているレイアウトではドラッグした位置に留める
+        if (!staticLayout) {
+            d.fx = null;
+            d.fy = null;
+        }
+    }
+}
+
+// 信頼度チャート初期化
+function initializeConfidenceChart() {
+    const ctx = document.getElementById('confidence-chart').getContext('2d');
+
+    const timelineData = currentData.confidence_timeline;
+    const labels = timelineData.map(d => new Date(d.timestamp).toLocaleTimeString());
+    const data = timelineData.map(d => d.confidence);
+    const colors = timelineData.map(d => d.color);
+
+    new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: [{
+                label: '信頼度',
+                data: data,
+                borderColor: '#3498db',
+                backgroundColor: 'rgba(52, 152, 219, 0.1)',
+                fill: true,
+                tension: 0.4,
+                pointBackgroundColor: colors,
+                pointBorderColor: '#fff',
+                pointBorderWidth: 2,
+                pointRadius: 6
+            }]
+        },
+        options: {
+            responsive: true,
+            scales: {
+                y: {
+                    min: 0,
+                    max: 1,
+                    title: {
+                        display: true,
+                        text: '信頼度'
+                    }
+                },
+                x: {
+                    title: {
+                        display: true,
+                        text: '時間'
+                    }
+                }
+            },
+            plugins: {
+                tooltip: {
+                    callbacks: {
+                        afterLabel: function(context) {
+                            const point = timelineData[context.dataIndex];
+                            return [`フェーズ: ${point.phase}`, `理由: ${point.reason}`];
+                        }
+                    }
+                }
+            }
+        }
+    });
+}
+
+// 詳細分析生成
+function generateDetailedAnalysis() {
+    const container = document.getElementById('detailed-analysis');
+    let html = '';
+
+    currentData.nodes.forEach((node, index) => {
+        html += `
+            <div class="card" style="margin-bottom: 20px;">
+                <h4>ステップ ${index + 1}: ${node.label}</h4>
+                <p><strong>フェーズ:</strong> ${node.phase}</p>
+                <p><strong>信頼度:</strong> ${node.confidence.toFixed(3)}</p>
+                <p><strong>処理時間:</strong> ${node.duration.toFixed(2)}秒</p>
+                <p><strong>検証状況:</strong> ${node.verification_status}</p>
+                ${node.detailed_content ? `<p><strong>詳細:</strong> ${node.detailed_content}</p>` : ''}
+                ${node.reasoning_text ? `<p><strong>推論:</strong> ${node.reasoning_text}</p>` : ''}
+                ${node.sources.length > 0 ? `<p><strong>ソース:</strong> ${node.sources.join(', ')}</p>` : ''}
+            </div>
+        `;
+    });
+
+    container.innerHTML = html;
+}
+
+// フェーズ凡例生成
+function generatePhaseLegend() {
+    const container = document.getElementById('phase-legend');
+    const legend = currentData.legend;
+    let html = '';
+
+    Object.entries(legend.phases).forEach(([phase, info]) => {
+        html += `
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: ${info.color}"></div>
+                <span>${info.icon} ${phase}</span>
+            </div>
+        `;
+    });
+
+    container.innerHTML = html;
+}
+
+// エクスポート機能
+function exportJSON() {
+    const dataStr = JSON.stringify(currentData, null, 2);
+    const blob = new Blob([dataStr], {type: "application/json"});
+    const url = URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = 'thinking_process_analysis.json';
+    a.click();
+}
+
+function exportPDF() {
+    const { jsPDF } = window.jspdf;
+    const doc = new jsPDF();
+
+    doc.setFontSize(20);
+    doc.text('Enhanced DeepResearch 分析結果', 20, 30);
+
+    doc.setFontSize(12);
+    doc.text(`トピック: ${flowData.metadata.topic}`, 20, 50);
+    doc.text(`分析時間: ${flowData.metadata.analysis_time.toFixed(2)}秒`, 20, 60);
+    doc.text(`信頼度: ${flowData.metadata.overall_confidence.toFixed(2)}`, 20, 70);
+
+    doc.save('thinking_process_report.pdf');
+}
+
+// 高度な検索・フィルタリング機能
+let filteredData = currentData;
+let currentFilters = {
+    phases: new Set(),
+    confidenceRange: [0, 1],
+    verificationStatus: new Set(),
+    searchTerm: ''
+};
+
+function initializeAdvancedControls() {
+    // 検索機能
+    const searchInput = document.getElementById('search-input');
+    if (searchInput) {
+        searchInput.addEventListener('input', debounce(performSearch, 300));
+    }
+
+    // フェーズフィルタ
+    initializePhaseFilters();
+
+    // 信頼度スライダー
+    initializeConfidenceSlider();
+
+    // 検証ステータスフィルタ
+    initializeVerificationFilters();
+}
+
+function performSearch(event) {
+    const searchTerm = event.target.value.toLowerCase();
+    currentFilters.searchTerm = searchTerm;
+    applyFilters();
+}
+
+function initializePhaseFilters() {
+    const phaseContainer = document.getElementById('phase-filters');
+    if (!phaseContainer) return;
+
+    const phases = [...new Set(currentData.nodes.map(n => n.phase))];
+    let html = '<div class="filter-group"><h4>フェーズフィルタ</h4>';
+
+    phases.forEach(phase => {
+        const color = currentData.legend.phases[phase]?.color || '#999';
+        html += `
+            <label class="filter-checkbox">
+                <input type="checkbox" value="${phase}" checked
+                       onchange="togglePhaseFilter('${phase}', this.checked)">
+                <span class="checkmark" style="background-color: ${color}"></span>
+                ${phase}
+            </label>
+        `;
+    });
+
+    html += '</div>';
+    phaseContainer.innerHTML = html;
+}
+
+function togglePhaseFilter(phase, enabled) {
+    if (enabled) {
+        currentFilters.phases.delete(phase);
+    } else {
+        currentFilters.phases.add(phase);
+    }
+    applyFilters();
+}
+
+function initializeConfidenceSlider() {
+    const slider = document.getElementById('confidence-slider');
+    if (!slider) return;
+
+    noUiSlider.create(slider, {
+        start: [0, 1],
+        connect: true,
+        range: {
+            'min': 0,
+            'max': 1
+        },
+        step: 0.01,
+        format: {
+            to: value => value.toFixed(2),
+            from: value => parseFloat(value)
+        }
+    });
+
+    slider.noUiSlider.on('update', (values) => {
+        currentFilters.confidenceRange = [parseFloat(values[0]), parseFloat(values[1])];
+        applyFilters();
+    });
+}
+
+function initializeVerificationFilters() {
+    const container = document.getElementById('verification-filters');
+    if (!container) return;
+
+    const statuses = [...new Set(currentData.nodes.map(n => n.verification_status))];
+    let html = '<div class="filter-group"><h4>検証ステータス</h4>';
+
+    statuses.forEach(status => {
+        const color = getVerificationColor(status);
+        html += `
+            <label class="filter-checkbox">
+                <input type="checkbox" value="${status}" checked
+                       onchange="toggleVerificationFilter('${status}', this.checked)">
+                <span class="checkmark" style="background-color: ${color}"></span>
+                ${status}
+            </label>
+        `;
+    });
+
+    html += '</div>';
+    container.innerHTML = html;
+}
+
+function toggleVerificationFilter(status, enabled) {
+    if (enabled) {
+        currentFilters.verificationStatus.delete(status);
+    } else {
+        currentFilters.verificationStatus.add(status);
+    }
+    applyFilters();
+}
+
+function applyFilters() {
+    filteredData = {
+        ...currentData,
+        nodes: currentData.nodes.filter(node => {
+            // フェーズフィルタ
+            if (currentFilters.phases.has(node.phase)) return false;
+
+            // 信頼度フィルタ
+            if (node.confidence < currentFilters.confidenceRange[0] || 
+                node.confidence > currentFilters.confidenceRange[1]) return false;
+
+            // 検証ステータスフィルタ
+            if (currentFilters.verificationStatus.has(node.verification_status)) return false;
+
+            // 検索フィルタ
+            if (currentFilters.searchTerm) {
+                const searchableText = [
+                    node.label,
+                    node.detailed_content,
+                    node.reasoning_text,
+                    ...node.sources
+                ].join(' ').toLowerCase();
+                if (!searchableText.includes(currentFilters.searchTerm)) return false;
+            }
+
+            return true;
+        })
+    };
+
+    // 接続も更新（フィルタされたノードのみ）
+    const filteredNodeIds = new Set(filteredData.nodes.map(n => n.id));
+    filteredData.connections = currentData.connections.filter(conn => 
+        filteredNodeIds.has(conn.from) && filteredNodeIds.has(conn.to)
+    );
+
+    updateVisualization();
+    updateStatistics();
+}
+
+function updateVisualization() {
+    // ネットワーク図を再描画
+    d3.select("#network-viz").selectAll("*").remove();
+    initializeNetworkVisualization();
+
+    // タイムライン更新
+    updateConfidenceChart();
+}
+
+function updateConfidenceChart() {
+    const canvas = document.getElementById('confidence-chart');
+    const existingChart = Chart.getChart(canvas);
+    if (existingChart) {
+        existingChart.destroy();
+    }
+    initializeConfidenceChart();
+}
+
+function updateStatistics() {
+    const stats = calculateAdvancedStatistics(filteredData);
+    displayAdvancedStatistics(stats);
+}
+
+function calculateAdvancedStatistics(data) {
+    const nodes = data.nodes;
+    const connections = data.connections;
+
+    return {
+        totalNodes: nodes.length,
+        averageConfidence: nodes.reduce((sum, n) => sum + n.confidence, 0) / nodes.length,
+        confidenceVariance: calculateVariance(nodes.map(n => n.confidence)),
+        verificationRate: nodes.filter(n => n.verification_status === 'verified').length / nodes.length,
+        averageDuration: nodes.reduce((sum, n) => sum + (n.duration || 0), 0) / nodes.length,
+        complexityScore: calculateComplexityScore(nodes, connections),
+        phasesDistribution: calculatePhaseDistribution(nodes),
+        criticalPath: identifyCriticalPath(nodes, connections)
+    };
+}
+
+function calculatePhaseDistribution(nodes) {
+    const distribution = {};
+    nodes.forEach(node => {
+        distribution[node.phase] = (distribution[node.phase] || 0) + 1;
+    });
+    return distribution;
+}
+
+function identifyCriticalPath(nodes, connections) {
+    // 最も信頼度の高いパスを特定
+    const graph = buildGraph(nodes, connections);
+    return findHighestConfidencePath(graph);
+}
+
+function buildGraph(nodes, connections) {
+    const graph = {};
+    nodes.forEach(node => {
+        graph[node.id] = { node, connections: [] };
+    });
+    connections.forEach(conn => {
+        if (graph[conn.from]) {
+            graph[conn.from].connections.push(conn);
+        }
+    });
+    return graph;
+}
+
+function findHighestConfidencePath(graph) {
+    // 簡化されたパス探索アルゴリズム
+    let bestPath = [];
+    let bestScore = 0;
+
+    Object.keys(graph).forEach(startId => {
+        const path = explorePathDFS(graph, startId, [], 0);
+        if (path.score > bestScore) {
+            bestScore = path.score;
+            bestPath = path.nodes;
+        }
+    });
+
+    return bestPath;
+}
+
+function explorePathDFS(graph, nodeId, currentPath, currentScore) {
+    const node = graph[nodeId];
+    if (!node || currentPath.includes(nodeId)) {
+        return { nodes: currentPath, score: currentScore };
+    }
+
+    const newPath = [...currentPath, nodeId];
+    const newScore = currentScore + node.node.confidence;
+
+    if (node.connections.length === 0) {
+        return { nodes: newPath, score: newScore };
+    }
+
+    let bestSubPath = { nodes: newPath, score: newScore };
+    node.connections.forEach(conn => {
+        const subPath = explorePathDFS(graph, conn.to, newPath, newScore);
+        if (subPath.score > bestSubPath.score) {
+            bestSubPath = subPath;
+        }
+    });
+
+    return bestSubPath;
+}
+
+// 高度なレイアウト機能
+function changeLayout() {
+    const layout = document.getElementById('layout-select').value;
+    applyLayoutAlgorithm(layout);
+}
+
+         function applyLayoutAlgorithm(layoutType) {
+     const nodes = filteredData.nodes;
+     const connections = filteredData.connections;
+
+     // 既存のシミュレーションを停止
+     if (networkSimulation) {
+         networkSimulation.stop();
+     }
+
+     // ネットワーク図をクリア
+     d3.select("#network-viz").selectAll("*").remove();
+
+     switch (layoutType) {
+         case 'force-directed':
+             initializeForceDirectedLayout();
+             break;
+         case 'hierarchical':
+             initializeHierarchicalLayout();
+             break;
+         case 'circular':
+             initializeCircularLayout();
+             break;
+         case 'timeline':
+             initializeTimelineLayout();
+             break;
+         case 'confidence-based':
+             initializeConfidenceBasedLayout();
+             break;
+     }
+ }
+
+ function initializeForceDirectedLayout() {
+     // フォースレイアウトでは固定位置をクリアして自然な配置にする
+     filteredData.nodes.forEach(node => {
+         node.fx = null;
+         node.fy = null;
+     });
+     initializeNetworkVisualization();
+ }
+
+ function calculateVariance(values) {
+     if (values.length === 0) return 0;
+     const mean = values.reduce((sum, val) => sum + val, 0) / values.length;
+     const squaredDiffs = values.map(val => Math.pow(val - mean, 2));
+     return squaredDiffs.reduce((sum, diff) => sum + diff, 0) / values.length;
+ }
+
+ function calculateComplexityScore(nodes, connections) {
+     // 複雑度スコアの計算：ノード数、接続数、平均分岐度を考慮
+     const nodeCount = nodes.length;
+     const connectionCount = connections.length;
+     const avgBranching = connectionCount > 0 ? connectionCount / nodeCount : 0;
+
+     // 正規化された複雑度スコア (0-1)
+     const normalizedNodeCount = Math.min(nodeCount / 50, 1); // 50ノードを最大とする
+     const normalizedConnectionCount = Math.min(connectionCount / 100, 1); // 100接続を最大とする
+     const normalizedBranching = Math.min(avgBranching / 5, 1); // 平均分岐度5を最大とする
+
+     return (normalizedNodeCount + normalizedConnectionCount + normalizedBranching) / 3;
+ }
+
+ function displayAdvancedStatistics(stats) {
+     const container = document.getElementById('advanced-stats');
+     if (!container) return;
+
+     let html = `
+         <div class="stats-grid">
+             <div class="stat-item">
+                 <div class="stat-value">${stats.totalNodes}</div>
+                 <div class="stat-label">総ノード数</div>
+             </div>
+             <div class="stat-item">
+                 <div class="stat-value">${stats.averageConfidence.toFixed(3)}</div>
+                 <div class="stat-label">平均信頼度</div>
+             </div>
+             <div class="stat-item">
+                 <div class="stat-value">${(stats.verificationRate * 100).toFixed(1)}%</div>
+                 <div class="stat-label">検証率</div>
+             </div>
+             <div class="stat-item">
+                 <div class="stat-value">${stats.averageDuration.toFixed(2)}s</div>
+                 <div class="stat-label">平均処理時間</div>
+             </div>
+             <div class="stat-item">
+                 <div class="stat-value">${(stats.complexityScore * 100).toFixed(0)}</div>
+                 <div class="stat-label">複雑度スコア</div>
+             </div>
+         </div>
+     `;
+     container.innerHTML = html;
+ }
+
+function initializeHierarchicalLayout() {
+    // サーバーで計算済みの階層レイアウトがあればそのまま使う
+    if (flowData.layout && flowData.layout.type === 'hierarchical') {
+        initializeForceDirectedLayout();
+        return;
+    }
+
+    const svg = d3.select("#network-viz");
+    const width = svg.node().getBoundingClientRect().width;
+    const height = svg.node().getBoundingClientRect().height;
+
+    // 階層レベルを計算
+    const levels = calculateHierarchicalLevels(filteredData.nodes, filteredData.connections);
+    const levelHeight = height / (levels.length + 1);
+
+    levels.forEach((levelNodes, levelIndex) => {
+        const y = (levelIndex + 1) * levelHeight;
+        const nodeWidth = width / (levelNodes.length + 1);
+
+        levelNodes.forEach((node, nodeIndex) => {
+            node.fx = (nodeIndex + 1) * nodeWidth;
+            node.fy = y;
+        });
+    });
+
+    initializeNetworkVisualization();
+}
+
+function calculateHierarchicalLevels(nodes, connections) {
+    const levels = [];
+    const visited = new Set();
+    const inDegree = {};
+    const nodesById = new Map(nodes.map(node => [node.id, node]));
+
+    // 入次数を計算
+    nodes.forEach(node => { inDegree[node.id] = 0; });
+    connections.forEach(conn => { inDegree[conn.to]++; });
+
+    // レベル0: 入次数0のノード
+    let currentLevel = nodes.filter(node => inDegree[node.id] === 0);
+
+    while (currentLevel.length > 0) {
+        levels.push([...currentLevel]);
+        currentLevel.forEach(node => visited.add(node.id));
+
+        const nextLevel = [];
+        const queued = new Set();
+        connections.forEach(conn => {
+            if (visited.has(conn.from) && !visited.has(conn.to)) {
+                const targetNode = nodesById.get(conn.to);
+                if (targetNode && !queued.has(targetNode.id)) {
+                    queued.add(targetNode.id);
+                    nextLevel.push(targetNode);
+                }
+            }
+        });
+
+        currentLevel = nextLevel;
+    }
+
+    return levels;
+}
+
+function initializeCircularLayout() {
+    const nodes = filteredData.nodes;
+    const svg = d3.select("#network-viz");
+    const width = svg.node().getBoundingClientRect().width;
+    const height = svg.node().getBoundingClientRect().height;
+    const centerX = width / 2;
+    const centerY = height / 2;
+    const radius = Math.min(width, height) * 0.3;
+
+    nodes.forEach((node, index) => {
+        const angle = (2 * Math.PI * index) / nodes.length;
+        node.fx = centerX + radius * Math.cos(angle);
+        node.fy = centerY + radius * Math.sin(angle);
+    });
+
+    initializeNetworkVisualization();
+}
+
+function initializeTimelineLayout() {
+    const nodes = filteredData.nodes;
+    const svg = d3.select("#network-viz");
+    const width = svg.node().getBoundingClientRect().width;
+    const height = svg.node().getBoundingClientRect().height;
+
+    // タイムスタンプでソート
+    const sortedNodes = [...nodes].sort((a, b) => 
+        new Date(a.timestamp) - new Date(b.timestamp));
+
+    sortedNodes.forEach((node, index) => {
+        node.fx = (width / (sortedNodes.length + 1)) * (index + 1);
+        node.fy = height / 2;
+    });
+
+    initializeNetworkVisualization();
+}
+
+function initializeConfidenceBasedLayout() {
+    const nodes = filteredData.nodes;
+    const svg = d3.select("#network-viz");
+    const width = svg.node().getBoundingClientRect().width;
+    const height = svg.node().getBoundingClientRect().height;
+
+    // 信頼度で垂直位置を決定
+    nodes.forEach((node, index) => {
+        node.fx = (width / (nodes.length + 1)) * (index + 1);
+        node.fy = height * (1 - node.confidence); // 高信頼度ほど上位
+    });
+
+    initializeNetworkVisualization();
+}
+
+// その他のユーティリティ関数
+function resetZoom() {
+    d3.select("#network-viz").transition().call(
+        d3.zoom().transform,
+        d3.zoomIdentity
+    );
+}
+
+function resetFilters() {
+    currentFilters = {
+        phases: new Set(),
+        confidenceRange: [0, 1],
+        verificationStatus: new Set(),
+        searchTerm: ''
+    };
+
+    // UIをリセット
+    document.getElementById('search-input').value = '';
+    document.querySelectorAll('.filter-checkbox input').forEach(cb => cb.checked = true);
+
+    filteredData = currentData;
+    updateVisualization();
+    updateStatistics();
+}
+
+function exportNetworkSVG() {
+    const svgElement = document.getElementById('network-viz');
+    const serializer = new XMLSerializer();
+    const svgString = serializer.serializeToString(svgElement);
+    const blob = new Blob([svgString], {type: "image/svg+xml"});
+    const url = URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = 'network_visualization.svg';
+    a.click();
+}
+
+function debounce(func, wait) {
+    let timeout;
+    return function executedFunction(...args) {
+        const later = () => {
+            clearTimeout(timeout);
+            func(...args);
+        };
+        clearTimeout(timeout);
+        timeout = setTimeout(later, wait);
+    };
+}
+
+function getVerificationColor(status) {
+    const colors = {
+        'verified': '#27ae60',
+        'rejected': '#e74c3c',
+        'pending': '#f39c12',
+        'partial': '#3498db'
+    };
+    return colors[status] || '#95a5a6';
+}
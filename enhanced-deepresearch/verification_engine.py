@@ -14,6 +14,8 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 from news_analyzer import EfficientNewsAnalyzer
+from prompt_templates import CROSS_REFERENCE, FACT_CHECK
+from metrics import record_cache_lookup
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
@@ -105,8 +107,10 @@ class VerificationEngine(EfficientNewsAnalyzer):
             cache_key = self._get_verification_cache_key(claim)
             if cache_key in self.verification_cache:
                 print("💾 キャッシュからロード")
+                record_cache_lookup("verification", hits=1)
                 verification_results.append(self.verification_cache[cache_key])
                 continue
+            record_cache_lookup("verification", misses=1)
             
             # 検証実行
             try:
@@ -164,32 +168,16 @@ class VerificationEngine(EfficientNewsAnalyzer):
         """クロスリファレンス分析"""
         
         # AI分析でクロスリファレンス情報を取得
-        cross_ref_prompt = f"""以下の主張について、クロスリファレンス分析を実行してください：
-
-主張: {claim}
-コンテキスト: {json.dumps(context, ensure_ascii=False)}
-
-分析項目:
-1. この主張を支持する証拠・情報源
-2. この主張に矛盾する証拠・情報源  
-3. 関連する既知の事実
-4. 検証に必要な追加情報
-
-回答をJSON形式で：
-{{
-    "supporting_evidence": ["支持する証拠1", "支持する証拠2"],
-    "contradicting_evidence": ["矛盾する証拠1"],
-    "related_facts": ["関連事実1", "関連事実2"],
-    "sources": ["情報源1", "情報源2"],
-    "confidence": 0.8,
-    "analysis_summary": "分析の要約"
-}}
-"""
+        cross_ref_prompt = CROSS_REFERENCE.render(
+            claim=claim,
+            context=json.dumps(context, ensure_ascii=False)
+        )
         
         try:
             response = await self.llm.generate_content_async(
                 cross_ref_prompt,
-                agent_name="クロスリファレンス分析エンジン"
+                agent_name="クロスリファレンス分析エンジン",
+                call_type=CROSS_REFERENCE.call_type
             )
             
             cross_ref_data = json.loads(response.strip())
@@ -216,35 +204,17 @@ class VerificationEngine(EfficientNewsAnalyzer):
     async def _fact_check_claim(self, claim: str, cross_ref_data: Dict[str, Any]) -> Dict[str, Any]:
         """ファクトチェック実行"""
         
-        fact_check_prompt = f"""以下の主張のファクトチェックを実行してください：
-
-主張: {claim}
-
-参考情報:
-支持する証拠: {cross_ref_data.get('supporting_evidence', [])}
-矛盾する証拠: {cross_ref_data.get('contradicting_evidence', [])}
-
-ファクトチェック項目:
-1. 主張の具体的な要素の検証
-2. 数値・日付・人名・企業名の正確性
-3. 論理的整合性
-4. 既知の事実との照合
-
-回答をJSON形式で：
-{{
-    "fact_check_status": "accurate|partially_accurate|inaccurate|unverifiable",
-    "accuracy_score": 0.8,
-    "verified_facts": ["検証済み事実1"],
-    "disputed_facts": ["争点のある事実1"],
-    "logical_consistency": 0.9,
-    "fact_check_summary": "ファクトチェック要約"
-}}
-"""
+        fact_check_prompt = FACT_CHECK.render(
+            claim=claim,
+            supporting=str(cross_ref_data.get('supporting_evidence', [])),
+            contradicting=str(cross_ref_data.get('contradicting_evidence', []))
+        )
         
         try:
             response = await self.llm.generate_content_async(
                 fact_check_prompt,
-                agent_name="ファクトチェックエンジン"
+                agent_name="ファクトチェックエンジン",
+                call_type=FACT_CHECK.call_type
             )
             
             fact_check_result = json.loads(response.strip())
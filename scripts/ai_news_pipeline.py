@@ -2,6 +2,10 @@
 """
 AI駆動ニュースパイプライン統合スクリプト
 企業ニュース収集 → AI分析 → 日本語要約 → レポート生成
+
+各工程は PipelineDAG のステージ（collect → filter → cache_check → analyze → score →
+summarize → render）として実行し、出力は cache/pipeline/ai_news/<run_id>/ に保存する。
+途中で失敗した場合は --resume で、成功したステージの出力を再利用して続きから実行できる。
 """
 
 import os
@@ -18,6 +22,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from company_news_collector import CompanyNewsCollector
 from news_analyzer import analyze_company_news, NewsAnalyzer, EfficientNewsAnalyzer
+from pipeline_dag import PipelineDAG
+from instrumentation import add_instrumentation_arguments, configure_tracing, profiling
 
 class AINewsPipeline:
     def __init__(self, config_path="config/target_companies.yaml"):
@@ -32,63 +38,112 @@ class AINewsPipeline:
         self.analyzer = EfficientNewsAnalyzer()
         self.output_dir = Path("reports")
         self.output_dir.mkdir(exist_ok=True)
+        self.dag = self.build_dag()
+    
+    def build_dag(self) -> PipelineDAG:
+        """
+        パイプラインのステージを宣言
         
-    async def run_pipeline(self, top_n: int = 10) -> dict:
-        """パイプライン実行"""
+        ファイルを書き出す render はチェックポイントを使わず毎回実行する。
+        
+        Returns:
+            PipelineDAG: ステージを登録したパイプライン
+        """
+        dag = PipelineDAG("ai_news")
+        dag.add_stage("collect", self._collect_stage, outputs=("raw_news",))
+        dag.add_stage("filter", self._filter_stage, inputs=("raw_news",), outputs=("filtered",))
+        dag.add_stage("cache_check", self._cache_check_stage, inputs=("filtered",), outputs=("checked", "pending"))
+        dag.add_stage("analyze", self._analyze_stage, inputs=("checked", "pending"), outputs=("analyzed",))
+        dag.add_stage("score", self._score_stage, inputs=("analyzed", "top_n"), outputs=("scored", "top_news"))
+        dag.add_stage("summarize", self._summarize_stage, inputs=("top_news",), outputs=("weekly_summary",))
+        dag.add_stage("render", self._render_stage, inputs=("scored", "top_news", "weekly_summary"),
+                      outputs=("result",), checkpoint=False)
+        return dag
+    
+    def _collect_stage(self) -> list:
+        """1. ニュース収集"""
+        print("📰 企業別ニュース収集中...")
+        raw_news = self.collector.collect_all_company_news(days_back=7)
+        print(f"✅ 収集完了: {len(raw_news)}件")
+        if not raw_news:
+            raise ValueError("No news collected")
+        return raw_news
+    
+    def _filter_stage(self, raw_news: list) -> list:
+        """2. 段階的フィルタリング"""
+        return self.analyzer.apply_quick_filters([dict(news) for news in raw_news])
+    
+    def _cache_check_stage(self, filtered: list) -> dict:
+        """3. 保存済み分析結果のチェック"""
+        checked = [dict(news) for news in filtered]
+        return {"checked": checked, "pending": self.analyzer.check_saved_analyses(checked)}
+    
+    async def _analyze_stage(self, checked: list, pending: list) -> list:
+        """4. AI分析（保存済みの結果が無い記事のみ）"""
+        analyzed = [dict(news) for news in checked]
+        if pending:
+            print(f"🤖 AI分析・重要度判定中... ({len(pending)}件)")
+            await self.analyzer.analyze_pending(analyzed, pending)
+        return analyzed
+    
+    def _score_stage(self, analyzed: list, top_n: int) -> dict:
+        """5. 最終スコア計算・上位ニュース選出"""
+        scored = self.analyzer.compute_final_scores([dict(news) for news in analyzed])
+        return {"scored": scored, "top_news": scored[:top_n]}
+    
+    async def _summarize_stage(self, top_news: list) -> str:
+        """6. 週次サマリー生成"""
+        print("\n📝 週次サマリー生成中...")
+        return await self.analyzer.generate_weekly_summary(top_news)
+    
+    async def _render_stage(self, scored: list, top_news: list, weekly_summary: str) -> dict:
+        """7. 結果の構造化・ファイル出力・表示"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        result = {
+            "generated_at": datetime.now().isoformat(),
+            "period_info": self.analyzer.get_analysis_period(),
+            "weekly_summary": weekly_summary,
+            "total_items": len(scored),
+            "top_items": len(top_news),
+            "statistics": self.calculate_stats(scored, top_news),
+            "analysis_results": top_news
+        }
+        
+        await self.save_results(result, timestamp)
+        self.display_results(result)
+        return result
+        
+    async def run_pipeline(self, top_n: int = 10, run_id: str = None, force=()) -> dict:
+        """
+        パイプライン実行
+        
+        Args:
+            top_n (int): 上位何件を選出するか
+            run_id (str): 再開する実行ID（省略時は新規実行）
+            force: チェックポイントを使わずに再実行するステージ名
+        
+        Returns:
+            dict: 分析結果（失敗時は error と run_id）
+        """
+        print("🚀 AI駆動ニュースパイプライン開始")
+        print("=" * 50)
         
         try:
-            print("🚀 AI駆動ニュースパイプライン開始")
-            print("=" * 50)
-            
-            # 1. ニュース収集
-            print("📰 企業別ニュース収集中...")
-            raw_news = self.collector.collect_all_company_news(days_back=7)
-            print(f"✅ 収集完了: {len(raw_news)}件")
-            
-            if not raw_news:
-                print("❌ ニュースが収集できませんでした")
-                return {"error": "No news collected"}
-            
-            # 2. AI分析・重要度判定
-            print("\n🤖 AI分析・重要度判定中...")
-            analyzed_news = await self.analyzer.analyze_news_efficient(raw_news)
-            
-            # 3. 上位ニュース選出
-            top_news = sorted(analyzed_news, key=lambda x: x.get('score', 0), reverse=True)[:top_n]
-            
-            # 4. 対象期間情報取得
-            period_info = self.analyzer.get_analysis_period()
-            
-            # 5. 週次サマリー生成
-            print("\n📝 週次サマリー生成中...")
-            weekly_summary = await self.analyzer.generate_weekly_summary(top_news)
-            
-            # 6. 統計情報計算
-            stats = self.calculate_stats(analyzed_news, top_news)
-            
-            # 7. 結果構造化
-            result = {
-                "generated_at": datetime.now().isoformat(),
-                "period_info": period_info,
-                "weekly_summary": weekly_summary,
-                "total_items": len(analyzed_news),
-                "top_items": len(top_news),
-                "statistics": stats,
-                "analysis_results": top_news
-            }
-            
-            # 8. ファイル出力
-            await self.save_results(result, timestamp)
-            
-            # 9. 結果表示
-            self.display_results(result)
-            
-            return result
-            
+            run = await self.dag.run(params={"top_n": top_n}, run_id=run_id, force=force)
         except Exception as e:
             print(f"❌ パイプライン実行エラー: {e}")
             return {"error": str(e)}
+        
+        print("\n⏱️ ステージ別所要時間")
+        print(run.timing_table())
+        
+        if not run.success:
+            failed = run.failed_stages[0]
+            print(f"❌ パイプライン実行エラー: {failed.name} - {failed.error}")
+            print(f"🔁 続きから実行: python scripts/ai_news_pipeline.py --resume {run.run_id}")
+            return {"error": failed.error, "failed_stage": failed.name, "run_id": run.run_id}
+        
+        return run.values["result"]
 
     def calculate_stats(self, all_news: list, top_news: list) -> dict:
         """統計情報を計算"""
@@ -232,15 +287,23 @@ def main():
     parser = argparse.ArgumentParser(description="AI駆動ニュースパイプライン")
     parser.add_argument("--top", type=int, default=10, help="上位何件を選出するか")
     parser.add_argument("--config", type=str, default="config/target_companies.yaml", help="設定ファイルパス")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help="前回の実行を続きから再開（RUN_ID省略時は直近の実行）")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="チェックポイントを使わずに再実行するステージ（複数指定可）")
+    add_instrumentation_arguments(parser)
     
     args = parser.parse_args()
+    configure_tracing(args.trace)
     
     # パイプライン実行
     pipeline = AINewsPipeline(config_path=args.config)
-    result = asyncio.run(pipeline.run_pipeline(top_n=args.top))
+    run_id = pipeline.dag.latest_run_id() if args.resume == "latest" else args.resume
+    with profiling(args.profile):
+        result = asyncio.run(pipeline.run_pipeline(top_n=args.top, run_id=run_id, force=args.force))
     
     # 終了コード
-    exit_code = 0 if result["status"] == "success" else 1
+    exit_code = 0 if "error" not in result else 1
     sys.exit(exit_code)
 
 if __name__ == "__main__":
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+記事埋め込みベクトルと近傍検索インデックス
+
+記事テキストを埋め込みベクトルに変換し、以下に利用します。
+- トピック関連度スコア（トピックとのコサイン類似度）
+- 意味的な重複記事の除去（記事間のコサイン類似度）
+
+埋め込みはOllamaの /api/embed（旧 /api/embeddings）またはローカルCPUの
+sentence-transformersで計算し、記事ハッシュをキーに cache/embeddings に保存します。
+numpyや埋め込みモデルが利用できない場合は available=False となり、
+呼び出し側は従来の文字列一致による処理にフォールバックします。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Any, Sequence
+
+from atomic_io import open_atomic
+
+# numpyのインポート（フォールバック対応）
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# sentence-transformersのインポート（フォールバック対応）
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+
+DEFAULT_EMBEDDING_SETTINGS = {
+    "enabled": True,
+    "backend": "ollama",  # "ollama" | "sentence_transformers"
+    "model": "nomic-embed-text",
+    "cache_dir": "cache/embeddings",
+    "batch_size": 32,
+    "dedup_threshold": 0.92,
+    "relevance_threshold": 0.45
+}
+
+
+def article_hash(text: str) -> str:
+    """
+    記事テキストのハッシュ（埋め込みキャッシュのキー）
+
+    Args:
+        text (str): 記事テキスト
+
+    Returns:
+        str: SHA-1ハッシュ
+    """
+    normalized = " ".join((text or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def article_text(title: str, body: str = "", max_chars: int = 2000) -> str:
+    """埋め込み対象のテキストを作成（タイトル＋本文の先頭）"""
+    return f"{title or ''}\n{body or ''}".strip()[:max_chars]
+
+
+class VectorIndex:
+    """
+    正規化済みベクトルの近傍検索インデックス（全件の行列積で計算）
+    """
+
+    def __init__(self, vectors: "np.ndarray", ids: Optional[Sequence[Any]] = None):
+        """
+        初期化
+
+        Args:
+            vectors (np.ndarray): (件数, 次元) の正規化済みベクトル
+            ids (Sequence): 各行に対応するID（省略時は行番号）
+        """
+        self.vectors = vectors
+        self.ids = list(ids) if ids is not None else list(range(len(vectors)))
+
+    def similarities(self, queries: "np.ndarray") -> "np.ndarray":
+        """
+        クエリと全件のコサイン類似度
+
+        Returns:
+            np.ndarray: (クエリ数, 件数) の類似度行列
+        """
+        return queries @ self.vectors.T
+
+    def search(self, query: "np.ndarray", k: int = 10) -> List[tuple]:
+        """
+        近傍検索
+
+        Args:
+            query (np.ndarray): 正規化済みクエリベクトル
+            k (int): 取得件数
+
+        Returns:
+            List[tuple]: (ID, 類似度) のリスト（類似度の高い順）
+        """
+        scores = self.similarities(query.reshape(1, -1))[0]
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+    def relevance(self, topic_vectors: "np.ndarray") -> "np.ndarray":
+        """
+        各件のトピック関連度（いずれかのトピックとの最大類似度）
+
+        Returns:
+            np.ndarray: (件数,) の関連度
+        """
+        if len(self.vectors) == 0 or len(topic_vectors) == 0:
+            return np.zeros(len(self.vectors))
+        return self.similarities(topic_vectors).max(axis=0)
+
+    def duplicate_mask(self, threshold: float) -> "np.ndarray":
+        """
+        重複判定（先に出現した採用済みの件と類似度が閾値以上なら重複）
+
+        Args:
+            threshold (float): 重複とみなすコサイン類似度
+
+        Returns:
+            np.ndarray: 重複ならTrueのブール配列
+        """
+        count = len(self.vectors)
+        if count < 2:
+            return np.zeros(count, dtype=bool)
+
+        similar = np.triu(self.vectors @ self.vectors.T >= threshold, k=1)
+        duplicate = np.zeros(count, dtype=bool)
+        for i in np.flatnonzero(similar.any(axis=1)):
+            if not duplicate[i]:
+                duplicate |= similar[i]
+        return duplicate
+
+
+class ArticleEmbedder:
+    """
+    記事埋め込みの計算とディスクキャッシュ
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, router=None):
+        """
+        初期化
+
+        Args:
+            settings (Dict): 埋め込み設定（local_llm.embeddings）
+            router: Ollamaバックエンドプール（省略時は共有ルーター）
+        """
+        self.settings = dict(DEFAULT_EMBEDDING_SETTINGS)
+        self.settings.update(settings or {})
+        self.backend = self.settings["backend"]
+        self.model = self.settings["model"]
+        self.batch_size = self.settings["batch_size"]
+        self.dedup_threshold = self.settings["dedup_threshold"]
+        self.relevance_threshold = self.settings["relevance_threshold"]
+
+        model_slug = self.model.replace("/", "_").replace(":", "_")
+        self.store_path = os.path.join(self.settings["cache_dir"], f"{model_slug}.npz")
+
+        self._router = router
+        self._local_model = None
+        self._vectors: Dict[str, "np.ndarray"] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.available = self._check_available()
+        if self.available:
+            self._load_store()
+
+    @classmethod
+    def from_settings(cls, config_path: str = "config/settings.json") -> "ArticleEmbedder":
+        """
+        設定ファイルから生成（ファイルが無い場合はデフォルト設定）
+
+        Args:
+            config_path (str): 設定ファイルのパス
+
+        Returns:
+            ArticleEmbedder: 埋め込み計算器
+        """
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            llm_config = config.get("data_sources", {}).get("local_llm", {})
+        except (OSError, ValueError):
+            llm_config = {}
+
+        router = None
+        if llm_config.get("enabled", False):
+            from llm_router import get_shared_router
+            router = get_shared_router(llm_config)
+        return cls(llm_config.get("embeddings", {}), router=router)
+
+    def _check_available(self) -> bool:
+        """埋め込みが利用可能か"""
+        if not self.settings["enabled"] or not NUMPY_AVAILABLE:
+            return False
+        if self.backend == "sentence_transformers":
+            return SENTENCE_TRANSFORMERS_AVAILABLE
+        return self._router is not None
+
+    # ------------------------------------------------------------------
+    # ディスクキャッシュ
+    # ------------------------------------------------------------------
+
+    def _load_store(self) -> None:
+        """保存済みベクトルを読み込み"""
+        if not os.path.exists(self.store_path):
+            return
+        try:
+            with np.load(self.store_path) as store:
+                for key, vector in zip(store["hashes"], store["vectors"]):
+                    self._vectors[str(key)] = vector
+        except Exception as e:
+            print(f"⚠️ 埋め込みキャッシュ読み込みエラー: {e}")
+
+    def save(self) -> None:
+        """新しく計算したベクトルをディスクに保存（一時ファイル経由で置換）"""
+        with self._lock:
+            if not self._dirty or not self._vectors:
+                return
+            hashes = np.array(list(self._vectors.keys()))
+            vectors = np.stack(list(self._vectors.values())).astype(np.float32)
+            self._dirty = False
+
+        with open_atomic(self.store_path, "wb") as f:
+            np.savez(f, hashes=hashes, vectors=vectors)
+
+    # ------------------------------------------------------------------
+    # 埋め込み計算
+    # ------------------------------------------------------------------
+
+    def _encode_batch(self, texts: List[str]) -> "np.ndarray":
+        """テキストのバッチを埋め込み（未正規化）"""
+        if self.backend == "sentence_transformers":
+            if self._local_model is None:
+                self._local_model = SentenceTransformer(self.model, device="cpu")
+            return np.asarray(self._local_model.encode(texts, batch_size=self.batch_size), dtype=np.float32)
+
+        from llm_router import BackendStatusError
+        try:
+            response = self._router.post("/api/embed", json={"model": self.model, "input": texts}, timeout=120)
+        except BackendStatusError as e:
+            if e.status_code != 404:
+                raise
+            # 旧バージョンのOllamaは1件ずつの /api/embeddings のみ対応
+            vectors = []
+            for text in texts:
+                single = self._router.post("/api/embeddings", json={"model": self.model, "prompt": text}, timeout=60)
+                vectors.append(single.json()["embedding"])
+            return np.asarray(vectors, dtype=np.float32)
+
+        return np.asarray(response.json()["embeddings"], dtype=np.float32)
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        テキストを正規化済みベクトルに変換（キャッシュ済みの記事は再計算しない）
+
+        Args:
+            texts (List[str]): 記事テキストのリスト
+
+        Returns:
+            np.ndarray: (件数, 次元) の正規化済みベクトル
+        """
+        keys = [article_hash(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._vectors and key not in missing:
+                missing[key] = text
+
+        missing_keys = list(missing.keys())
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start:start + self.batch_size]
+            try:
+                vectors = self._encode_batch([missing[key] for key in batch_keys])
+            except Exception:
+                # モデル未導入などの場合は以降の呼び出しでフォールバックさせる
+                self.available = False
+                raise
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+            with self._lock:
+                self._vectors.update(zip(batch_keys, vectors))
+                self._dirty = True
+
+        if missing_keys:
+            print(f"🧮 埋め込み計算: {len(missing_keys)}件（キャッシュ済み {len(keys) - len(missing_keys)}件）")
+            self.save()
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([self._vectors[key] for key in keys])
+
+    def build_index(self, texts: List[str], ids: Optional[Sequence[Any]] = None) -> VectorIndex:
+        """
+        テキストから近傍検索インデックスを作成
+
+        Args:
+            texts (List[str]): 記事テキストのリスト
+            ids (Sequence): 各記事のID
+
+        Returns:
+            VectorIndex: インデックス
+        """
+        return VectorIndex(self.embed(texts), ids)
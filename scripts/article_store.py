@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+収集記事の永続化ストア
+
+収集した記事をURL単位でSQLite（data/articles.db）に保存します。
+
+- 正規化したURLのハッシュで一意に管理し、再収集時は更新（upsert）
+- 初回・最終確認日時と、記事を見つけた収集元（RSS・Web・NewsAPI）の履歴
+- 記事内容のハッシュとAI分析結果を保存し、内容が変わっていない記事は再分析しない
+
+DataManagerの分析DBとは別ファイルにし、それぞれのマイグレーション（PRAGMA user_version）を
+独立して管理する。
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlite_store import get_store
+
+
+DEFAULT_ARTICLE_DB = "data/articles.db"
+
+# URL正規化で取り除くトラッキング用クエリパラメータ（utm_* と以下）
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src"}
+
+# 分析結果として保存するキー（EfficientNewsAnalyzer が付与する値）
+ANALYSIS_KEYS = ("ai_score", "summary_jp")
+
+
+def normalize_url(url: str) -> str:
+    """
+    重複判定用にURLを正規化（スキーム・ホストの小文字化、フラグメント・トラッキング用パラメータ・末尾スラッシュの除去）
+
+    Args:
+        url (str): 記事URL
+
+    Returns:
+        str: 正規化したURL
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def url_hash(url: str) -> str:
+    """正規化したURLのハッシュ（記事の一意キー）"""
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def content_hash(article: Dict[str, Any]) -> str:
+    """
+    記事内容のハッシュ（タイトル・要約・本文が変わったかの判定用）
+
+    Args:
+        article (Dict): 記事
+
+    Returns:
+        str: SHA-1ハッシュ
+    """
+    text = "\n".join(" ".join(str(article.get(key) or "").split()) for key in ("title", "summary", "content"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ArticleStore:
+    """
+    収集記事のリポジトリ
+    """
+
+    MIGRATIONS = [
+        (1, [
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                company_id TEXT,
+                published_at TEXT,
+                content_hash TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                times_seen INTEGER NOT NULL DEFAULT 1,
+                analysis TEXT,
+                analysis_content_hash TEXT,
+                analyzed_at TEXT
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS article_sources (
+                url_hash TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                source_url TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                PRIMARY KEY (url_hash, source_type, source_url)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_articles_last_seen ON articles (last_seen)",
+            "CREATE INDEX IF NOT EXISTS idx_articles_company_published ON articles (company_id, published_at)"
+        ])
+    ]
+
+    SELECT_STATE_SQL = "SELECT url_hash, content_hash FROM articles WHERE url_hash IN ({placeholders})"
+    UPSERT_ARTICLE_SQL = """
+        INSERT INTO articles (url_hash, url, title, summary, company_id, published_at,
+                              content_hash, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (url_hash) DO UPDATE SET
+            url = excluded.url,
+            title = excluded.title,
+            summary = excluded.summary,
+            company_id = COALESCE(excluded.company_id, company_id),
+            published_at = COALESCE(excluded.published_at, published_at),
+            content_hash = excluded.content_hash,
+            last_seen = excluded.last_seen,
+            times_seen = times_seen + 1
+    """
+    UPSERT_SOURCE_SQL = """
+        INSERT INTO article_sources (url_hash, source_type, source_url, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (url_hash, source_type, source_url) DO UPDATE SET last_seen = excluded.last_seen
+    """
+    SELECT_ANALYSES_SQL = """
+        SELECT url_hash, analysis FROM articles
+        WHERE url_hash IN ({placeholders}) AND analysis IS NOT NULL AND analysis_content_hash = content_hash
+    """
+    UPDATE_ANALYSIS_SQL = """
+        UPDATE articles SET analysis = ?, analysis_content_hash = ?, analyzed_at = ? WHERE url_hash = ?
+    """
+    SELECT_SOURCES_SQL = """
+        SELECT source_type, source_url, first_seen, last_seen FROM article_sources
+        WHERE url_hash = ? ORDER BY first_seen
+    """
+    STATS_SQL = """
+        SELECT COUNT(*), COUNT(analysis), MAX(last_seen) FROM articles
+    """
+
+    # SQLiteのバインド変数上限（古いビルドは999）に収まるよう分割して問い合わせる
+    QUERY_CHUNK = 500
+
+    def __init__(self, db_path: str = DEFAULT_ARTICLE_DB):
+        """
+        初期化
+
+        Args:
+            db_path (str): データベースファイルのパス
+        """
+        self.db_path = db_path
+        self.store = get_store(db_path)
+        self.store.migrate(self.MIGRATIONS)
+
+    def _fetch_in(self, conn, sql: str, keys: List[str]) -> List[tuple]:
+        """IN句の問い合わせをバインド変数の上限に合わせて分割実行"""
+        rows = []
+        for start in range(0, len(keys), self.QUERY_CHUNK):
+            chunk = keys[start:start + self.QUERY_CHUNK]
+            rows.extend(conn.execute(sql.format(placeholders=",".join("?" * len(chunk))), chunk).fetchall())
+        return rows
+
+    def upsert_articles(self, articles: List[Dict[str, Any]], seen_at: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        収集した記事を保存（既存の記事は最終確認日時・内容を更新）
+
+        各記事には url_hash・content_hash・article_status（"new" / "changed" / "unchanged"）を付与する。
+
+        Args:
+            articles (List[Dict]): 収集記事（title, url, summary, content, company_id, source_type, source_url 等）
+            seen_at (datetime): 確認日時（省略時は現在時刻）
+
+        Returns:
+            Dict[str, int]: 状態ごとの件数
+        """
+        seen = (seen_at or datetime.now()).isoformat()
+        counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+        targets = [article for article in articles if article.get("url")]
+        for article in targets:
+            article["url_hash"] = url_hash(article["url"])
+            article["content_hash"] = content_hash(article)
+        if not targets:
+            return counts
+
+        with self.store.write() as conn:
+            known = dict(self._fetch_in(conn, self.SELECT_STATE_SQL, list({a["url_hash"] for a in targets})))
+
+            for article in targets:
+                previous = known.get(article["url_hash"])
+                if previous is None:
+                    status = "new"
+                elif previous != article["content_hash"]:
+                    status = "changed"
+                else:
+                    status = "unchanged"
+                # 同じ実行で同じURLが複数回現れた場合、2件目以降は直前の内容と比較する
+                known[article["url_hash"]] = article["content_hash"]
+                article["article_status"] = status
+                counts[status] += 1
+
+            conn.executemany(self.UPSERT_ARTICLE_SQL, [
+                (
+                    article["url_hash"], article["url"], article.get("title", ""), article.get("summary", ""),
+                    article.get("company_id"), article.get("published_at") or None,
+                    article["content_hash"], seen, seen
+                )
+                for article in targets
+            ])
+            conn.executemany(self.UPSERT_SOURCE_SQL, [
+                (article["url_hash"], article.get("source_type", "unknown"),
+                 article.get("source_url") or article["url"], seen, seen)
+                for article in targets
+            ])
+
+        print(f"🗃️ 記事ストア更新: 新規 {counts['new']}件, 更新 {counts['changed']}件, 変更なし {counts['unchanged']}件")
+        return counts
+
+    def split_for_analysis(self, articles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        分析が必要な記事と、保存済みの分析結果を再利用できる記事に分ける
+
+        内容が変わっていない記事には保存済みの分析結果（ai_score, summary_jp）を反映する。
+
+        Args:
+            articles (List[Dict]): upsert_articles() 済みの記事
+
+        Returns:
+            Tuple[List[Dict], List[Dict]]: (分析が必要な記事, 分析結果を反映した記事)
+        """
+        keys = list({article["url_hash"] for article in articles if article.get("url_hash")})
+        with self.store.read() as conn:
+            stored = dict(self._fetch_in(conn, self.SELECT_ANALYSES_SQL, keys))
+
+        needed, reused = [], []
+        for article in articles:
+            analysis = stored.get(article.get("url_hash"))
+            if analysis is None:
+                needed.append(article)
+            else:
+                article.update(json.loads(analysis))
+                reused.append(article)
+        return needed, reused
+
+    def save_analyses(self, articles: List[Dict[str, Any]]) -> int:
+        """
+        記事の分析結果を保存（保存時の内容ハッシュと紐付け、内容が変わったら再分析対象になる）
+
+        Args:
+            articles (List[Dict]): 分析済みの記事
+
+        Returns:
+            int: 保存した件数
+        """
+        analyzed_at = datetime.now().isoformat()
+        rows = []
+        for article in articles:
+            if not article.get("url_hash"):
+                continue
+            analysis = {key: article[key] for key in ANALYSIS_KEYS if key in article}
+            if analysis:
+                rows.append((json.dumps(analysis, ensure_ascii=False), article["content_hash"],
+                             analyzed_at, article["url_hash"]))
+
+        if rows:
+            with self.store.write() as conn:
+                conn.executemany(self.UPDATE_ANALYSIS_SQL, rows)
+        return len(rows)
+
+    def get_sources(self, url: str) -> List[Dict[str, str]]:
+        """
+        記事を見つけた収集元の履歴
+
+        Args:
+            url (str): 記事URL
+
+        Returns:
+            List[Dict]: 収集元ごとの種類・URL・初回/最終確認日時
+        """
+        with self.store.read() as conn:
+            rows = conn.execute(self.SELECT_SOURCES_SQL, (url_hash(url),)).fetchall()
+        return [
+            {"source_type": row[0], "source_url": row[1], "first_seen": row[2], "last_seen": row[3]}
+            for row in rows
+        ]
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        ストアの状態を取得
+
+        Returns:
+            Dict: 記事数・分析済み件数・最終確認日時
+        """
+        with self.store.read() as conn:
+            total, analyzed, last_seen = conn.execute(self.STATS_SQL).fetchone()
+        return {"articles": total, "analyzed": analyzed, "last_seen": last_seen, "database_path": self.db_path}
+
+
+_article_stores: Dict[str, ArticleStore] = {}
+_article_stores_lock = threading.Lock()
+
+
+def get_article_store(db_path: str = DEFAULT_ARTICLE_DB) -> ArticleStore:
+    """
+    プロセス内で共有する記事ストアを取得（マイグレーションは初回のみ）
+
+    Args:
+        db_path (str): データベースファイルのパス
+
+    Returns:
+        ArticleStore: 共有ストア
+    """
+    with _article_stores_lock:
+        store = _article_stores.get(db_path)
+        if store is None:
+            store = ArticleStore(db_path)
+            _article_stores[db_path] = store
+        return store
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非同期スクレイピングエンジン
+
+ブログ・ニュース一覧ページと記事ページをaiohttpで並行取得します。
+
+- ドメインごとのトークンバケットでリクエスト間隔を制御（固定のsleepは使わない）
+- robots.txt をオリジンごとにキャッシュし、許可されていないURLは取得しない
+- HTMLはlxmlがあればlxmlで解析（無ければ html.parser）
+- 複数のCSSセレクタを1回の走査でまとめて評価（SelectorSet）
+
+トークンバケットとrobots.txtのキャッシュはプロセス内で共有し、
+同期版の取得処理（CompanyNewsCollector）からも同じ間隔制御・robots.txt判定を使う。
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from bs4 import BeautifulSoup
+import soupsieve
+
+from instrumentation import span
+
+# aiohttpのインポート（フォールバック対応）
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# lxmlのインポート（フォールバック対応）
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+HTML_PARSER = "lxml" if LXML_AVAILABLE else "html.parser"
+
+DEFAULT_SCRAPER_SETTINGS = {
+    "rate_per_domain": 1.0,   # ドメインごとの平均リクエスト数（回/秒）
+    "burst": 2,               # 連続して送れるリクエスト数
+    "max_connections": 16,
+    "robots_ttl": 3600,       # robots.txt のキャッシュ期間（秒）
+    "respect_robots": True
+}
+
+
+def parse_html(content: Any) -> BeautifulSoup:
+    """
+    HTMLを解析（lxmlがあればlxml）
+
+    Args:
+        content: HTML（bytes または str）
+
+    Returns:
+        BeautifulSoup: 解析結果
+    """
+    return BeautifulSoup(content, HTML_PARSER)
+
+
+def run_coroutine(coro: Awaitable) -> Any:
+    """
+    同期コードからコルーチンを実行（イベントループ実行中の場合は別スレッドで実行）
+
+    Args:
+        coro: コルーチン
+
+    Returns:
+        Any: コルーチンの戻り値
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+class SelectorSet:
+    """
+    優先順位付きCSSセレクタ群（結合したセレクタで1回だけ走査し、各セレクタに振り分ける）
+    """
+
+    def __init__(self, selectors: List[str]):
+        """
+        初期化
+
+        Args:
+            selectors (List[str]): 優先順のCSSセレクタ
+        """
+        self.selectors = selectors
+        self.compiled = [soupsieve.compile(selector) for selector in selectors]
+        self.combined = soupsieve.compile(", ".join(selectors))
+
+    def first_nonempty(self, tag) -> List[Any]:
+        """
+        最初に一致したセレクタの全要素（従来の「順に試してヒットしたら終了」と同じ結果）
+
+        Args:
+            tag: 検索対象の要素
+
+        Returns:
+            List: 一致した要素（文書順）
+        """
+        candidates = self.combined.select(tag)
+        for compiled in self.compiled:
+            matched = [element for element in candidates if compiled.match(element)]
+            if matched:
+                return matched
+        return []
+
+    def first_each(self, tag) -> List[Any]:
+        """
+        各セレクタの最初の一致要素を優先順に並べたもの（select_one を順に呼ぶのと同じ結果）
+
+        Args:
+            tag: 検索対象の要素
+
+        Returns:
+            List: 一致した要素（セレクタの優先順、一致なしのセレクタは含まない）
+        """
+        candidates = self.combined.select(tag)
+        firsts = []
+        for compiled in self.compiled:
+            for element in candidates:
+                if compiled.match(element):
+                    firsts.append(element)
+                    break
+        return firsts
+
+
+class TokenBucket:
+    """
+    トークンバケット（平均 rate 回/秒、最大 capacity 回まで連続で許可）
+
+    同期・非同期のどちらからも使えるよう、待ち時間の予約だけをロック内で行う。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初期化
+
+        Args:
+            rate (float): トークンの補充速度（回/秒）
+            capacity (float): バケットの容量
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        トークンを1つ予約
+
+        Returns:
+            float: トークンが使えるようになるまでの待ち時間（秒）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire_sync(self) -> None:
+        """トークンを取得（同期、必要な分だけ待つ）"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self) -> None:
+        """トークンを取得（非同期、必要な分だけ待つ）"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_robots: Dict[str, Tuple[RobotFileParser, float]] = {}
+_shared_lock = threading.Lock()
+
+
+def domain_bucket(url: str, rate: float = DEFAULT_SCRAPER_SETTINGS["rate_per_domain"],
+                  burst: float = DEFAULT_SCRAPER_SETTINGS["burst"]) -> TokenBucket:
+    """
+    URLのドメインのトークンバケットを取得（プロセス内で共有）
+
+    Args:
+        url (str): 取得するURL
+        rate (float): 初回作成時の補充速度
+        burst (float): 初回作成時の容量
+
+    Returns:
+        TokenBucket: ドメインのトークンバケット
+    """
+    domain = urlsplit(url).netloc.lower()
+    with _shared_lock:
+        bucket = _buckets.get(domain)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            _buckets[domain] = bucket
+        return bucket
+
+
+def _cached_robots(origin: str, ttl: float) -> Optional[RobotFileParser]:
+    """キャッシュ期間内の robots.txt（無ければNone）"""
+    with _shared_lock:
+        cached = _robots.get(origin)
+    if cached and time.time() - cached[1] < ttl:
+        return cached[0]
+    return None
+
+
+def _store_robots(origin: str, status: Optional[int], text: str = "") -> RobotFileParser:
+    """
+    robots.txt の取得結果から判定器を作成してキャッシュ
+
+    Args:
+        origin (str): オリジン（scheme://host）
+        status (int): HTTPステータス（取得できなかった場合はNone）
+        text (str): robots.txt の本文
+
+    Returns:
+        RobotFileParser: 判定器
+    """
+    parser = RobotFileParser(origin + "/robots.txt")
+    if status in (401, 403):
+        parser.disallow_all = True
+    elif status is None or status >= 400:
+        # 取得できない場合は制限なしとして扱う（urllib.robotparser と同じ）
+        parser.allow_all = True
+    else:
+        parser.parse(text.splitlines())
+
+    with _shared_lock:
+        _robots[origin] = (parser, time.time())
+    return parser
+
+
+def robots_allowed(url: str, user_agent: str, session, timeout: float = 15,
+                   settings: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    robots.txt で取得が許可されているか（同期版、AsyncScraper とキャッシュを共有）
+
+    Args:
+        url (str): 取得するURL
+        user_agent (str): User-Agent
+        session: robots.txt の取得に使う requests.Session
+        timeout (float): タイムアウト（秒）
+        settings (Dict): respect_robots・robots_ttl 等の設定
+
+    Returns:
+        bool: 許可されている場合True
+    """
+    settings = dict(DEFAULT_SCRAPER_SETTINGS, **(settings or {}))
+    if not settings["respect_robots"]:
+        return True
+
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    parser = _cached_robots(origin, settings["robots_ttl"])
+    if parser is None:
+        try:
+            domain_bucket(url, settings["rate_per_domain"], settings["burst"]).acquire_sync()
+            response = session.get(origin + "/robots.txt", timeout=timeout)
+            parser = _store_robots(origin, response.status_code, response.text)
+        except Exception:
+            parser = _store_robots(origin, None)
+    return parser.can_fetch(user_agent, url)
+
+
+class AsyncScraper:
+    """
+    aiohttpによる並行取得（ドメインごとの間隔制御・robots.txt対応）
+    """
+
+    def __init__(self, user_agent: str, timeout: float = 15, settings: Optional[Dict[str, Any]] = None):
+        """
+        初期化
+
+        Args:
+            user_agent (str): User-Agent（robots.txt の判定にも使用）
+            timeout (float): 1リクエストのタイムアウト（秒）
+            settings (Dict): 間隔制御・接続数の設定
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("AsyncScraper を使うには aiohttp が必要です")
+
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.settings = dict(DEFAULT_SCRAPER_SETTINGS)
+        self.settings.update(settings or {})
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"fetched": 0, "failed": 0, "disallowed": 0}
+
+    async def __aenter__(self) -> "AsyncScraper":
+        self.session = aiohttp.ClientSession(
+            headers={
+                'User-Agent': self.user_agent,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5'
+            },
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.settings["max_connections"])
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        """URLのドメインのトークンバケット"""
+        return domain_bucket(url, self.settings["rate_per_domain"], self.settings["burst"])
+
+    async def _robots_for(self, url: str) -> RobotFileParser:
+        """オリジンの robots.txt を取得（キャッシュ期間内は再取得しない）"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+
+        lock = self._robots_locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            cached = _cached_robots(origin, self.settings["robots_ttl"])
+            if cached:
+                return cached
+
+            try:
+                await self._bucket(url).acquire()
+                async with self.session.get(origin + "/robots.txt") as response:
+                    text = await response.text(errors="replace") if response.status < 400 else ""
+                    return _store_robots(origin, response.status, text)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return _store_robots(origin, None)
+
+    async def allowed(self, url: str) -> bool:
+        """robots.txt で取得が許可されているか"""
+        if not self.settings["respect_robots"]:
+            return True
+        parser = await self._robots_for(url)
+        return parser.can_fetch(self.user_agent, url)
+
+    async def fetch(self, url: str) -> Optional[bytes]:
+        """
+        ページを取得
+
+        Args:
+            url (str): URL
+
+        Returns:
+            Optional[bytes]: 本文（robots.txtで不許可・取得失敗の場合はNone）
+        """
+        if not await self.allowed(url):
+            self.stats["disallowed"] += 1
+            return None
+
+        await self._bucket(url).acquire()
+        with span("http.get", "http", url=url) as current:
+            try:
+                async with self.session.get(url) as response:
+                    current.set(status=response.status)
+                    response.raise_for_status()
+                    content = await response.read()
+                current.set(bytes=len(content))
+                self.stats["fetched"] += 1
+                return content
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                current.status = "error"
+                current.error = f"{type(e).__name__}: {e}"
+                self.stats["failed"] += 1
+                print(f"    ⚠️ 取得失敗: {url} - {e}")
+                return None
+
+    async def fetch_many(self, urls: List[str]) -> List[Optional[bytes]]:
+        """
+        複数のページを並行取得（ドメインごとの間隔制御は fetch() 内で行う）
+
+        Args:
+            urls (List[str]): URLのリスト
+
+        Returns:
+            List[Optional[bytes]]: URLと同じ順の本文
+        """
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
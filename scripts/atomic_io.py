@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ファイルの原子的な書き込み
+
+同じディレクトリの一時ファイルに書いてから os.replace で置き換えるため、
+読み手（Webサーバー・キャッシュの読み込み等）が書き込み途中のファイルを読むことはない。
+書き込みに失敗した場合は一時ファイルを削除し、元のファイルはそのまま残る。
+
+- write_atomic: 文字列・バイト列をそのまま書き込む
+- open_atomic: ファイルオブジェクトに少しずつ書き込む（ストリーミング出力・np.savez等）
+- atomic_path: 一時ファイルのパスに書き込む（pyarrow・shutil.copyfile等、パスを受け取るAPI用）
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Union
+
+# 一時ファイルの拡張子（FileCacheのスイーパーはこの拡張子の古いファイルを削除する）
+TEMP_SUFFIX = ".tmp"
+# 置き換え後のファイルのパーミッション
+DEFAULT_FILE_MODE = 0o644
+
+
+@contextmanager
+def atomic_path(path: str, file_mode: int = DEFAULT_FILE_MODE) -> Iterator[str]:
+    """
+    一時ファイルのパスを渡し、ブロックが正常に終わったら path に置き換える
+
+    Args:
+        path (str): 出力先
+        file_mode (int): 置き換え後のファイルのパーミッション
+
+    Yields:
+        str: 書き込み先の一時ファイルのパス（作成済みの空ファイル）
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=TEMP_SUFFIX)
+    os.close(fd)
+    try:
+        yield tmp_path
+        # mkstempは0600で作成するため、通常のファイルと同じく他ユーザーから読めるようにする
+        os.chmod(tmp_path, file_mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def open_atomic(path: str, mode: str = "w", encoding: Optional[str] = "utf-8",
+                newline: Optional[str] = None) -> Iterator[IO]:
+    """
+    原子的に置き換えるファイルを書き込み用に開く
+
+    Args:
+        path (str): 出力先
+        mode (str): "w"（テキスト）または "wb"（バイナリ）
+        encoding (str): テキストの文字コード（バイナリでは無視）
+        newline (str): テキストの改行の扱い（open() と同じ。バイナリでは無視）
+
+    Yields:
+        IO: 一時ファイルのファイルオブジェクト
+    """
+    if mode not in ("w", "wb"):
+        raise ValueError(f"未対応のモードです: {mode}")
+    with atomic_path(path) as tmp_path:
+        if mode == "wb":
+            with open(tmp_path, "wb") as f:
+                yield f
+        else:
+            with open(tmp_path, "w", encoding=encoding, newline=newline) as f:
+                yield f
+
+
+def write_atomic(path: str, content: Union[str, bytes]) -> None:
+    """
+    テキストまたはバイト列を原子的に書き込む
+
+    Args:
+        path (str): 出力先
+        content (Union[str, bytes]): 書き込む内容（strはUTF-8で書き込む）
+    """
+    with open_atomic(path, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ファイルキャッシュ
+
+キーごとに1ファイルで値を保存する、サイズ上限付きのキャッシュです。
+
+- TTLはtimedeltaで計算（日付をまたいでも正しく期限切れになる）
+- 合計サイズが上限を超えたら最終アクセスが古い順に削除（LRU）
+- バックグラウンドのスイーパーが期限切れのファイルを定期的に削除
+- 一時ファイルに書いてから置換するため、書き込み途中のファイルを読むことがない
+- 値はJSON（orjsonがあれば使用）で保存し、pickleのような任意コード実行の危険がない
+
+ファイルの1行目はヘッダー（キー・有効期限）、2行目以降が値です。
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from atomic_io import TEMP_SUFFIX, write_atomic
+
+# orjsonのインポート（フォールバック対応）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = timedelta(hours=24)
+DEFAULT_SWEEP_INTERVAL = 600
+# 書き込み途中でプロセスが落ちて残った一時ファイルを削除するまでの時間（秒）
+STALE_TEMP_SECONDS = 3600
+
+CACHE_SUFFIX = ".json"
+
+
+def _json_default(value: Any) -> Any:
+    """標準jsonで扱えない値の変換（orjsonと同じ表現にそろえる）"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    値をJSONバイト列に変換
+
+    Args:
+        value (Any): JSONで表現できる値（datetime・dataclassは文字列・辞書に変換）
+
+    Returns:
+        bytes: UTF-8のJSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """JSONバイト列を値に変換"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FileCache:
+    """
+    TTL・サイズ上限付きのファイルキャッシュ
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 default_ttl: timedelta = DEFAULT_TTL, sweep_interval: float = DEFAULT_SWEEP_INTERVAL):
+        """
+        初期化
+
+        Args:
+            cache_dir (str): キャッシュディレクトリ
+            max_bytes (int): キャッシュファイルの合計サイズ上限
+            default_ttl (timedelta): set() でTTLを省略した場合の有効期間
+            sweep_interval (float): スイーパーの実行間隔（秒、0以下で起動しない）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+
+        # キー -> (ファイルパス, サイズ, 有効期限のUNIX時刻)。末尾ほど最近アクセスされたもの
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._stop_event = threading.Event()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path_for(self, key: str) -> str:
+        """キーに対応するファイルパス（キーをハッシュしてファイル名に使える形にする）"""
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + CACHE_SUFFIX)
+
+    def _load_index(self) -> None:
+        """既存のキャッシュファイルからインデックスを作成（更新日時の古い順）"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".pkl"):
+                # 旧形式（pickle）のキャッシュは読まないため削除
+                self._remove_file(path)
+                continue
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    header = json.loads(f.readline())
+                stat = os.stat(path)
+                found.append((stat.st_mtime, header["key"], path, stat.st_size, header["expires_at"]))
+            except (OSError, ValueError, KeyError):
+                self._remove_file(path)
+
+        with self._lock:
+            for _, key, path, size, expires_at in sorted(found):
+                self._entries[key] = (path, size, expires_at)
+                self._total_bytes += size
+
+        self.sweep()
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        """ファイルを削除（既に無い場合は無視）"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _drop(self, key: str) -> None:
+        """エントリを削除（呼び出し側でロック取得済み）"""
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[1]
+            self._remove_file(entry[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[timedelta] = None) -> None:
+        """
+        値を保存
+
+        Args:
+            key (str): キー
+            value (Any): JSONで表現できる値
+            ttl (timedelta): 有効期間（省略時は default_ttl）
+        """
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl).total_seconds()
+        header = json.dumps({"key": key, "expires_at": expires_at}, ensure_ascii=False).encode("utf-8")
+        payload = header + b"\n" + dumps(value)
+
+        path = self._path_for(key)
+        write_atomic(path, payload)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._total_bytes -= previous[1]
+            self._entries[key] = (path, len(payload), expires_at)
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        値を取得
+
+        Args:
+            key (str): キー
+
+        Returns:
+            Optional[Any]: 値（未保存・期限切れの場合はNone）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            path = entry[0]
+
+        try:
+            with open(path, "rb") as f:
+                f.readline()
+                return loads(f.read())
+        except (OSError, ValueError):
+            # 他プロセスによる削除や破損は未保存として扱う
+            with self._lock:
+                self._drop(key)
+            return None
+
+    def delete(self, key: str) -> None:
+        """値を削除"""
+        with self._lock:
+            self._drop(key)
+
+    def _evict(self) -> None:
+        """合計サイズが上限以下になるまで最終アクセスが古いものから削除（ロック取得済み）"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+
+    def sweep(self) -> int:
+        """
+        期限切れのエントリを削除し、サイズ上限を適用（残った古い一時ファイルも削除）
+
+        Returns:
+            int: 削除した期限切れエントリ数
+        """
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._drop(key)
+            self._evict()
+        self._remove_stale_temp_files(now)
+        return len(expired)
+
+    def _remove_stale_temp_files(self, now: float) -> None:
+        """
+        書き込み途中で残った一時ファイルを削除
+
+        他プロセスが書き込み中の可能性があるため、STALE_TEMP_SECONDS より古いものだけを対象にする。
+        """
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(TEMP_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.stat(path).st_mtime > STALE_TEMP_SECONDS:
+                    self._remove_file(path)
+            except FileNotFoundError:
+                pass
+
+    def start_sweeper(self) -> None:
+        """バックグラウンドのスイーパーを開始"""
+        if self.sweep_interval <= 0 or self._sweeper:
+            return
+
+        def loop():
+            while not self._stop_event.wait(self.sweep_interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"⚠️ キャッシュ掃除エラー: {e}")
+
+        self._sweeper = threading.Thread(target=loop, name="file-cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """バックグラウンドのスイーパーを停止"""
+        self._stop_event.set()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        キャッシュの状態を取得
+
+        Returns:
+            Dict: エントリ数・合計サイズ・上限・シリアライザ
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "serializer": "orjson" if ORJSON_AVAILABLE else "json"
+            }
+
+
+_caches: Dict[str, FileCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(cache_dir: str, **kwargs) -> FileCache:
+    """
+    キャッシュディレクトリごとに共有するFileCacheを取得（スイーパーも1つだけ起動）
+
+    Args:
+        cache_dir (str): キャッシュディレクトリ
+
+    Returns:
+        FileCache: 共有キャッシュ
+    """
+    key = os.path.abspath(cache_dir)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = FileCache(cache_dir, **kwargs)
+            cache.start_sweeper()
+            _caches[key] = cache
+        return cache
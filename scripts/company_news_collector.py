@@ -9,14 +9,48 @@ import requests
 import feedparser
 import time
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from bs4 import BeautifulSoup
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 import re
 import os
 import sys
 
+from article_embeddings import ArticleEmbedder, article_text
+from article_store import get_article_store
+from async_scraper import (AIOHTTP_AVAILABLE, AsyncScraper, SelectorSet, domain_bucket,
+                           parse_html, robots_allowed, run_coroutine)
+from instrumentation import instrument_session, span
+
+# 一覧ページの記事要素・日付要素のセレクタ（優先順）
+ARTICLE_SELECTORS = SelectorSet([
+    'article',
+    '.post',
+    '.blog-post',
+    '.entry',
+    '.news-item',
+    '.article-item',
+    '[class*="post"]',
+    '[class*="article"]'
+])
+DATE_SELECTORS = SelectorSet([
+    'time',
+    '.date',
+    '.published',
+    '.post-date',
+    '.article-date',
+    '[datetime]',
+    '[class*="date"]',
+    '[class*="time"]'
+])
+META_DATE_SELECTORS = SelectorSet([
+    'meta[property="article:published_time"]',
+    'meta[name="publish-date"]',
+    'meta[name="date"]',
+    'meta[name="DC.date.issued"]',
+    'meta[itemprop="datePublished"]'
+])
+
 class CompanyNewsCollector:
     def __init__(self, config_path="config/target_companies.yaml", newsapi_key=None):
         """
@@ -33,10 +67,12 @@ class CompanyNewsCollector:
         self.delay_seconds = 2
         self.timeout_seconds = 15
         self.max_retries = 2
+        # 新しい順のフィードで、期間外のエントリがこの件数続いたら残りを解析しない
+        self.feed_cutoff_patience = 3
         self.user_agent = 'WeeklyBrief-NewsCollector/1.0'
         
-        # セッション設定
-        self.session = requests.Session()
+        # セッション設定（全リクエストを "http" スパンとして計測）
+        self.session = instrument_session(requests.Session())
         self.session.headers.update({
             'User-Agent': self.user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -49,6 +85,12 @@ class CompanyNewsCollector:
         self.last_newsapi_request = 0
         self.newsapi_min_interval = 1.5  # NewsAPIリクエスト間隔（秒）
         
+        # 記事埋め込み（意味的な重複除去・関連度スコア用）
+        self.embedder = ArticleEmbedder.from_settings()
+        
+        # 収集記事の永続化（再収集時に新規・更新記事だけを後段で処理する）
+        self.article_store = get_article_store()
+        
     def load_company_config(self, config_path: str) -> Dict:
         """企業設定ファイルを読み込み（統合版）"""
         try:
@@ -102,6 +144,9 @@ class CompanyNewsCollector:
                 continue
         
         print(f"\n🎉 全企業収集完了: 合計{len(all_news)}件")
+        
+        # 記事ストアに保存（各記事に article_status を付与）
+        self.article_store.upsert_articles(all_news)
         return all_news
     
     def collect_company_news(self, company_id: str, company_info: Dict, days_back: int) -> List[Dict[str, Any]]:
@@ -162,7 +207,7 @@ class CompanyNewsCollector:
         Returns:
             記事リスト
         """
-        items = []
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days_back)
         
         for attempt in range(self.max_retries):
             try:
@@ -171,29 +216,28 @@ class CompanyNewsCollector:
                 response = self.session.get(rss_url, timeout=self.timeout_seconds)
                 response.raise_for_status()
                 
-                feed = feedparser.parse(response.content)
-                
-                if feed.entries:
-                    for entry in feed.entries:
-                        # 記事情報を構造化
-                        item = {
-                            'title': entry.get('title', ''),
-                            'url': entry.get('link', ''),
-                            'published_at': self.parse_date(entry),
-                            'summary': entry.get('summary', ''),
-                            'company_id': company_id,
-                            'source_type': 'rss',
-                            'source_url': rss_url,
-                            'content': ''  # パフォーマンス改善のため無効化
-                        }
-                        
-                        items.append(item)
+                with span("feed.parse", "parse", url=rss_url, bytes=len(response.content)) as parsed:
+                    entries, scanned, stopped_early = self.parse_recent_feed_entries(response.content, cutoff)
+                    parsed.set(entries=len(entries), scanned=scanned)
                 
-                # 統一された日付フィルタリングを適用
-                filtered_items = self.filter_by_date_range(items, days_back)
+                items = [
+                    {
+                        'title': entry['title'],
+                        'url': entry['link'],
+                        'published_at': (entry['published'] or datetime.now()).isoformat(),
+                        'summary': entry['summary'],
+                        'company_id': company_id,
+                        'source_type': 'rss',
+                        'source_url': rss_url,
+                        'content': ''  # パフォーマンス改善のため無効化
+                    }
+                    for entry in entries
+                ]
                 
-                print(f"    ✅ RSS解析完了: {len(filtered_items)}件（フィルタ後）")
-                return filtered_items
+                excluded = scanned - len(items)
+                print(f"    ✅ RSS解析完了: {len(items)}件（期間外 {excluded}件除外"
+                      f"{'、以降の古い記事は解析を省略' if stopped_early else ''}）")
+                return items
                 
             except Exception as e:
                 print(f"    ❌ RSS取得エラー (試行 {attempt + 1}/{self.max_retries}): {e}")
@@ -203,108 +247,189 @@ class CompanyNewsCollector:
         
         return []
     
+    def parse_recent_feed_entries(self, content: bytes, cutoff: datetime) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        feedparserでフィードを解析し、期間内のエントリを取得
+        
+        日付はfeedparserが解析済みの published_parsed（UTC）をそのまま使う。
+        ここまでの日付が新しい順に並んでいる場合に限り、期間外のエントリが
+        feed_cutoff_patience 件続いた時点で残りのエントリの処理を打ち切る
+        （古い順・順不同のフィードは最後まで確認する）。
+        
+        Args:
+            content (bytes): フィードの内容
+            cutoff (datetime): これより古いエントリを除外（UTCのnaive datetime）
+        
+        Returns:
+            Tuple[List[Dict], int, bool]: (エントリ, 確認したエントリ数, 打ち切ったか)
+        """
+        feed = feedparser.parse(content)
+        entries = []
+        consecutive_old = 0
+        newest_first = True
+        previous = None
+        
+        for scanned, entry in enumerate(feed.entries, 1):
+            parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+            published = datetime(*parsed[:6]) if parsed else None
+            if published is not None:
+                if previous is not None and published > previous:
+                    newest_first = False
+                previous = published
+            
+            if published is not None and published < cutoff:
+                consecutive_old += 1
+                if newest_first and consecutive_old >= self.feed_cutoff_patience:
+                    return entries, scanned, True
+                continue
+            consecutive_old = 0
+            
+            # Atomで summary が無い場合は content（xhtml等はfeedparserが整形済み）を使う
+            contents = entry.get('content') or [{}]
+            entries.append({
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'summary': entry.get('summary') or contents[0].get('value', ''),
+                # 日付が不明な場合は含める（重要ニュース漏れ防止）
+                'published': published
+            })
+        
+        return entries, len(feed.entries), False
+    
     def collect_web_content(self, company_id: str, company_info: Dict, days_back: int) -> List[Dict[str, Any]]:
-        """Web scraping でニュース収集"""
+        """Web scraping でニュース収集（aiohttpがあれば一覧・記事ページを並行取得）"""
+        page_urls = [company_info[key] for key in ('blog_url', 'news_url', 'research_url') if company_info.get(key)]
+        if not page_urls:
+            return []
+        
+        if AIOHTTP_AVAILABLE:
+            return run_coroutine(self.scrape_pages_async(page_urls, company_id, days_back))
+        
         items = []
+        for page_url in page_urls:
+            items.extend(self.scrape_blog_page(page_url, company_id, days_back))
+        return items
+    
+    async def scrape_pages_async(self, page_urls: List[str], company_id: str, days_back: int) -> List[Dict[str, Any]]:
+        """
+        一覧ページを並行取得し、一覧から日付が分からない記事は記事ページのメタデータから日付を取得
         
-        # ブログページ
-        if company_info.get('blog_url'):
-            blog_items = self.scrape_blog_page(company_info['blog_url'], company_id, days_back)
-            items.extend(blog_items)
+        Args:
+            page_urls: ブログ・ニュース・研究ページのURL
+            company_id: 企業ID
+            days_back: 過去何日分か
+            
+        Returns:
+            記事リスト
+        """
+        async with AsyncScraper(self.user_agent, timeout=self.timeout_seconds) as scraper:
+            for page_url in page_urls:
+                print(f"  🕷️  ブログスクレイピング: {page_url}")
+            pages = await scraper.fetch_many(page_urls)
+            
+            items = []
+            undated = []
+            for page_url, content in zip(page_urls, pages):
+                if content is None:
+                    continue
+                for item, dated in self.extract_listing_items(parse_html(content), page_url, company_id):
+                    items.append(item)
+                    if not dated:
+                        undated.append(item)
+            
+            # 記事ページの取得はドメインごとのトークンバケットで間隔を空けつつ並行実行
+            if undated:
+                article_pages = await scraper.fetch_many([item['url'] for item in undated])
+                for item, content in zip(undated, article_pages):
+                    page_date = self.extract_date_from_html(parse_html(content)) if content else None
+                    # 日付が分からない場合は現在時刻（重要ニュース漏れ防止のため期間内として扱う）
+                    item['published_at'] = page_date or datetime.now().isoformat()
+        
+        filtered_items = self.filter_by_date_range(items, days_back)
+        print(f"    ✅ ブログスクレイピング完了: {len(filtered_items)}件（フィルタ後、記事ページ確認 {len(undated)}件、"
+              f"取得 {scraper.stats['fetched']} / 失敗 {scraper.stats['failed']} / robots不許可 {scraper.stats['disallowed']}）")
+        return filtered_items
+    
+    def extract_listing_items(self, soup, page_url: str, company_id: str) -> List[Tuple[Dict[str, Any], bool]]:
+        """
+        一覧ページから記事を抽出
         
-        # ニュースページ
-        if company_info.get('news_url'):
-            news_items = self.scrape_news_page(company_info['news_url'], company_id, days_back)
-            items.extend(news_items)
+        Args:
+            soup: 一覧ページの解析結果
+            page_url: 一覧ページのURL
+            company_id: 企業ID
+            
+        Returns:
+            (記事, 一覧・URLから日付が分かったか) のリスト
+        """
+        articles = ARTICLE_SELECTORS.first_nonempty(soup)
+        if not articles:
+            # フォールバック: リンクを探す
+            articles = soup.find_all('a', href=True)
         
-        # 研究ページ
-        if company_info.get('research_url'):
-            research_items = self.scrape_research_page(company_info['research_url'], company_id, days_back)
-            items.extend(research_items)
+        results = []
+        for article in articles[:10]:  # 処理件数を10件に制限（パフォーマンス改善）
+            try:
+                # タイトルとURLを抽出
+                if article.name == 'a':
+                    title = article.get_text(strip=True)
+                    url = article['href']
+                else:
+                    title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'a'])
+                    if not title_elem:
+                        continue
+                    title = title_elem.get_text(strip=True)
+                    
+                    url_elem = article.find('a', href=True)
+                    if not url_elem:
+                        continue
+                    url = url_elem['href']
+                
+                # 相対URLを絶対URLに変換
+                if url.startswith('/'):
+                    url = urljoin(page_url, url)
+                
+                # 外部リンクをスキップ
+                if not self.is_same_domain(url, page_url):
+                    continue
+                
+                # 記事の公開日を抽出（一覧の要素・URLから）
+                published_date = self.extract_listing_date(article, url)
+                
+                results.append(({
+                    'title': title,
+                    'url': url,
+                    'published_at': published_date or datetime.now().isoformat(),
+                    'summary': '',
+                    'company_id': company_id,
+                    'source_type': 'web_scraping',
+                    'source_url': page_url,
+                    'content': ''
+                }, published_date is not None))
+                
+            except Exception:
+                continue
         
-        return items
+        return results
     
     def scrape_blog_page(self, blog_url: str, company_id: str, days_back: int) -> List[Dict[str, Any]]:
-        """ブログページのスクレイピング（日付フィルタリング強化版）"""
+        """ブログページのスクレイピング（同期版、aiohttpが無い場合に使用）"""
         items = []
         
         try:
             print(f"  🕷️  ブログスクレイピング: {blog_url}")
             
+            # robots.txt の判定は非同期版と同じキャッシュを使う
+            if not robots_allowed(blog_url, self.user_agent, self.session, timeout=self.timeout_seconds):
+                print(f"    ⚠️ robots.txtで許可されていないためスキップ: {blog_url}")
+                return items
+            
+            domain_bucket(blog_url).acquire_sync()
             response = self.session.get(blog_url, timeout=self.timeout_seconds)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 一般的なブログ記事のセレクタを試行
-            article_selectors = [
-                'article',
-                '.post',
-                '.blog-post',
-                '.entry',
-                '.news-item',
-                '.article-item',
-                '[class*="post"]',
-                '[class*="article"]'
-            ]
-            
-            articles = []
-            for selector in article_selectors:
-                articles = soup.select(selector)
-                if articles:
-                    break
-            
-            if not articles:
-                # フォールバック: リンクを探す
-                articles = soup.find_all('a', href=True)
-            
-            cutoff_date = datetime.now() - timedelta(days=days_back)
-            valid_items = []
-            
-            for article in articles[:10]:  # 処理件数を10件に制限（パフォーマンス改善）
-                try:
-                    # タイトルとURLを抽出
-                    if article.name == 'a':
-                        title = article.get_text(strip=True)
-                        url = article['href']
-                    else:
-                        title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'a'])
-                        if not title_elem:
-                            continue
-                        title = title_elem.get_text(strip=True)
-                        
-                        url_elem = article.find('a', href=True)
-                        if not url_elem:
-                            continue
-                        url = url_elem['href']
-                    
-                    # 相対URLを絶対URLに変換
-                    if url.startswith('/'):
-                        url = urljoin(blog_url, url)
-                    
-                    # 外部リンクをスキップ
-                    if not self.is_same_domain(url, blog_url):
-                        continue
-                    
-                    # 記事の公開日を抽出（強化版）
-                    published_date = self.extract_article_date(article, url)
-                    
-                    # 記事情報を構造化
-                    item = {
-                        'title': title,
-                        'url': url,
-                        'published_at': published_date,
-                        'summary': '',
-                        'company_id': company_id,
-                        'source_type': 'web_scraping',
-                        'source_url': blog_url,
-                        'content': ''
-                    }
-                    
-                    valid_items.append(item)
-                    
-                except Exception as e:
-                    continue
+            soup = parse_html(response.content)
+            valid_items = [item for item, _ in self.extract_listing_items(soup, blog_url, company_id)]
             
             # 日付による事後フィルタリング
             items = self.filter_by_date_range(valid_items, days_back)
@@ -413,7 +538,7 @@ class CompanyNewsCollector:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = parse_html(response.content)
             
             # 一般的な記事本文のセレクタを試行
             content_selectors = [
@@ -444,6 +569,12 @@ class CompanyNewsCollector:
     
     def remove_duplicates(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """重複記事の除去"""
+        if self.embedder.available:
+            try:
+                return self.remove_duplicates_semantic(items)
+            except Exception as e:
+                print(f"⚠️ 埋め込みによる重複除去エラー（単語類似度で代替）: {e}")
+        
         seen_urls = set()
         seen_titles = set()
         unique_items = []
@@ -475,6 +606,32 @@ class CompanyNewsCollector:
         
         return unique_items
     
+    def remove_duplicates_semantic(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        埋め込みベクトルによる重複記事の除去（URL重複を除いた後、全件の類似度行列を1回で計算）
+        
+        Args:
+            items: 記事リスト
+        
+        Returns:
+            List[Dict]: 重複を除いた記事リスト
+        """
+        seen_urls = set()
+        url_unique = []
+        for item in items:
+            url = item.get('url', '')
+            if url and url in seen_urls:
+                continue
+            url_unique.append(item)
+            if url:
+                seen_urls.add(url)
+        
+        index = self.embedder.build_index(
+            [article_text(item.get('title', ''), item.get('summary', '')) for item in url_unique]
+        )
+        duplicate = index.duplicate_mask(self.embedder.dedup_threshold)
+        return [item for item, is_duplicate in zip(url_unique, duplicate) if not is_duplicate]
+    
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """テキストの類似度計算（簡易版）"""
         if not text1 or not text2:
@@ -501,65 +658,32 @@ class CompanyNewsCollector:
         except:
             return False
     
-    def parse_date(self, entry) -> str:
-        """RSS エントリから日付を解析"""
-        try:
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                return datetime(*entry.published_parsed[:6]).isoformat()
-            elif hasattr(entry, 'published'):
-                # 文字列の日付をパース
-                from dateutil import parser
-                return parser.parse(entry.published).isoformat()
-        except:
-            pass
+    def extract_listing_date(self, article_element, article_url: str) -> Optional[str]:
+        """
+        一覧ページの記事要素・URLから公開日を抽出
         
-        return datetime.now().isoformat()
-
-    def extract_article_date(self, article_element, article_url: str) -> str:
-        """記事から公開日を抽出（最適化版）"""
-        
-        # 手法1: 記事要素内から日付を探す
-        date_selectors = [
-            'time',
-            '.date',
-            '.published',
-            '.post-date',
-            '.article-date',
-            '[datetime]',
-            '[class*="date"]',
-            '[class*="time"]'
-        ]
-        
-        for selector in date_selectors:
-            date_elem = article_element.select_one(selector)
-            if date_elem:
-                # datetime属性を確認
-                if date_elem.has_attr('datetime'):
-                    try:
-                        from dateutil import parser
-                        parsed_date = parser.parse(date_elem['datetime'])
-                        return parsed_date.isoformat()
-                    except:
-                        pass
-                
-                # テキストから日付を抽出
-                date_text = date_elem.get_text(strip=True)
-                extracted_date = self.parse_date_text(date_text)
-                if extracted_date:
-                    return extracted_date
+        Returns:
+            ISO形式の日付（見つからない場合はNone）
+        """
+        # 手法1: 記事要素内から日付を探す（全セレクタを1回の走査で評価）
+        for date_elem in DATE_SELECTORS.first_each(article_element):
+            # datetime属性を確認
+            if date_elem.has_attr('datetime'):
+                try:
+                    from dateutil import parser
+                    parsed_date = parser.parse(date_elem['datetime'])
+                    return parsed_date.isoformat()
+                except Exception:
+                    pass
+            
+            # テキストから日付を抽出
+            date_text = date_elem.get_text(strip=True)
+            extracted_date = self.parse_date_text(date_text)
+            if extracted_date:
+                return extracted_date
         
         # 手法2: 記事URLから日付パターンを抽出
-        url_date = self.extract_date_from_url(article_url)
-        if url_date:
-            return url_date
-        
-        # 手法3は無効化（パフォーマンス改善のため）
-        # page_date = self.extract_date_from_article_page(article_url)
-        # if page_date:
-        #     return page_date
-        
-        # フォールバック: 現在時刻（重要ニュース漏れ防止のため期間内として扱う）
-        return datetime.now().isoformat()
+        return self.extract_date_from_url(article_url)
 
     def parse_date_text(self, date_text: str) -> Optional[str]:
         """テキストから日付を解析"""
@@ -628,54 +752,29 @@ class CompanyNewsCollector:
         
         return None
 
-    def extract_date_from_article_page(self, article_url: str) -> Optional[str]:
-        """記事ページから詳細な日付抽出"""
-        try:
-            # レート制限対策
-            time.sleep(1)
-            
-            response = self.session.get(article_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # メタデータから日付を抽出
-            meta_selectors = [
-                'meta[property="article:published_time"]',
-                'meta[name="publish-date"]',
-                'meta[name="date"]',
-                'meta[name="DC.date.issued"]',
-                'meta[itemprop="datePublished"]'
-            ]
-            
-            for selector in meta_selectors:
-                meta_elem = soup.select_one(selector)
-                if meta_elem:
-                    content = meta_elem.get('content') or meta_elem.get('datetime')
-                    if content:
-                        try:
-                            from dateutil import parser
-                            parsed_date = parser.parse(content)
-                            return parsed_date.isoformat()
-                        except:
-                            continue
-            
-            # JSON-LD 構造化データから抽出
-            scripts = soup.find_all('script', type='application/ld+json')
-            for script in scripts:
+    def extract_date_from_html(self, soup) -> Optional[str]:
+        """記事ページのメタデータ・JSON-LDから公開日を抽出"""
+        from dateutil import parser
+        
+        # メタデータから日付を抽出
+        for meta_elem in META_DATE_SELECTORS.first_each(soup):
+            content = meta_elem.get('content') or meta_elem.get('datetime')
+            if content:
                 try:
-                    json_data = json.loads(script.string)
-                    if isinstance(json_data, dict):
-                        date_published = json_data.get('datePublished')
-                        if date_published:
-                            from dateutil import parser
-                            parsed_date = parser.parse(date_published)
-                            return parsed_date.isoformat()
-                except:
+                    return parser.parse(content).isoformat()
+                except Exception:
                     continue
-                    
-        except Exception:
-            pass
+        
+        # JSON-LD 構造化データから抽出
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                json_data = json.loads(script.string)
+                if isinstance(json_data, dict):
+                    date_published = json_data.get('datePublished')
+                    if date_published:
+                        return parser.parse(date_published).isoformat()
+            except Exception:
+                continue
         
         return None
 
@@ -687,6 +786,7 @@ class CompanyNewsCollector:
         cutoff_date = datetime.now() - timedelta(days=days_back)
         filtered_items = []
         excluded_count = 0
+        error_count = 0
         
         for item in items:
             try:
@@ -696,10 +796,13 @@ class CompanyNewsCollector:
                     filtered_items.append(item)
                     continue
                 
-                # ISO形式の日付を解析
+                # ISO形式の日付を解析（標準形式でない場合のみdateutilを使う）
                 if isinstance(published_at, str):
-                    from dateutil import parser
-                    article_date = parser.parse(published_at.replace('Z', '+00:00'))
+                    try:
+                        article_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+                    except ValueError:
+                        from dateutil import parser
+                        article_date = parser.parse(published_at)
                     
                     # タイムゾーンを除去して比較
                     if article_date.tzinfo:
@@ -709,7 +812,6 @@ class CompanyNewsCollector:
                         filtered_items.append(item)
                     else:
                         excluded_count += 1
-                        print(f"    📅 期間外除外: {item['title'][:50]}... ({article_date.strftime('%Y-%m-%d')})")
                 else:
                     # 日付型の場合はそのまま比較
                     if published_at >= cutoff_date:
@@ -717,13 +819,14 @@ class CompanyNewsCollector:
                     else:
                         excluded_count += 1
                         
-            except Exception as e:
+            except Exception:
                 # 日付解析エラーの場合は含める（重要ニュース漏れ防止）
-                print(f"    ⚠️ 日付解析エラー（含める）: {item['title'][:30]}... - {e}")
+                error_count += 1
                 filtered_items.append(item)
         
-        if excluded_count > 0:
-            print(f"    📊 期間フィルタ結果: {len(filtered_items)}件採用、{excluded_count}件除外")
+        if excluded_count > 0 or error_count > 0:
+            print(f"    📊 期間フィルタ結果: {len(filtered_items)}件採用、{excluded_count}件除外"
+                  f"{f'、日付解析エラー {error_count}件（含める）' if error_count else ''}")
         
         return filtered_items
 
@@ -65,16 +65,65 @@ class DataCollector:
         """
         if not force_refresh and self.is_cache_valid():
             print("✅ キャッシュが有効です - データ収集をスキップ")
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.load_cached_data()
         
         print("🚀 データ収集を開始します...")
         
         # 1. ビジネスデータ収集
-        print("📊 ビジネスデータ処理中...")
-        business_data = self._get_processor().process_sales_data()
+        business_data = self._collect_business_data()
         
         # 2. 株価データ収集
+        stock_data = self._collect_stock_data()
+        
+        # 3. ニュースデータ収集
+        print("📰 ニュースデータ収集中...")
+        news_data = await self._collect_news_data()
+        
+        # 4. スケジュールデータ収集
+        print("📅 スケジュールデータ処理中...")
+        schedule_data = self._collect_schedule_data()
+        
+        return self.integrate_data(business_data, stock_data, news_data, schedule_data)
+    
+    def load_cached_data(self):
+        """保存済みの統合データを読み込み"""
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def integrate_data(self, business_data, stock_data, news_data, schedule_data):
+        """
+        各データを統合してファイルに保存
+        
+        Returns:
+            dict: 統合データ
+        """
+        integrated_data = {
+            "metadata": {
+                "generated_at": datetime.now().isoformat(),
+                "data_period": self._get_period_description(),
+                "version": "1.0"
+            },
+            "business_data": business_data,
+            "stock_data": stock_data,
+            "news_data": news_data,
+            "schedule_data": schedule_data
+        }
+        
+        # ファイルに保存
+        os.makedirs("data", exist_ok=True)
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(integrated_data, f, ensure_ascii=False, indent=2)
+        
+        print(f"💾 統合データを保存しました: {self.cache_file}")
+        return integrated_data
+    
+    def _collect_business_data(self):
+        """ビジネスデータ収集"""
+        print("📊 ビジネスデータ処理中...")
+        return self._get_processor().process_sales_data()
+    
+    def _collect_stock_data(self):
+        """株価データ収集"""
         print("📈 株価データ取得中...")
         stock_data = {}
         try:
@@ -97,8 +146,9 @@ class DataCollector:
                     # 当日のデータを取得（1分間隔で当日分）
                     hist = stock.history(period='1d', interval='1m')
                     if len(hist) >= 1:
-                        current_price = hist['Close'].iloc[-1]
-                        open_price = hist['Open'].iloc[0]  # 当日始値
+                        # numpyの数値はチェックポイントのJSONに書けないためfloatに変換
+                        current_price = float(hist['Close'].iloc[-1])
+                        open_price = float(hist['Open'].iloc[0])  # 当日始値
                         change = current_price - open_price
                         change_percent = (change / open_price) * 100
                         
@@ -120,34 +170,7 @@ class DataCollector:
             print("   ⚠️ yfinance未インストール - 模擬データを使用")
             stock_data = self._get_mock_stock_data()
         
-        # 3. ニュースデータ収集
-        print("📰 ニュースデータ収集中...")
-        news_data = await self._collect_news_data()
-        
-        # 4. スケジュールデータ収集
-        print("📅 スケジュールデータ処理中...")
-        schedule_data = self._collect_schedule_data()
-        
-        # 統合データ作成
-        integrated_data = {
-            "metadata": {
-                "generated_at": datetime.now().isoformat(),
-                "data_period": self._get_period_description(),
-                "version": "1.0"
-            },
-            "business_data": business_data,
-            "stock_data": stock_data,
-            "news_data": news_data,
-            "schedule_data": schedule_data
-        }
-        
-        # ファイルに保存
-        os.makedirs("data", exist_ok=True)
-        with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(integrated_data, f, ensure_ascii=False, indent=2)
-        
-        print(f"💾 統合データを保存しました: {self.cache_file}")
-        return integrated_data
+        return stock_data
     
     async def _collect_news_data(self):
         """ニュースデータ収集"""
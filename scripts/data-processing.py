@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from news_summarizer import NewsSummarizer
 from local_llm_summarizer import LocalLLMSummarizer
+from report_view import format_japanese_currency
 import yfinance as yf
 
 class WeeklyReportProcessor:
@@ -436,7 +437,7 @@ class WeeklyReportProcessor:
     
     def format_japanese_currency(self, amount: int, detailed: bool = False) -> str:
         """
-        日本円を日本式表記（億円、万円）でフォーマット
+        日本円を日本式表記（億円、万円）でフォーマット（report_view.format_japanese_currency に委譲）
         
         Args:
             amount (int): 金額（円）
@@ -445,30 +446,7 @@ class WeeklyReportProcessor:
         Returns:
             str: フォーマットされた金額文字列
         """
-        if amount >= 100000000:  # 1億円以上
-            oku = amount / 100000000
-            if detailed:
-                # 詳細表示：37億7,244万円のような形式
-                oku_part = int(amount // 100000000)
-                man_part = int((amount % 100000000) // 10000)
-                if man_part > 0:
-                    return f"{oku_part}億{man_part:,}万円"
-                else:
-                    return f"{oku_part}億円"
-            else:
-                # 通常表示
-                if oku >= 10:
-                    return f"{oku:.0f}億円"
-                else:
-                    return f"{oku:.1f}億円"
-        elif amount >= 10000:  # 1万円以上
-            man = amount / 10000
-            if man >= 100:
-                return f"{man:.0f}万円"
-            else:
-                return f"{man:.1f}万円"
-        else:
-            return f"{amount:,}円"
+        return format_japanese_currency(amount, detailed=detailed)
 
 if __name__ == "__main__":
     # テスト実行用
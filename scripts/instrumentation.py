@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+処理時間の計測（スパン）とプロファイリング
+
+LLM呼び出し・HTTP取得・解析・レンダリング・パイプラインのステージを「スパン」として計測します。
+
+- スパンは名前・種類・所要時間・属性（トークン数、バイト数、ステータス等）を持つ
+- 親子関係はcontextvarsで追跡する（asyncioのタスク・asyncio.to_thread にも引き継がれる）
+- 完了したスパンは直近の一定件数をメモリに保持し、トレースファイルを指定すればJSON Linesで追記する
+- add_listener() で完了したスパンを受け取る関数を登録できる（metrics.py の集計に使用）
+- --profile で cProfile / pyinstrument によるプロファイルを取得できる
+
+使い方:
+    configure_tracing("cache/traces/run.jsonl")
+    with span("feed.parse", "parse", bytes=len(content)) as current:
+        entries = parse(content)
+        current.set(entries=len(entries))
+
+環境変数 WEEKLYBRIEF_TRACE_FILE を設定すると、CLIで指定しなくてもトレースファイルに書き出します。
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from cache_store import dumps
+
+# pyinstrumentのインポート（フォールバック対応）
+try:
+    from pyinstrument import Profiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+
+SPAN_KINDS = ("llm", "http", "parse", "render", "stage")
+PROFILE_MODES = ("cprofile", "pyinstrument")
+
+TRACE_FILE_ENV = "WEEKLYBRIEF_TRACE_FILE"
+DEFAULT_PROFILE_DIR = os.path.join("cache", "profiles")
+# メモリに保持する完了済みスパンの件数
+DEFAULT_MAX_SPANS = 2000
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """計測区間"""
+    name: str
+    kind: str
+    span_id: str
+    parent_id: Optional[str] = None
+    started_at: float = 0.0  # UNIX時刻
+    duration: float = 0.0    # 秒
+    status: str = "ok"       # ok / error
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes: Any) -> "Span":
+        """属性を追加（Noneの値は無視）"""
+        self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON Lines出力用の辞書"""
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            **self.attributes
+        }
+
+
+class Tracer:
+    """
+    スパンの記録先（メモリ上のリングバッファ＋任意のJSON Linesファイル）
+    """
+
+    def __init__(self, trace_file: Optional[str] = None, max_spans: int = DEFAULT_MAX_SPANS):
+        """
+        初期化
+
+        Args:
+            trace_file (str): スパンを追記するJSON Linesファイル（省略時はメモリのみ）
+            max_spans (int): メモリに保持するスパン数
+        """
+        self.trace_file = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._listeners: List[Callable[[Span], None]] = []
+        self.set_trace_file(trace_file)
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """完了したスパンを受け取る関数を登録（記録したスレッドで同期的に呼ばれる）"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def set_trace_file(self, trace_file: Optional[str]) -> None:
+        """トレースファイルを変更（Noneで書き出しを止める）"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.trace_file = trace_file
+            if trace_file:
+                os.makedirs(os.path.dirname(trace_file) or ".", exist_ok=True)
+                self._file = open(trace_file, 'ab')
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+        """
+        区間を計測
+
+        例外が発生した場合はスパンを error として記録し、例外はそのまま送出する。
+
+        Args:
+            name (str): スパン名（例: "ollama.generate"）
+            kind (str): 種類（SPAN_KINDS のいずれか）
+            **attributes: 属性
+
+        Yields:
+            Span: 計測中のスパン（set() で属性を追加できる）
+        """
+        parent = _current_span.get()
+        current = Span(name=name, kind=kind, span_id=uuid.uuid4().hex[:16],
+                       parent_id=parent.span_id if parent else None,
+                       started_at=time.time())
+        current.set(**attributes)
+        token = _current_span.set(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.status = "error"
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            self.record(current)
+
+    def record(self, completed: Span) -> None:
+        """完了したスパンを記録"""
+        with self._lock:
+            self._spans.append(completed)
+            if self._file is not None:
+                # 異常終了しても途中までのトレースが残るよう1行ごとに書き出す
+                self._file.write(dumps(completed.to_dict()) + b"\n")
+                self._file.flush()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(completed)
+
+    def recent(self, kind: Optional[str] = None) -> List[Span]:
+        """
+        メモリに保持しているスパン
+
+        Args:
+            kind (str): 種類で絞り込み（省略時は全て）
+
+        Returns:
+            List[Span]: 古い順のスパン
+        """
+        with self._lock:
+            spans = list(self._spans)
+        return [s for s in spans if kind is None or s.kind == kind]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        スパン名ごとの集計（件数・合計・最大所要時間、トークン数・バイト数の合計）
+
+        Returns:
+            Dict: スパン名 → 集計値
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        for completed in self.recent():
+            entry = totals.setdefault(completed.name, {
+                "kind": completed.kind, "count": 0, "errors": 0, "total_duration": 0.0, "max_duration": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "bytes": 0
+            })
+            entry["count"] += 1
+            entry["errors"] += completed.status == "error"
+            entry["total_duration"] += completed.duration
+            entry["max_duration"] = max(entry["max_duration"], completed.duration)
+            for key in ("prompt_tokens", "completion_tokens", "bytes"):
+                entry[key] += completed.attributes.get(key) or 0
+        return totals
+
+    def close(self) -> None:
+        """トレースファイルを閉じる"""
+        self.set_trace_file(None)
+
+
+_tracer: Dict[str, Tracer] = {}
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    プロセス内で共有するトレーサーを取得
+
+    初回呼び出し時に環境変数 WEEKLYBRIEF_TRACE_FILE があればトレースファイルとして使う。
+
+    Returns:
+        Tracer: 共有トレーサー
+    """
+    with _tracer_lock:
+        tracer = _tracer.get("default")
+        if tracer is None:
+            tracer = Tracer(os.environ.get(TRACE_FILE_ENV) or None)
+            _tracer["default"] = tracer
+        return tracer
+
+
+def configure_tracing(trace_file: Optional[str]) -> Tracer:
+    """
+    トレースファイルを設定（Noneの場合は環境変数・現在の設定のまま）
+
+    Args:
+        trace_file (str): JSON Linesの出力先
+
+    Returns:
+        Tracer: 共有トレーサー
+    """
+    tracer = get_tracer()
+    if trace_file:
+        tracer.set_trace_file(trace_file)
+        print(f"🧭 トレースを記録: {trace_file}")
+    return tracer
+
+
+def span(name: str, kind: str, **attributes: Any):
+    """共有トレーサーで区間を計測（Tracer.span() を参照）"""
+    return get_tracer().span(name, kind, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    """実行中のスパン（無い場合はNone）"""
+    return _current_span.get()
+
+
+def annotate(**attributes: Any) -> None:
+    """実行中のスパンに属性を追加（スパンの外では何もしない）"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def traced(kind: str, name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    関数全体をスパンで計測するデコレータ（同期関数・コルーチン関数どちらも可）
+
+    Args:
+        kind (str): スパンの種類
+        name (str): スパン名（省略時は関数の修飾名）
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_ollama_usage(response: Any) -> None:
+    """
+    Ollamaの応答（/api/generate・/api/chat）のトークン数を実行中のスパンに記録
+
+    Args:
+        response: 応答の辞書、またはollama Python clientの応答オブジェクト
+    """
+    get = response.get if isinstance(response, dict) else lambda key: getattr(response, key, None)
+    annotate(prompt_tokens=get("prompt_eval_count"), completion_tokens=get("eval_count"))
+
+
+def instrument_session(session: Any, prefix: str = "http") -> Any:
+    """
+    requests.Session の全リクエストをスパンで計測（ステータス・受信バイト数を記録）
+
+    Args:
+        session: requests.Session
+        prefix (str): スパン名の接頭辞
+
+    Returns:
+        Any: 同じセッション
+    """
+    original = session.request
+
+    @functools.wraps(original)
+    def request(method, url, *args, **kwargs):
+        with span(f"{prefix}.{method.lower()}", "http", url=url) as current:
+            response = original(method, url, *args, **kwargs)
+            # stream=True の場合は本文を読まない（読み込み時間は呼び出し側の処理に含まれる）
+            current.set(status=response.status_code,
+                        bytes=None if kwargs.get("stream") else len(response.content))
+            return response
+
+    session.request = request
+    return session
+
+
+@contextmanager
+def profiling(mode: Optional[str], output_dir: str = DEFAULT_PROFILE_DIR, top: int = 25) -> Iterator[Optional[str]]:
+    """
+    ブロック内の処理をプロファイル（mode が None なら何もしない）
+
+    cProfile は .prof（snakeviz等で表示可）を保存して累積時間の上位を表示し、
+    pyinstrument はHTMLを保存してテキストのコールツリーを表示する。
+
+    Args:
+        mode (str): "cprofile" / "pyinstrument" / None
+        output_dir (str): プロファイルの保存先
+        top (int): cProfile で表示する関数の数
+
+    Yields:
+        Optional[str]: プロファイルの保存先パス
+
+    Raises:
+        ValueError: 未対応のモードの場合
+        RuntimeError: pyinstrument が無い場合
+    """
+    if mode is None:
+        yield None
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unsupported profile mode: {mode}")
+    if mode == "pyinstrument" and not PYINSTRUMENT_AVAILABLE:
+        raise RuntimeError("pyinstrumentモードには pyinstrument が必要です")
+
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if mode == "cprofile":
+        output_path = os.path.join(output_dir, f"profile_{timestamp}.prof")
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield output_path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+            print(report.getvalue())
+            print(f"🔬 プロファイルを保存: {output_path}")
+        return
+
+    output_path = os.path.join(output_dir, f"profile_{timestamp}.html")
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    try:
+        yield output_path
+    finally:
+        profiler.stop()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+        print(profiler.output_text(unicode=True, color=False))
+        print(f"🔬 プロファイルを保存: {output_path}")
+
+
+def add_instrumentation_arguments(parser: Any) -> None:
+    """
+    CLIに --trace / --profile オプションを追加
+
+    Args:
+        parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--trace", metavar="FILE",
+                        help=f"スパンをJSON Linesで記録するファイル（環境変数 {TRACE_FILE_ENV} でも指定可）")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help=f"プロファイルを取得（{DEFAULT_PROFILE_DIR}/ に保存）")
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+複数Ollamaホストへの負荷分散ルーター
+
+config/settings.json の data_sources.local_llm.backends に列挙したOllamaホストを
+1つのプールとして扱います。
+
+- /api/tags によるヘルスチェック（バックグラウンドスレッド）
+- 未完了リクエスト数が最も少ないホストへのルーティング（priorityが小さいホストを優先）
+- タイムアウト・接続エラー・404（モデル未取得）・5xx応答時は別ホストへフェイルオーバー
+- ホストごとの同時実行数上限（max_concurrency）
+- 呼び出しごとに "llm" スパンを記録（バックエンド・試行回数・トークン数）
+
+backendsが未設定の場合は ollama_url の1台構成となり、従来と同じ動作になります。
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable, Iterator
+
+import requests
+
+from instrumentation import annotate, record_ollama_usage, span
+
+# ollama Python client（httpx）のタイムアウト例外もフェイルオーバー対象にする
+FAILOVER_EXCEPTIONS = (requests.Timeout, requests.ConnectionError)
+try:
+    import httpx
+    FAILOVER_EXCEPTIONS = FAILOVER_EXCEPTIONS + (httpx.TimeoutException, httpx.ConnectError)
+except ImportError:
+    pass
+
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+# 応答にトークン数（prompt_eval_count / eval_count）が含まれるAPI
+USAGE_PATHS = ("/api/generate", "/api/chat")
+
+DEFAULT_ROUTER_SETTINGS = {
+    "health_check_interval": 30,
+    "health_check_timeout": 3,
+    "max_attempts": 3,
+    "acquire_timeout": 300
+}
+
+
+class NoBackendAvailableError(RuntimeError):
+    """利用可能なOllamaバックエンドが無い"""
+
+
+class BackendStatusError(requests.HTTPError):
+    """Ollamaバックエンドが404（モデル未取得）・5xx（メモリ不足等）を返した（別ホストへフェイルオーバーする）"""
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+
+def check_response(response: requests.Response) -> None:
+    """
+    Ollamaの応答ステータスを確認（2xx以外は例外）
+
+    Args:
+        response (requests.Response): レスポンス
+
+    Raises:
+        BackendStatusError: 404・5xxの場合（別ホストで再試行できる）
+        requests.HTTPError: その他の4xxの場合（リクエスト自体の誤り）
+    """
+    if response.status_code == 404 or response.status_code >= 500:
+        # ストリーミング応答でもエラー時の本文は短いJSON（{"error": ...}）
+        raise BackendStatusError(f"{response.status_code} {response.text[:200]}", response=response)
+    response.raise_for_status()
+
+
+@dataclass
+class OllamaBackend:
+    """Ollamaホスト1台の状態"""
+    name: str
+    url: str
+    max_concurrency: int = 2
+    priority: int = 0
+    healthy: bool = True
+    models: List[str] = field(default_factory=list)
+    outstanding: int = 0
+    total_requests: int = 0
+    failures: int = 0
+    total_latency: float = 0.0
+    last_error: str = ""
+    last_checked: Optional[float] = None
+
+    def has_model(self, model: Optional[str]) -> bool:
+        """モデルが利用可能か（未確認の場合はTrue）"""
+        if not model or not self.models:
+            return True
+        return any(name == model or name.startswith(model + ":") or name.split(":")[0] == model
+                   for name in self.models)
+
+    def to_status(self) -> Dict[str, Any]:
+        """状態を辞書で取得"""
+        completed = self.total_requests - self.failures
+        return {
+            "name": self.name,
+            "url": self.url,
+            "healthy": self.healthy,
+            "priority": self.priority,
+            "outstanding": self.outstanding,
+            "max_concurrency": self.max_concurrency,
+            "total_requests": self.total_requests,
+            "failures": self.failures,
+            "avg_latency": round(self.total_latency / completed, 3) if completed > 0 else 0.0,
+            "models": self.models,
+            "last_error": self.last_error
+        }
+
+
+class LLMRouter:
+    """
+    Ollamaバックエンドプール
+    """
+
+    def __init__(self, backends: List[OllamaBackend], settings: Optional[Dict[str, Any]] = None):
+        """
+        初期化
+
+        Args:
+            backends (List[OllamaBackend]): バックエンド一覧
+            settings (Dict): ルーター設定（health_check_interval, max_attempts等）
+        """
+        if not backends:
+            raise ValueError("backends must not be empty")
+
+        self.backends = backends
+        self.settings = dict(DEFAULT_ROUTER_SETTINGS)
+        self.settings.update(settings or {})
+        self._condition = threading.Condition()
+        self._health_thread = None
+        self._stop_event = threading.Event()
+        # 実行枠の空き待ちをしている呼び出し数（キューの深さ）
+        self.waiting = 0
+
+    @classmethod
+    def from_llm_config(cls, llm_config: Dict[str, Any], default_url: Optional[str] = None) -> "LLMRouter":
+        """
+        settings.jsonのlocal_llm設定から生成
+
+        Args:
+            llm_config (Dict): data_sources.local_llm の設定
+            default_url (str): backends未設定時に使うURL（省略時は ollama_url）
+
+        Returns:
+            LLMRouter: ルーター
+        """
+        backend_configs = llm_config.get("backends") or [{
+            "name": "default",
+            "url": default_url or llm_config.get("ollama_url", DEFAULT_OLLAMA_URL)
+        }]
+
+        backends = [
+            OllamaBackend(
+                name=backend.get("name", backend["url"]),
+                url=backend["url"].rstrip("/"),
+                max_concurrency=backend.get("max_concurrency", 2),
+                priority=backend.get("priority", 0)
+            )
+            for backend in backend_configs
+        ]
+        return cls(backends, llm_config.get("router", {}))
+
+    @property
+    def primary_url(self) -> str:
+        """最優先バックエンドのURL（表示用）"""
+        return min(self.backends, key=lambda b: b.priority).url
+
+    # ------------------------------------------------------------------
+    # ヘルスチェック
+    # ------------------------------------------------------------------
+
+    def check_health(self) -> List[OllamaBackend]:
+        """
+        全バックエンドの /api/tags を確認
+
+        Returns:
+            List[OllamaBackend]: 正常なバックエンド
+        """
+        for backend in self.backends:
+            try:
+                response = requests.get(f"{backend.url}/api/tags", timeout=self.settings["health_check_timeout"])
+                response.raise_for_status()
+                models = [model.get("name", "") for model in response.json().get("models", [])]
+                with self._condition:
+                    backend.healthy = True
+                    backend.models = models
+                    backend.last_error = ""
+            except Exception as e:
+                with self._condition:
+                    backend.healthy = False
+                    backend.last_error = str(e)
+            backend.last_checked = time.time()
+
+        with self._condition:
+            self._condition.notify_all()
+        return [backend for backend in self.backends if backend.healthy]
+
+    def start_health_checks(self) -> None:
+        """
+        バックグラウンドのヘルスチェックを開始
+
+        1台構成でも起動する（タイムアウトで unhealthy になったバックエンドを復帰させるため）。
+        """
+        interval = self.settings["health_check_interval"]
+        if interval <= 0 or self._health_thread:
+            return
+
+        def loop():
+            while not self._stop_event.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name="ollama-health-check", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self) -> None:
+        """バックグラウンドのヘルスチェックを停止"""
+        self._stop_event.set()
+
+    def has_model(self, model: str) -> bool:
+        """正常なバックエンドのいずれかでモデルが利用可能か"""
+        return any(backend.healthy and backend.models and backend.has_model(model)
+                   for backend in self.backends)
+
+    # ------------------------------------------------------------------
+    # ルーティング
+    # ------------------------------------------------------------------
+
+    def _select(self, model: Optional[str], exclude: List[OllamaBackend]) -> Optional[OllamaBackend]:
+        """空きのあるバックエンドを選択（呼び出し側でロック取得済み）"""
+        candidates = [b for b in self.backends if b not in exclude and b.has_model(model)]
+        healthy = [b for b in candidates if b.healthy]
+        # 全台unhealthyの場合はヘルス情報が古い可能性があるため全台を候補にする
+        candidates = healthy or candidates
+
+        free = [b for b in candidates if b.outstanding < b.max_concurrency]
+        if not free:
+            return None
+        return min(free, key=lambda b: (b.priority, b.outstanding / b.max_concurrency, b.outstanding))
+
+    def _has_candidates(self, model: Optional[str], exclude: List[OllamaBackend]) -> bool:
+        """試行していない候補が残っているか"""
+        return any(b not in exclude and b.has_model(model) for b in self.backends)
+
+    @contextmanager
+    def acquire(self, model: Optional[str] = None,
+                exclude: Optional[List[OllamaBackend]] = None) -> Iterator[OllamaBackend]:
+        """
+        バックエンドの実行枠を確保
+
+        Args:
+            model (str): 使用するモデル名
+            exclude (List[OllamaBackend]): 除外するバックエンド（フェイルオーバー時）
+
+        Yields:
+            OllamaBackend: 確保したバックエンド
+        """
+        exclude = exclude or []
+        deadline = time.time() + self.settings["acquire_timeout"]
+
+        with self._condition:
+            while True:
+                if not self._has_candidates(model, exclude):
+                    raise NoBackendAvailableError(f"No Ollama backend available for model {model}")
+                backend = self._select(model, exclude)
+                if backend:
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise NoBackendAvailableError("Timed out waiting for a free Ollama backend slot")
+                self.waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            backend.outstanding += 1
+            backend.total_requests += 1
+
+        started = time.time()
+        failed = False
+        try:
+            yield backend
+        except BaseException as e:
+            failed = True
+            with self._condition:
+                backend.failures += 1
+                backend.last_error = str(e)
+                # 404（このホストにモデルが無い）はホスト自体は正常なため、ヘルス状態は変えない
+                if isinstance(e, FAILOVER_EXCEPTIONS) or (isinstance(e, BackendStatusError) and e.status_code >= 500):
+                    backend.healthy = False
+            raise
+        finally:
+            with self._condition:
+                backend.outstanding -= 1
+                if not failed:
+                    backend.total_latency += time.time() - started
+                    # 応答があったバックエンドはヘルスチェックを待たずに復帰させる
+                    backend.healthy = True
+                    backend.last_error = ""
+                self._condition.notify_all()
+
+    def call(self, fn: Callable[[OllamaBackend], Any], model: Optional[str] = None,
+             span_name: str = "ollama.request") -> Any:
+        """
+        バックエンドを選んで処理を実行（タイムアウト・接続エラー・BackendStatusError時は別ホストで再試行）
+
+        fn は応答ステータスを check_response() で確認し、エラー応答を戻り値として返さないこと。
+
+        呼び出し全体（フェイルオーバーを含む）を1つの "llm" スパンとして記録する。
+        fn 内で annotate() した属性（トークン数等）もこのスパンに入る。
+
+        Args:
+            fn (Callable): バックエンドを受け取って処理する関数
+            model (str): 使用するモデル名
+            span_name (str): スパン名
+
+        Returns:
+            Any: fnの戻り値
+        """
+        tried: List[OllamaBackend] = []
+        last_error: Optional[Exception] = None
+
+        with span(span_name, "llm", model=model) as current:
+            for _ in range(self.settings["max_attempts"]):
+                try:
+                    with self.acquire(model, exclude=tried) as backend:
+                        tried.append(backend)
+                        current.set(backend=backend.name, attempts=len(tried))
+                        return fn(backend)
+                except FAILOVER_EXCEPTIONS as e:
+                    last_error = e
+                    print(f"⚠️ Ollamaバックエンド {tried[-1].name} 応答なし、フェイルオーバーします: {e}")
+                except BackendStatusError as e:
+                    last_error = e
+                    print(f"⚠️ Ollamaバックエンド {tried[-1].name} エラー応答 {e.status_code}、フェイルオーバーします")
+                except NoBackendAvailableError:
+                    break
+
+            if last_error:
+                raise last_error
+            raise NoBackendAvailableError(f"No Ollama backend available for model {model}")
+
+    def post(self, path: str, json: Dict[str, Any], timeout: Any = None, **kwargs) -> requests.Response:
+        """
+        バックエンドにPOST（ストリーミングしない呼び出し用）
+
+        Args:
+            path (str): APIパス（例: "/api/generate"）
+            json (Dict): リクエストボディ
+            timeout: requestsのタイムアウト
+
+        Returns:
+            requests.Response: レスポンス（2xxのみ）
+
+        Raises:
+            BackendStatusError: 全ホストが404・5xxを返した場合
+            requests.HTTPError: その他の4xxの場合
+        """
+        def send(backend: OllamaBackend) -> requests.Response:
+            response = requests.post(f"{backend.url}{path}", json=json, timeout=timeout, **kwargs)
+            annotate(status=response.status_code, bytes=len(response.content))
+            check_response(response)
+            # 埋め込みの応答は大きいため、トークン数は生成系のAPIでのみ記録する
+            if path in USAGE_PATHS:
+                try:
+                    record_ollama_usage(response.json())
+                except ValueError:
+                    pass
+            return response
+
+        return self.call(send, model=json.get("model"), span_name="ollama." + path.rsplit("/", 1)[-1])
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """
+        全バックエンドの状態を取得
+
+        Returns:
+            List[Dict]: バックエンドごとの状態
+        """
+        with self._condition:
+            return [backend.to_status() for backend in self.backends]
+
+    def get_queue_depth(self) -> int:
+        """実行枠の空き待ちをしている呼び出し数"""
+        with self._condition:
+            return self.waiting
+
+
+_shared_routers: Dict[str, LLMRouter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_router(llm_config: Optional[Dict[str, Any]] = None, default_url: Optional[str] = None,
+                      config_path: str = "config/settings.json") -> LLMRouter:
+    """
+    プロセス内で共有するルーターを取得
+
+    同じバックエンド構成のルーターは1つだけ作成され、LocalLLMSummarizer・Qwen3Llm等の
+    全呼び出しで未完了リクエスト数と同時実行数上限が共有されます。
+
+    Args:
+        llm_config (Dict): data_sources.local_llm の設定（省略時は設定ファイルから読み込み）
+        default_url (str): backends未設定時に使うURL
+        config_path (str): 設定ファイルのパス
+
+    Returns:
+        LLMRouter: 共有ルーター
+    """
+    if llm_config is None:
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            llm_config = config.get("data_sources", {}).get("local_llm", {})
+        except (OSError, ValueError):
+            llm_config = {}
+
+    backend_configs = llm_config.get("backends") or [{"url": default_url or llm_config.get("ollama_url", DEFAULT_OLLAMA_URL)}]
+    key = json.dumps([backend["url"].rstrip("/") for backend in backend_configs])
+
+    with _shared_lock:
+        router = _shared_routers.get(key)
+        if router is None:
+            router = LLMRouter.from_llm_config(llm_config, default_url=default_url)
+            router.start_health_checks()
+            _shared_routers[key] = router
+        return router
+
+
+def get_shared_routers() -> List[LLMRouter]:
+    """作成済みの共有ルーター一覧（メトリクス収集用）"""
+    with _shared_lock:
+        return list(_shared_routers.values())
@@ -13,6 +13,11 @@ import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from prompt_builder import PromptBuilder
+from prompt_templates import CallProfiles, ARTICLE_SUMMARY, WEEKLY_SUMMARY
+from llm_router import get_shared_router
+from instrumentation import record_ollama_usage
+
 # Ollama Python APIのインポート（フォールバック対応）
 try:
     import ollama
@@ -43,18 +48,63 @@ class LocalLLMSummarizer:
         self.model_name = self.llm_config.get("model_name", "qwen3:8b")
         self.thinking_mode = self.llm_config.get("thinking_mode", False)
         
-        # Ollama Pythonクライアントの初期化
+        # トークン予算ベースのプロンプトビルダー
+        self.prompt_builder = PromptBuilder.from_llm_config(self.llm_config)
+        
+        # 呼び出し種別ごとのOllamaオプションとkeep_alive
+        self.call_profiles = CallProfiles.from_llm_config(self.llm_config)
+        
+        # Ollamaバックエンドプール（backends未設定ならollama_urlの1台構成）
+        self.router = get_shared_router(self.llm_config)
+        
+        # Ollama Pythonクライアントの初期化（バックエンドごと）
         self.ollama_client = None
+        self.ollama_clients = {}
         if OLLAMA_CLIENT_AVAILABLE:
             try:
-                self.ollama_client = ollama.Client(host=self.ollama_url)
+                self.ollama_clients = {
+                    backend.url: ollama.Client(host=backend.url) for backend in self.router.backends
+                }
+                self.ollama_client = self.ollama_clients[self.router.primary_url]
                 print("✅ Ollama Python client initialized successfully")
             except Exception as e:
                 print(f"⚠️ Failed to initialize Ollama client: {e}")
                 self.ollama_client = None
+                self.ollama_clients = {}
         
         # 接続テスト
         self.available = self._test_ollama_connection()
+        
+        # 段階推論（小モデルで要約し、品質チェック不合格のみ大モデルへエスカレーション）
+        self.cascade_tiers = self._build_cascade_tiers()
+        self.tier_stats = {
+            model: {"attempts": 0, "accepted": 0, "total_latency": 0.0} for model in self.cascade_tiers
+        }
+    
+    def _build_cascade_tiers(self) -> List[str]:
+        """
+        要約に使うモデルの段階リストを作成（最後は常に model_name）
+        
+        Returns:
+            List[str]: 小さい順のモデル名リスト
+        """
+        cascade_config = self.llm_config.get("cascade", {})
+        if not cascade_config.get("enabled", False):
+            return [self.model_name]
+        
+        tiers = []
+        for model in cascade_config.get("tiers", []):
+            if model == self.model_name or model in tiers:
+                continue
+            if self.available and not self.router.has_model(model):
+                print(f"⚠️ 段階推論モデル {model} が見つからないためスキップします")
+                continue
+            tiers.append(model)
+        
+        tiers.append(self.model_name)
+        if len(tiers) > 1:
+            print(f"🪜 段階推論: {' → '.join(tiers)}")
+        return tiers
     
     def _test_ollama_connection(self) -> bool:
         """
@@ -64,19 +114,9 @@ class LocalLLMSummarizer:
             bool: 接続成功の場合True
         """
         try:
-            if self.ollama_client:
-                # Python clientでテスト
-                models = self.ollama_client.list()
-                model_names = [model['name'] for model in models['models']]
-                return any(self.model_name in name for name in model_names)
-            else:
-                # フォールバック：直接APIテスト
-                response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
-                if response.status_code == 200:
-                    models = response.json().get('models', [])
-                    model_names = [model['name'] for model in models]
-                    return any(self.model_name in name for name in model_names)
-            return False
+            # 全バックエンドの /api/tags を確認し、いずれかでモデルが利用可能ならOK
+            self.router.check_health()
+            return self.router.has_model(self.model_name)
         except Exception as e:
             print(f"Ollama接続テストエラー: {e}")
             return False
@@ -118,62 +158,79 @@ class LocalLLMSummarizer:
         # より多くの情報を活用して要約の質を向上
         full_text = f"{title}. {description or ''} {content or ''}".strip()
         
-        # 最新のOllama Python APIを使用してthinking modeを完全無効化
-        if self.ollama_client:
-            return self._summarize_with_ollama_client(full_text, title)
-        else:
-            # フォールバック：従来のrequests方式
-            return self._summarize_with_requests_fallback(full_text, title, description, content)
+        # 小さいモデルから順に試し、品質チェックに合格した時点で採用
+        for i, model in enumerate(self.cascade_tiers):
+            started = time.time()
+            
+            # 最新のOllama Python APIを使用してthinking modeを完全無効化
+            if self.ollama_client:
+                summary = self._summarize_with_ollama_client(full_text, title, model)
+            else:
+                # フォールバック：従来のrequests方式
+                summary = self._summarize_with_requests_fallback(full_text, title, description, content, model)
+            
+            self._record_tier_result(model, summary is not None, time.time() - started)
+            if summary:
+                return summary
+            
+            if i < len(self.cascade_tiers) - 1:
+                print(f"⬆️ {model} の要約が品質不足、{self.cascade_tiers[i + 1]} にエスカレーション...")
+        
+        print("⚠️ 品質不足、インテリジェントフォールバックを使用...")
+        return self._create_intelligent_fallback(title, description, content)
     
-    def _summarize_with_ollama_client(self, full_text: str, title: str) -> Optional[str]:
+    def _record_tier_result(self, model: str, accepted: bool, elapsed: float) -> None:
+        """
+        段階ごとのレイテンシと採用数を記録
+        
+        Args:
+            model (str): モデル名
+            accepted (bool): 品質チェックに合格したか
+            elapsed (float): 所要時間（秒）
+        """
+        stats = self.tier_stats.setdefault(model, {"attempts": 0, "accepted": 0, "total_latency": 0.0})
+        stats["attempts"] += 1
+        stats["accepted"] += 1 if accepted else 0
+        stats["total_latency"] += elapsed
+    
+    def _summarize_with_ollama_client(self, full_text: str, title: str, model: Optional[str] = None) -> Optional[str]:
         """
         Ollama Python clientを使用した要約生成（thinking mode完全無効化）
         
         Args:
             full_text (str): 全記事テキスト
             title (str): 記事タイトル
+            model (str): 使用するモデル（省略時は model_name）
         
         Returns:
-            Optional[str]: 日本語要約
+            Optional[str]: 日本語要約（品質不足・エラー時はNone）
         """
+        model = model or self.model_name
         try:
-            print(f"🤖 Qwen3（thinking OFF）で要約生成中: {title[:30]}...")
+            print(f"🤖 {model}（thinking OFF）で要約生成中: {title[:30]}...")
             
-            # thinking mode完全無効化のプロンプト
-            prompt = f"""You are a professional Japanese business news summarizer.
-
-Article: {full_text[:800]}
-
-Task: Create a concise Japanese summary (max 50 characters) that includes:
-1. What happened (具体的な出来事)
-2. Who is involved (関係者・企業名) 
-3. Key impact (重要な影響)
-
-Requirements: 
-- Output ONLY the Japanese summary
-- No thinking, no explanation, no analysis
-- Direct answer only
-
-Japanese summary:"""
+            # 静的な指示を先頭に置いた共有プレフィックス型プロンプト（記事本文はトークン予算まで充填）
+            prompt = self.prompt_builder.fill(
+                "article_summary", ARTICLE_SUMMARY.slot("article"), "article", full_text
+            )
             
             # Ollama Python clientでthinking mode無効化
-            response = self.ollama_client.chat(
-                model=self.model_name,
-                messages=[{
-                    'role': 'user',
-                    'content': prompt
-                }],
-                stream=False,
-                think=False,  # 🔑 Key: thinking mode完全無効化
-                options={
-                    'temperature': 0.3,
-                    'top_p': 0.9,
-                    'top_k': 40,
-                    'num_predict': 80,
-                    'repeat_penalty': 1.15,
-                    'seed': 42
-                }
-            )
+            def chat(backend):
+                response = self.ollama_clients[backend.url].chat(
+                    model=model,
+                    messages=[{
+                        'role': 'user',
+                        'content': prompt
+                    }],
+                    stream=False,
+                    think=False,  # 🔑 Key: thinking mode完全無効化
+                    keep_alive=self.call_profiles.keep_alive,
+                    options=self.call_profiles.options("article_summary")
+                )
+                record_ollama_usage(response)
+                return response
+            
+            response = self.router.call(chat, model=model, span_name="ollama.chat")
             
             if response and 'message' in response:
                 raw_summary = response['message']['content'].strip()
@@ -183,20 +240,19 @@ Japanese summary:"""
                 summary = self._clean_summary(raw_summary)
                 
                 if self._is_high_quality_summary(summary, title, ""):
-                    print(f"✅ 高品質要約（thinking無効化）: {summary}")
+                    print(f"✅ 高品質要約（{model}）: {summary}")
                     return summary
-                else:
-                    print("⚠️ 品質不足、インテリジェントフォールバックを使用...")
-                    return self._create_intelligent_fallback(title, "", "")
+                return None
             else:
                 print("❌ Ollama client response invalid")
-                return self._create_intelligent_fallback(title, "", "")
+                return None
                 
         except Exception as e:
             print(f"❌ Ollama client error: {e}")
-            return self._create_intelligent_fallback(title, "", "")
+            return None
     
-    def _summarize_with_requests_fallback(self, full_text: str, title: str, description: str, content: str) -> Optional[str]:
+    def _summarize_with_requests_fallback(self, full_text: str, title: str, description: str, content: str,
+                                          model: Optional[str] = None) -> Optional[str]:
         """
         従来のrequests方式でのフォールバック要約生成
         
@@ -205,47 +261,34 @@ Japanese summary:"""
             title (str): 記事タイトル
             description (str): 記事説明
             content (str): 記事本文
+            model (str): 使用するモデル（省略時は model_name）
         
         Returns:
-            Optional[str]: 日本語要約
+            Optional[str]: 日本語要約（品質不足・エラー時はNone）
         """
-        print(f"🤖 Qwen3（requests fallback）で要約生成中: {title[:30]}...")
+        model = model or self.model_name
+        print(f"🤖 {model}（requests fallback）で要約生成中: {title[:30]}...")
         
-        # プロンプトに/no_thinkを追加してthinking mode抑制を試行
-        prompt = f"""/no_think
-
-You are a professional Japanese business news summarizer.
-
-Article: {full_text[:800]}
-
-Task: Create a concise Japanese summary (max 50 characters).
-Output ONLY the Japanese summary, no thinking, no explanation.
-
-Japanese summary:
-
-/no_think"""
+        # Ollama clientと同じ共有プレフィックス型プロンプト（thinkingはAPIパラメータで無効化）
+        prompt = self.prompt_builder.fill(
+            "article_summary", ARTICLE_SUMMARY.slot("article"), "article", full_text
+        )
         
         payload = {
-            "model": self.model_name,
+            "model": model,
             "prompt": prompt,
             "stream": False,
-            "options": {
-                "temperature": 0.2,
-                "top_p": 0.9,
-                "top_k": 40,
-                "num_predict": 80,
-                "stop": ["<|user|>", "<|assistant|>", "\n\n", "English:", "Article:", "<think>"],
-                "repeat_penalty": 1.15,
-                "seed": 42
-            }
+            "think": False,
+            "keep_alive": self.call_profiles.keep_alive,
+            "options": self.call_profiles.options(
+                "article_summary",
+                temperature=0.2,
+                stop=["\n\n", "English:", "Article:", "<think>"]
+            )
         }
         
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json=payload,
-                timeout=40
-            )
+            response = self.router.post("/api/generate", json=payload, timeout=40)
             
             if response.status_code == 200:
                 result = response.json()
@@ -254,25 +297,23 @@ Japanese summary:
                 
                 # thinking content detection
                 if '<think>' in raw_summary or 'thinking' in raw_summary.lower():
-                    print("⚠️ Thinking mode detected in requests fallback, using intelligent fallback...")
-                    return self._create_intelligent_fallback(title, description, content)
+                    print("⚠️ Thinking mode detected in requests fallback")
+                    return None
                 
                 summary = self._clean_summary(raw_summary)
                 
                 if self._is_high_quality_summary(summary, title, description):
-                    print(f"✅ 要約（requests fallback）: {summary}")
+                    print(f"✅ 要約（{model}, requests fallback）: {summary}")
                     return summary
-                else:
-                    print("⚠️ 品質不足、インテリジェントフォールバックを使用...")
-                    return self._create_intelligent_fallback(title, description, content)
+                return None
                     
             else:
                 print(f"❌ Requests API error: {response.status_code}")
-                return self._create_intelligent_fallback(title, description, content)
+                return None
                 
         except Exception as e:
             print(f"❌ Requests API error: {e}")
-            return self._create_intelligent_fallback(title, description, content)
+            return None
     
     def _create_intelligent_fallback(self, title: str, description: str, content: str = "") -> str:
         """
@@ -841,6 +882,12 @@ Japanese summary:
             if i < len(articles) - 1:
                 time.sleep(1)
         
+        # 段階推論の採用率を表示
+        if len(self.cascade_tiers) > 1:
+            for model, stats in self.get_cascade_stats()["stats"].items():
+                print(f"🪜 {model}: 採用 {stats['accepted']}/{stats['attempts']} "
+                      f"({stats['acceptance_rate']:.0%}), 平均 {stats['avg_latency']:.2f}秒")
+        
         return processed_articles
     
     def get_status(self) -> Dict[str, Any]:
@@ -856,9 +903,33 @@ Japanese summary:
             "ollama_available": self.available,
             "ollama_url": self.ollama_url,
             "thinking_mode": self.thinking_mode,
-            "fallback_enabled": True
+            "fallback_enabled": True,
+            "keep_alive": self.call_profiles.keep_alive,
+            "backends": self.router.get_status(),
+            "cascade": self.get_cascade_stats(),
+            "tokenizer": self.prompt_builder.tokenizer_label,
+            "prompt_budgets": self.prompt_builder.get_budget_report()
         }
 
+    def get_cascade_stats(self) -> Dict[str, Any]:
+        """
+        段階推論の段階ごとの統計を取得
+        
+        Returns:
+            Dict: モデルごとの試行数・採用率・平均レイテンシ
+        """
+        stats = {}
+        for model in self.cascade_tiers:
+            tier = self.tier_stats.get(model, {"attempts": 0, "accepted": 0, "total_latency": 0.0})
+            attempts = tier["attempts"]
+            stats[model] = {
+                "attempts": attempts,
+                "accepted": tier["accepted"],
+                "acceptance_rate": round(tier["accepted"] / attempts, 3) if attempts else 0.0,
+                "avg_latency": round(tier["total_latency"] / attempts, 3) if attempts else 0.0
+            }
+        return {"tiers": self.cascade_tiers, "stats": stats}
+
     def generate_weekly_news_summary(self, articles: List[Dict[str, Any]]) -> str:
         """
         週のニュース記事全体を日本語で300文字程度にサマライズ
@@ -872,9 +943,9 @@ Japanese summary:
         if not articles:
             return "今週は注目すべきAI業界ニュースはありませんでした。"
         
-        # 記事の主要情報を抽出
-        titles = [article.get("title", "") for article in articles[:8]]  # 上位8件
-        summaries = [article.get("summary_jp", "") for article in articles[:8]]
+        # 記事の主要情報を抽出（件数はプロンプト予算で決まるため全件渡す）
+        titles = [article.get("title", "") for article in articles]
+        summaries = [article.get("summary_jp", "") for article in articles]
         
         if not self.enabled or not self.available:
             return self._create_fallback_weekly_summary(articles)
@@ -896,45 +967,29 @@ Japanese summary:
         Returns:
             str: 週間サマリー
         """
-        # 記事情報を整理
+        # 記事情報を整理（重要度順に予算いっぱいまで詰める）
         article_info = []
-        for i, (title, summary) in enumerate(zip(titles, summaries)):
+        for title, summary in zip(titles, summaries):
             if title and summary:
-                article_info.append(f"{i+1}. {summary}")
+                article_info.append((f"{len(article_info)+1}. ", summary))
         
-        articles_text = "\n".join(article_info[:6])  # 上位6件
-        
-        prompt = f"""<|user|>
-以下は今週のAI業界ニュースです。全体的なトレンドと重要なポイントを日本語で300文字以内でまとめてください。
-
-今週のニュース:
-{articles_text}
-
-業界全体の動向、主要企業の動き、注目すべき技術トレンドを含めて週間サマリーを作成してください。
-<|assistant|>
-"""
+        prompt, _ = self.prompt_builder.pack(
+            "weekly_summary", WEEKLY_SUMMARY.slot("articles"), "articles", article_info, mode="greedy"
+        )
         
         payload = {
             "model": self.model_name,
             "prompt": prompt,
             "stream": False,
-            "options": {
-                "temperature": 0.4,
-                "top_p": 0.9,
-                "num_predict": 400,
-                "stop": ["<|user|>", "<|assistant|>"],
-                "repeat_penalty": 1.1
-            }
+            "think": False,
+            "keep_alive": self.call_profiles.keep_alive,
+            "options": self.call_profiles.options("weekly_summary")
         }
         
         try:
             print("🔍 週間ニュースサマリーを生成中...")
             
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json=payload,
-                timeout=45
-            )
+            response = self.router.post("/api/generate", json=payload, timeout=45)
             
             if response.status_code == 200:
                 result = response.json()
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+プロセス内メトリクス（Prometheusのテキスト形式で出力）
+
+カウンタ・ゲージ・ヒストグラムをプロセス内で集計し、/metrics で返すテキストを生成します。
+外部ライブラリは使わず、1回の記録はロック1回とリスト要素の加算だけで済むようにしています。
+
+- HTTPリクエストのルート別レイテンシ（ヒストグラム）・処理中リクエスト数
+- LLM呼び出しのバックエンド別レイテンシ・エラー数・トークン数（instrumentation のスパンから集計）
+- 実行中のLLM呼び出し数・実行枠の待ち行列の深さ（共有ルーターの状態を収集時に読む）
+- 検証キャッシュ・要約キャッシュのヒット・ミス数とヒット率
+- プロセスのメモリ・CPU時間
+
+使い方:
+    registry = get_registry()
+    CACHE_LOOKUPS.labels("verification", "hit").inc()
+    text = registry.render()
+"""
+
+import bisect
+import math
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from instrumentation import Span, get_tracer
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒単位のレイテンシ用バケット（API応答〜LLMの長い生成まで）
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROCESS_START_TIME = time.time()
+
+# サンプル: (メトリクス名, ラベル, 値)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+@dataclass
+class MetricFamily:
+    """出力単位のメトリクス（HELP・TYPE行と複数のサンプル）"""
+    name: str
+    type: str
+    documentation: str
+    samples: List[Sample] = field(default_factory=list)
+
+
+def _escape(value: str) -> str:
+    """ラベル値のエスケープ"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """値の表記（無限大・整数値に対応）"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return f"{int(value)}"
+    return repr(float(value))
+
+
+class _Metric:
+    """ラベル付きメトリクスの共通処理"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+
+    def labels(self, *values: str) -> "_Child":
+        """
+        ラベル値を指定した系列を取得（初回のみ作成）
+
+        Args:
+            *values: labelnames と同じ順のラベル値
+
+        Returns:
+            _Child: 系列
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} のラベルは {', '.join(self.labelnames)} です")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> "_Child":
+        raise NotImplementedError
+
+    def _label_dict(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class _Child:
+    """1系列の値"""
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """単調増加するカウンタ（名前は _total で終える）"""
+
+    type = "counter"
+
+    def _new_child(self) -> _Child:
+        return _Child(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """ラベルなしのカウンタを加算"""
+        self.labels().inc(amount)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            samples = [(self.name, self._label_dict(key), child.value) for key, child in self._children.items()]
+        return MetricFamily(self.name, self.type, self.documentation, samples)
+
+
+class Gauge(Counter):
+    """増減するゲージ"""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        """ラベルなしのゲージを減算"""
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        """ラベルなしのゲージに値を設定"""
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    """ヒストグラム1系列（バケットごとの件数は累積せずに保持し、出力時に累積する）"""
+
+    def __init__(self, lock: threading.Lock, buckets: Tuple[float, ...]):
+        self._lock = lock
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """値の分布（le ラベルの累積バケット・_sum・_count を出力）"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._lock, self.buckets)
+
+    def observe(self, value: float) -> None:
+        """ラベルなしのヒストグラムに記録"""
+        self.labels().observe(value)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.documentation)
+        with self._lock:
+            series = [(self._label_dict(key), list(child.counts), child.sum) for key, child in self._children.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                family.samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            family.samples.append((f"{self.name}_sum", labels, total))
+            family.samples.append((f"{self.name}_count", labels, cumulative))
+        return family
+
+
+class Registry:
+    """
+    メトリクスと収集関数（出力時に値を読むもの）の登録先
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        メトリクスを登録（同名があれば登録済みのものを返す）
+
+        Args:
+            metric: Counter / Gauge / Histogram
+
+        Returns:
+            _Metric: 登録されたメトリクス
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """出力時に呼び出してメトリクスを生成する関数を登録"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        """全メトリクスを収集"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """
+        Prometheusのテキスト形式で出力
+
+        Returns:
+            str: /metrics の応答本文
+        """
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for name, labels, value in family.samples:
+                if labels:
+                    label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# 標準のメトリクス
+# ----------------------------------------------------------------------
+
+HTTP_REQUEST_DURATION = Histogram(
+    "weeklybrief_http_request_duration_seconds", "APIリクエストの処理時間（ルート別）", ("method", "route", "status"))
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "weeklybrief_http_requests_in_flight", "処理中のAPIリクエスト数")
+LLM_REQUEST_DURATION = Histogram(
+    "weeklybrief_llm_request_duration_seconds", "LLM呼び出しの所要時間（フェイルオーバーを含む）", ("backend", "name"))
+LLM_ERRORS = Counter(
+    "weeklybrief_llm_errors_total", "失敗したLLM呼び出し数", ("backend", "name"))
+LLM_TOKENS = Counter(
+    "weeklybrief_llm_tokens_total", "LLMのトークン数", ("backend", "type"))
+SPAN_DURATION = Histogram(
+    "weeklybrief_span_duration_seconds", "計測スパンの所要時間（HTTP取得・解析・レンダリング・ステージ）", ("kind", "name"))
+SPAN_ERRORS = Counter(
+    "weeklybrief_span_errors_total", "エラーになった計測スパン数", ("kind", "name"))
+CACHE_LOOKUPS = Counter(
+    "weeklybrief_cache_lookups_total", "キャッシュの参照数", ("cache", "result"))
+
+STANDARD_METRICS = (
+    HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, LLM_REQUEST_DURATION, LLM_ERRORS, LLM_TOKENS,
+    SPAN_DURATION, SPAN_ERRORS, CACHE_LOOKUPS
+)
+
+
+def record_cache_lookup(cache: str, hits: int = 0, misses: int = 0) -> None:
+    """
+    キャッシュのヒット・ミス数を記録
+
+    Args:
+        cache (str): キャッシュ名（"verification" / "summary" 等）
+        hits (int): ヒット数
+        misses (int): ミス数
+    """
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+def observe_span(completed: Span) -> None:
+    """完了したスパンをメトリクスに反映（トレーサーのリスナー）"""
+    if completed.kind == "llm":
+        backend = str(completed.attributes.get("backend", "none"))
+        LLM_REQUEST_DURATION.labels(backend, completed.name).observe(completed.duration)
+        if completed.status == "error":
+            LLM_ERRORS.labels(backend, completed.name).inc()
+        for key, token_type in (("prompt_tokens", "prompt"), ("completion_tokens", "completion")):
+            if completed.attributes.get(key):
+                LLM_TOKENS.labels(backend, token_type).inc(completed.attributes[key])
+        return
+
+    SPAN_DURATION.labels(completed.kind, completed.name).observe(completed.duration)
+    if completed.status == "error":
+        SPAN_ERRORS.labels(completed.kind, completed.name).inc()
+
+
+def _collect_cache_ratios() -> Iterable[MetricFamily]:
+    """キャッシュ別のヒット率（参照が無いキャッシュは出力しない）"""
+    lookups: Dict[str, Dict[str, float]] = {}
+    for _, labels, value in CACHE_LOOKUPS.collect().samples:
+        lookups.setdefault(labels["cache"], {})[labels["result"]] = value
+    family = MetricFamily("weeklybrief_cache_hit_ratio", "gauge", "キャッシュのヒット率（起動後の累計）")
+    for cache, counts in lookups.items():
+        total = counts.get("hit", 0) + counts.get("miss", 0)
+        if total:
+            family.samples.append((family.name, {"cache": cache}, counts.get("hit", 0) / total))
+    return [family]
+
+
+def _collect_llm_backends() -> Iterable[MetricFamily]:
+    """共有ルーターのバックエンド状態（実行中の呼び出し数・待ち行列・ヘルス・累計エラー）"""
+    # ルーターを使っていないプロセスでは llm_router（requests依存）を読み込まない
+    llm_router = sys.modules.get("llm_router")
+    routers = llm_router.get_shared_routers() if llm_router else []
+
+    in_flight = MetricFamily("weeklybrief_llm_in_flight", "gauge", "実行中のLLM呼び出し数")
+    queue_depth = MetricFamily("weeklybrief_llm_queue_depth", "gauge", "LLMバックエンドの実行枠を待っている呼び出し数")
+    healthy = MetricFamily("weeklybrief_llm_backend_up", "gauge", "LLMバックエンドのヘルスチェック結果（1=正常）")
+    failures = MetricFamily("weeklybrief_llm_backend_failures_total", "counter",
+                            "LLMバックエンドごとの失敗数（ルーター集計）")
+
+    for index, router in enumerate(routers):
+        queue_depth.samples.append((queue_depth.name, {"router": str(index)}, router.get_queue_depth()))
+        for status in router.get_status():
+            labels = {"backend": status["name"]}
+            in_flight.samples.append((in_flight.name, labels, status["outstanding"]))
+            healthy.samples.append((healthy.name, labels, 1 if status["healthy"] else 0))
+            failures.samples.append((failures.name, labels, status["failures"]))
+    return [in_flight, queue_depth, healthy, failures]
+
+
+def _resident_memory_bytes() -> Optional[int]:
+    """現在の常駐メモリ（Linuxの /proc が無い環境ではNone）"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _collect_process() -> Iterable[MetricFamily]:
+    """プロセスのメモリ・CPU時間・スレッド数"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss はLinuxではKB、macOSではバイト
+    max_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    families = [
+        MetricFamily("process_max_resident_memory_bytes", "gauge", "常駐メモリの最大値",
+                     [("process_max_resident_memory_bytes", {}, max_rss)]),
+        MetricFamily("process_cpu_seconds_total", "counter", "ユーザー・システムCPU時間の合計",
+                     [("process_cpu_seconds_total", {}, usage.ru_utime + usage.ru_stime)]),
+        MetricFamily("process_start_time_seconds", "gauge", "プロセスの開始時刻（UNIX時刻）",
+                     [("process_start_time_seconds", {}, PROCESS_START_TIME)]),
+        MetricFamily("process_threads", "gauge", "スレッド数",
+                     [("process_threads", {}, threading.active_count())])
+    ]
+    rss = _resident_memory_bytes()
+    if rss is not None:
+        families.append(MetricFamily("process_resident_memory_bytes", "gauge", "現在の常駐メモリ",
+                                     [("process_resident_memory_bytes", {}, rss)]))
+    return families
+
+
+_registries: Dict[str, Registry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry() -> Registry:
+    """
+    プロセス内で共有するレジストリを取得
+
+    初回呼び出し時に標準のメトリクス・収集関数を登録し、トレーサーのスパンを集計し始める。
+
+    Returns:
+        Registry: 共有レジストリ
+    """
+    with _registries_lock:
+        registry = _registries.get("default")
+        if registry is None:
+            registry = Registry()
+            for metric in STANDARD_METRICS:
+                registry.register(metric)
+            registry.add_collector(_collect_cache_ratios)
+            registry.add_collector(_collect_llm_backends)
+            registry.add_collector(_collect_process)
+            get_tracer().add_listener(observe_span)
+            _registries["default"] = registry
+        return registry
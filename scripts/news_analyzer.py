@@ -11,7 +11,12 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from qwen3_llm import Qwen3Llm
-import hashlib
+from prompt_builder import PromptBuilder
+from prompt_templates import BATCH_ANALYSIS, NEWS_WEEKLY_SUMMARY
+from article_embeddings import ArticleEmbedder, article_text
+from article_store import get_article_store
+from instrumentation import span
+from metrics import record_cache_lookup
 import os
 import asyncio
 import aiohttp
@@ -34,8 +39,10 @@ class EfficientNewsAnalyzer:
     
     def __init__(self):
         self.llm = Qwen3Llm(model="ollama/qwen3:30b-a3b", api_url="http://localhost:11434/api/generate")
-        self.cache_file = "cache/news_analysis_cache.json"
-        self.cache = self.load_cache()
+        # 分析結果は記事ストアに記事内容のハッシュと一緒に保存（内容が変わった記事だけ再分析）
+        self.article_store = get_article_store()
+        self.prompt_builder = PromptBuilder.from_settings()
+        self.embedder = ArticleEmbedder.from_settings()
         
         # 段階的フィルタリング設定
         self.quick_filters = {
@@ -83,8 +90,17 @@ class EfficientNewsAnalyzer:
         if not analyzed_news:
             return "今週はAI・テクノロジー関連の重要なニュースは確認されませんでした。"
         
-        # 上位5件のニュースを抽出
-        top_news = sorted(analyzed_news, key=lambda x: x.get('score', 0), reverse=True)[:5]
+        # 重要度順に並べ、プロンプト予算に収まる件数を採用
+        ranked_news = sorted(analyzed_news, key=lambda x: x.get('score', 0), reverse=True)
+        
+        # サマリー生成プロンプト（静的な指示 → 記事 → 企業別統計の順）
+        items = [
+            (f"{i}. {news.get('title', '')} (重要度: {news.get('score', 0):.1f})\n   要約: ", f"{news.get('summary_jp', '')}\n")
+            for i, news in enumerate(ranked_news, 1)
+        ]
+        template = NEWS_WEEKLY_SUMMARY.slot("articles", company_stats="{company_stats}")
+        prompt, included = self.prompt_builder.pack("news_weekly_summary", template, "articles", items, mode="greedy")
+        top_news = ranked_news[:included]
         
         # 企業別統計
         company_stats = {}
@@ -94,28 +110,13 @@ class EfficientNewsAnalyzer:
                 company_stats[company] = 0
             company_stats[company] += 1
         
-        # サマリー生成プロンプト
-        prompt = f"""以下のAI・テクノロジーニュースから週次サマリーを300-400文字で生成してください。
-
-要求：
-- 全体的なトレンドや傾向を分析
-- 主要企業の動向を含める
-- ビジネスへの影響を考慮
-- 読みやすく簡潔に
-- 必ず300-400文字以内
-
-今週の主要ニュース：
-"""
-        
-        for i, news in enumerate(top_news, 1):
-            prompt += f"{i}. {news.get('title', '')} (重要度: {news.get('score', 0):.1f})\n"
-            prompt += f"   要約: {news.get('summary_jp', '')}\n\n"
-        
-        prompt += f"\n企業別ニュース数: {dict(sorted(company_stats.items(), key=lambda x: x[1], reverse=True))}"
+        prompt = prompt.replace(
+            "{company_stats}", str(dict(sorted(company_stats.items(), key=lambda x: x[1], reverse=True)))
+        )
         
         try:
             print("📝 週次サマリー生成中...")
-            summary = await self.llm.generate_content_async(prompt)
+            summary = await self.llm.generate_content_async(prompt, call_type=NEWS_WEEKLY_SUMMARY.call_type)
             
             # 文字数調整
             if len(summary) > 400:
@@ -131,30 +132,9 @@ class EfficientNewsAnalyzer:
             main_companies = list(company_stats.keys())[:3]
             return f"今週は{', '.join(main_companies)}などを中心としたAI・テクノロジー関連の発表が相次ぎました。特に{top_news[0].get('title', '')[:50]}などの動向が注目されます。AI技術の実用化と企業間の戦略的提携が加速しており、業界全体の競争が激化しています。"
 
-    def load_cache(self) -> Dict:
-        """キャッシュファイルを読み込み"""
-        os.makedirs("cache", exist_ok=True)
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-
-    def save_cache(self):
-        """キャッシュファイルを保存"""
-        with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(self.cache, f, ensure_ascii=False, indent=2)
-
-    def get_cache_key(self, news_item: Dict) -> str:
-        """ニュース記事のキャッシュキーを生成"""
-        content = f"{news_item['title']}{news_item['url']}"
-        return hashlib.md5(content.encode()).hexdigest()
-
     def apply_quick_filters(self, news_list: List[Dict]) -> List[Dict]:
         """段階的フィルタリングを適用"""
-        filtered_news = []
+        candidates = []
         
         for news in news_list:
             title = news.get('title', '').lower()
@@ -168,11 +148,16 @@ class EfficientNewsAnalyzer:
             if any(keyword in title for keyword in self.quick_filters['exclude_keywords']):
                 continue
             
-            # 優先キーワードボーナス
-            priority_score = sum(2 for keyword in self.quick_filters['priority_keywords'] 
-                                if keyword in title)
+            candidates.append(news)
+        
+        # 優先トピックボーナス（埋め込みが使えれば全件まとめて類似度計算）
+        priority_scores = self._semantic_priority_scores(candidates)
+        
+        filtered_news = []
+        for news, priority_score in zip(candidates, priority_scores):
+            title = news.get('title', '').lower()
             
-            # 企業関連度チェック
+            # 企業関連度チェック（企業名は固有名詞のため文字列一致）
             company_relevance = 0
             for company in self.company_multipliers.keys():
                 if company.lower() in title or company.lower() in news.get('description', '').lower():
@@ -190,113 +175,144 @@ class EfficientNewsAnalyzer:
         # スコア順でソート、上位50件のみAI分析対象
         filtered_news.sort(key=lambda x: x['base_score'], reverse=True)
         return filtered_news[:50]  # AI分析対象を50件に制限
+    
+    def _semantic_priority_scores(self, news_list: List[Dict]) -> List[float]:
+        """
+        優先トピックとの関連度ボーナスを計算
+        
+        埋め込みが利用可能なら優先キーワードとのコサイン類似度から算出し
+        （閾値未満は0点、閾値ちょうどでキーワード1件一致と同じ+2点、類似度1で+4点）、
+        利用できない場合は従来どおりタイトル中のキーワード一致数から算出する。
+        """
+        if news_list and self.embedder.available:
+            try:
+                index = self.embedder.build_index(
+                    [article_text(news.get('title', ''), news.get('description', '')) for news in news_list]
+                )
+                relevance = index.relevance(self.embedder.embed(self.quick_filters['priority_keywords']))
+                threshold = self.embedder.relevance_threshold
+                return [
+                    min(4.0, 2.0 + 2.0 * (float(score) - threshold) / ((1.0 - threshold) or 1.0))
+                    if float(score) >= threshold else 0.0
+                    for score in relevance
+                ]
+            except Exception as e:
+                print(f"⚠️ 埋め込み計算エラー（キーワード一致で代替）: {e}")
+        
+        return [
+            sum(2 for keyword in self.quick_filters['priority_keywords'] if keyword in news.get('title', '').lower())
+            for news in news_list
+        ]
 
     async def batch_analyze_with_ai(self, news_batch: List[Dict]) -> List[Dict]:
-        """バッチでAI分析を実行"""
+        """
+        バッチでAI分析を実行
+        
+        プロンプト予算に入らなかった記事は、残りを次のバッチとして続けて分析する。
+        1件も入らない場合は基本スコアを使用する。
+        """
         if not news_batch:
             return []
         
-        # バッチプロンプト作成
-        batch_prompt = """以下のニュース記事群を分析し、各記事について以下の形式でJSONで回答してください：
-
-{
-  "analyses": [
-    {
-      "index": 0,
-      "importance_score": 5.5,
-      "japanese_summary": "記事の詳細要約（80-120文字程度）"
-    }
-  ]
-}
-
-評価基準：
-- AI/機械学習の技術革新: +2点
-- 大手企業の重要発表: +1.5点
-- 業界への影響度: +1点
-- 実用性・商用化: +1点
-
-記事一覧：
-"""
-        
-        for i, news in enumerate(news_batch):
-            batch_prompt += f"\n{i}. タイトル: {news['title']}\n"
-            batch_prompt += f"   説明: {news.get('description', '')[:100]}...\n"
+        # タイトルは全件含め、説明文の予算を記事間で均等配分（文境界で切り詰め）
+        items = [
+            (f"\n{i}. タイトル: {news['title']}\n   説明: ", news.get('description') or '')
+            for i, news in enumerate(news_batch)
+        ]
+        batch_prompt, included = self.prompt_builder.pack(
+            "batch_analysis", BATCH_ANALYSIS.slot("articles"), "articles", items, separator=""
+        )
+        if included == 0:
+            print(f"⚠️ プロンプト予算に記事が入らないため基本スコアを使用: {len(news_batch)}件")
+            self._apply_base_scores(news_batch)
+            return news_batch
+        if included < len(news_batch):
+            print(f"📏 予算に入らなかった {len(news_batch) - included}件は次のバッチで分析します")
         
         try:
-            print(f"🤖 AI分析中... ({len(news_batch)}件をバッチ処理)")
-            response = await self.llm.generate_content_async(batch_prompt)
+            print(f"🤖 AI分析中... ({included}件をバッチ処理)")
+            response = await self.llm.generate_content_async(batch_prompt, call_type=BATCH_ANALYSIS.call_type)
             
             # JSON解析
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
+            with span("batch_analysis.parse", "parse", bytes=len(response.encode('utf-8'))) as parsed:
+                json_match = re.search(r'\{.*\}', response, re.DOTALL)
+                result = json.loads(json_match.group()) if json_match else None
+                parsed.set(analyses=len(result.get('analyses', [])) if result else 0)
+            if result is not None:
                 analyses = result.get('analyses', [])
                 
-                # 結果をニュースに適用
+                # 結果をニュースに適用（プロンプトに含めた記事のみ）
                 for analysis in analyses:
                     idx = analysis.get('index', 0)
-                    if 0 <= idx < len(news_batch):
+                    if 0 <= idx < included:
                         news_batch[idx]['ai_score'] = analysis.get('importance_score', 5.0)
                         news_batch[idx]['summary_jp'] = analysis.get('japanese_summary', '')
-                
-                return news_batch
             
         except Exception as e:
             print(f"⚠️ バッチAI分析エラー: {e}")
             # フォールバック: 基本スコアを使用
-            for news in news_batch:
-                news['ai_score'] = news.get('base_score', 5.0)
-                news['summary_jp'] = f"{news['title'][:30]}..."
+            self._apply_base_scores(news_batch[:included])
         
+        if included < len(news_batch):
+            await self.batch_analyze_with_ai(news_batch[included:])
         return news_batch
+    
+    def _apply_base_scores(self, news_list: List[Dict]) -> None:
+        """AI分析できなかった記事に基本スコアと仮の要約を設定"""
+        for news in news_list:
+            news['ai_score'] = news.get('base_score', 5.0)
+            news['summary_jp'] = f"{news['title'][:30]}..."
 
-    async def analyze_news_efficient(self, news_list: List[Dict]) -> List[Dict]:
-        """効率化されたニュース分析"""
-        print(f"📊 効率化分析開始: {len(news_list)}件")
+    def check_saved_analyses(self, filtered_news: List[Dict]) -> List[int]:
+        """
+        保存済み分析結果のチェック（記事ストア未登録の記事はここで登録）
         
-        # 1. 段階的フィルタリング
-        print("🔍 段階的フィルタリング実行中...")
-        filtered_news = self.apply_quick_filters(news_list)
-        print(f"   ✅ フィルタリング後: {len(filtered_news)}件 (削減率: {((len(news_list)-len(filtered_news))/len(news_list)*100):.1f}%)")
+        内容が変わっていない記事には保存済みの分析結果を反映する。
         
-        # 2. キャッシュチェック
-        print("💾 キャッシュチェック中...")
-        cache_hits = 0
-        ai_analysis_needed = []
-        
-        for news in filtered_news:
-            cache_key = self.get_cache_key(news)
-            if cache_key in self.cache:
-                # キャッシュヒット
-                cached_data = self.cache[cache_key]
-                news.update(cached_data)
-                cache_hits += 1
-            else:
-                ai_analysis_needed.append(news)
-        
-        print(f"   ✅ キャッシュヒット: {cache_hits}件, AI分析必要: {len(ai_analysis_needed)}件")
-        
-        # 3. バッチAI分析
-        if ai_analysis_needed:
-            print("🤖 バッチAI分析実行中...")
-            batch_size = 10  # 10件ずつバッチ処理
+        Args:
+            filtered_news (List[Dict]): フィルタリング後の記事
+        
+        Returns:
+            List[int]: AI分析が必要な記事（新規・更新）の位置
+        """
+        unregistered = [news for news in filtered_news if not news.get('url_hash')]
+        if unregistered:
+            self.article_store.upsert_articles(unregistered)
+        ai_analysis_needed, reused = self.article_store.split_for_analysis(filtered_news)
+        record_cache_lookup("summary", hits=len(reused), misses=len(ai_analysis_needed))
+        
+        print(f"   ✅ 再利用: {len(reused)}件, AI分析必要（新規・更新）: {len(ai_analysis_needed)}件")
+        needed_ids = {id(news) for news in ai_analysis_needed}
+        return [i for i, news in enumerate(filtered_news) if id(news) in needed_ids]
+    
+    async def analyze_pending(self, news_list: List[Dict], pending: List[int], batch_size: int = 10) -> None:
+        """
+        AI分析が必要な記事をバッチで分析し、結果を記事と記事ストアに反映
+        
+        Args:
+            news_list (List[Dict]): 記事
+            pending (List[int]): AI分析が必要な記事の位置
+            batch_size (int): 1回のAI分析で扱う件数
+        """
+        ai_analysis_needed = [news_list[i] for i in pending]
+        for i in range(0, len(ai_analysis_needed), batch_size):
+            batch = ai_analysis_needed[i:i+batch_size]
+            analyzed_batch = await self.batch_analyze_with_ai(batch)
             
-            for i in range(0, len(ai_analysis_needed), batch_size):
-                batch = ai_analysis_needed[i:i+batch_size]
-                analyzed_batch = await self.batch_analyze_with_ai(batch)
-                
-                # キャッシュに保存
-                for news in analyzed_batch:
-                    cache_key = self.get_cache_key(news)
-                    self.cache[cache_key] = {
-                        'ai_score': news.get('ai_score', 5.0),
-                        'summary_jp': news.get('summary_jp', '')
-                    }
+            # 記事ストアに保存
+            self.article_store.save_analyses(analyzed_batch)
+    
+    def compute_final_scores(self, news_list: List[Dict]) -> List[Dict]:
+        """
+        最終スコアを計算してスコア順に並べる
         
-        # 4. 最終スコア計算
-        print("📊 最終スコア計算中...")
-        for news in filtered_news:
+        Args:
+            news_list (List[Dict]): 分析済みの記事（base_score, ai_score）
+        
+        Returns:
+            List[Dict]: スコア順の記事（同じリストを並べ替えて返す）
+        """
+        for news in news_list:
             base_score = news.get('base_score', 5.0)
             ai_score = news.get('ai_score', 5.0)
             
@@ -308,11 +324,30 @@ class EfficientNewsAnalyzer:
             final_score = ((base_score + ai_score) / 2) * multiplier
             news['score'] = round(final_score, 1)
         
-        # 5. キャッシュ保存
-        self.save_cache()
+        news_list.sort(key=lambda x: x['score'], reverse=True)
+        return news_list
+    
+    async def analyze_news_efficient(self, news_list: List[Dict]) -> List[Dict]:
+        """効率化されたニュース分析"""
+        print(f"📊 効率化分析開始: {len(news_list)}件")
         
-        # 6. スコア順ソート
-        filtered_news.sort(key=lambda x: x['score'], reverse=True)
+        # 1. 段階的フィルタリング
+        print("🔍 段階的フィルタリング実行中...")
+        filtered_news = self.apply_quick_filters(news_list)
+        print(f"   ✅ フィルタリング後: {len(filtered_news)}件 (削減率: {((len(news_list)-len(filtered_news))/len(news_list)*100):.1f}%)")
+        
+        # 2. 保存済み分析結果のチェック
+        print("💾 保存済み分析結果チェック中...")
+        pending = self.check_saved_analyses(filtered_news)
+        
+        # 3. バッチAI分析（10件ずつ）
+        if pending:
+            print("🤖 バッチAI分析実行中...")
+            await self.analyze_pending(filtered_news, pending)
+        
+        # 4. 最終スコア計算
+        print("📊 最終スコア計算中...")
+        self.compute_final_scores(filtered_news)
         
         print(f"✅ 効率化分析完了: 最高スコア {filtered_news[0]['score']:.1f}")
         return filtered_news
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプラインのステージ実行（DAG）
+
+各ステージを入力・出力の名前で宣言し、依存関係の順に実行します。
+
+- 入力がそろったステージから実行し、互いに依存しないステージは並行して実行する
+- 各ステージの出力は実行ごとのディレクトリにJSONで保存（チェックポイント）
+- 同じ run_id で再実行すると、入力が同じステージは保存済みの出力を再利用する
+  （途中のステージで失敗しても、最初からやり直す必要はない）
+- ステージごとの所要時間を表にして表示する（各ステージは "stage" スパンとしても記録する）
+
+ステージの関数は入力を同名のキーワード引数で受け取り、出力が1つならその値を、
+複数ならば出力名をキーとする辞書を返す。同期関数はスレッドで、コルーチン関数はそのまま実行する。
+入力の値は他のステージと共有されるため、ステージ内で変更しないこと。
+
+使い方:
+    dag = PipelineDAG("ai_news")
+    dag.add_stage("collect", collect_news, outputs=("raw_news",))
+    dag.add_stage("filter", filter_news, inputs=("raw_news",), outputs=("filtered",))
+    run = asyncio.run(dag.run(run_id="20250101_090000"))
+    print(run.timing_table())
+"""
+
+import asyncio
+import hashlib
+import inspect
+import os
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cache_store import dumps, loads
+from instrumentation import span
+from atomic_io import write_atomic
+
+
+DEFAULT_CHECKPOINT_DIR = os.path.join("cache", "pipeline")
+
+STATUS_LABELS = {
+    "completed": "実行",
+    "restored": "再利用",
+    "failed": "失敗",
+    "skipped": "未実行"
+}
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """全角文字を2桁として表示幅をそろえる"""
+    used = sum(2 if unicodedata.east_asian_width(char) in ("F", "W") else 1 for char in text)
+    padding = " " * max(width - used, 0)
+    return padding + text if right else text + padding
+
+
+@dataclass
+class Stage:
+    """パイプラインのステージ"""
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    checkpoint: bool = True  # 出力をJSONで保存できない場合は False
+
+
+@dataclass
+class StageResult:
+    """ステージの実行結果"""
+    name: str
+    status: str          # completed / restored / failed / skipped
+    started: float = 0.0  # パイプライン開始からの経過秒数
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineRun:
+    """パイプラインの実行結果"""
+    name: str
+    run_id: str
+    run_dir: str
+    values: Dict[str, Any]
+    results: List[StageResult] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        """全ステージが実行済み（または再利用）か"""
+        return all(result.status in ("completed", "restored") for result in self.results)
+
+    @property
+    def failed_stages(self) -> List[StageResult]:
+        """失敗したステージ"""
+        return [result for result in self.results if result.status == "failed"]
+
+    def timing_table(self) -> str:
+        """
+        ステージごとの所要時間の表
+
+        Returns:
+            str: 表（開始順）
+        """
+        width = max([len(result.name) for result in self.results] + [len("ステージ") * 2])
+        lines = ["  ".join([_pad("ステージ", width), _pad("状態", 6), _pad("開始(秒)", 9, True), _pad("所要(秒)", 9, True)])]
+        for result in sorted(self.results, key=lambda r: (r.status == "skipped", r.started)):
+            status = _pad(STATUS_LABELS.get(result.status, result.status), 6)
+            if result.status == "skipped":
+                lines.append(f"{_pad(result.name, width)}  {status}")
+            else:
+                lines.append(f"{_pad(result.name, width)}  {status}  {result.started:>9.2f}  {result.duration:>9.2f}")
+        lines.append(f"{_pad('合計', width)}  {'':<6}  {'':>9}  {self.duration:>9.2f}")
+        return "\n".join(lines)
+
+
+class PipelineDAG:
+    """
+    入力・出力で宣言したステージを依存関係の順に実行するパイプライン
+    """
+
+    def __init__(self, name: str, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR):
+        """
+        初期化
+
+        Args:
+            name (str): パイプライン名（チェックポイントのディレクトリ名）
+            checkpoint_dir (str): チェックポイントの保存先
+        """
+        self.name = name
+        self.checkpoint_dir = checkpoint_dir
+        self.stages: Dict[str, Stage] = {}
+        self._producers: Dict[str, str] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+                  outputs: Optional[Sequence[str]] = None, checkpoint: bool = True) -> Stage:
+        """
+        ステージを追加
+
+        Args:
+            name (str): ステージ名
+            func (Callable): 入力をキーワード引数で受け取る関数（同期・コルーチンどちらも可）
+            inputs: 入力名（他のステージの出力、または run() の params）
+            outputs: 出力名（省略時はステージ名）
+            checkpoint (bool): 出力を保存して再実行時に再利用するか
+
+        Returns:
+            Stage: 追加したステージ
+
+        Raises:
+            ValueError: ステージ名・出力名が重複している場合
+        """
+        if name in self.stages:
+            raise ValueError(f"ステージ名が重複しています: {name}")
+        outputs = tuple(outputs) if outputs is not None else (name,)
+        for output in outputs:
+            if output in self._producers:
+                raise ValueError(f"出力 {output} は既にステージ {self._producers[output]} が出力しています")
+
+        stage = Stage(name=name, func=func, inputs=tuple(inputs), outputs=outputs, checkpoint=checkpoint)
+        self.stages[name] = stage
+        for output in outputs:
+            self._producers[output] = name
+        return stage
+
+    def stage(self, name: str, inputs: Sequence[str] = (), outputs: Optional[Sequence[str]] = None,
+              checkpoint: bool = True) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """add_stage() のデコレータ版"""
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            self.add_stage(name, func, inputs, outputs, checkpoint)
+            return func
+        return decorator
+
+    def validate(self, params: Iterable[str] = ()) -> List[str]:
+        """
+        依存関係を検証し、トポロジカル順のステージ名を返す
+
+        Args:
+            params: run() で渡す初期値の名前
+
+        Returns:
+            List[str]: 実行可能な順（追加順を保つ）
+
+        Raises:
+            ValueError: 入力が用意されない、または依存関係が循環している場合
+        """
+        available = set(params)
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in self._producers and name not in available:
+                    raise ValueError(f"ステージ {stage.name} の入力 {name} を出力するステージがありません")
+
+        order: List[str] = []
+        produced = set(available)
+        remaining = list(self.stages.values())
+        while remaining:
+            ready = [stage for stage in remaining if all(name in produced for name in stage.inputs)]
+            if not ready:
+                raise ValueError(f"ステージの依存関係が循環しています: {', '.join(stage.name for stage in remaining)}")
+            for stage in ready:
+                order.append(stage.name)
+                produced.update(stage.outputs)
+                remaining.remove(stage)
+        return order
+
+    def run_dir(self, run_id: str) -> str:
+        """実行ごとのチェックポイントディレクトリ"""
+        return os.path.join(self.checkpoint_dir, self.name, run_id)
+
+    def latest_run_id(self) -> Optional[str]:
+        """
+        最後に実行した run_id（再開用）
+
+        Returns:
+            Optional[str]: run_id（実行記録が無い場合はNone）
+        """
+        base = os.path.join(self.checkpoint_dir, self.name)
+        if not os.path.isdir(base):
+            return None
+        runs = [entry for entry in os.scandir(base) if entry.is_dir()]
+        if not runs:
+            return None
+        return max(runs, key=lambda entry: entry.stat().st_mtime).name
+
+    @staticmethod
+    def _fingerprint(stage: Stage, inputs: Dict[str, Any]) -> str:
+        """ステージと入力値のハッシュ（入力が変わったらチェックポイントを使わない）"""
+        return hashlib.sha1(dumps([stage.name, stage.outputs, [inputs[name] for name in stage.inputs]])).hexdigest()
+
+    @staticmethod
+    def _read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+        """チェックポイントを読み込み（無い・壊れている場合はNone）"""
+        try:
+            with open(path, 'rb') as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    async def _execute(self, stage: Stage, inputs: Dict[str, Any], run_dir: str,
+                       force: bool) -> Tuple[str, Dict[str, Any]]:
+        """
+        ステージを実行（チェックポイントがあれば再利用）
+
+        Returns:
+            Tuple[str, Dict]: (状態, 出力名 → 値)
+        """
+        with span(f"{self.name}.{stage.name}", "stage", pipeline=self.name) as current:
+            status, outputs = await self._execute_stage(stage, inputs, run_dir, force)
+            current.set(result=status)
+            return status, outputs
+
+    async def _execute_stage(self, stage: Stage, inputs: Dict[str, Any], run_dir: str,
+                             force: bool) -> Tuple[str, Dict[str, Any]]:
+        """_execute() の本体（スパンの内側で実行）"""
+        path = os.path.join(run_dir, f"{stage.name}.json")
+        fingerprint = self._fingerprint(stage, inputs) if stage.checkpoint else None
+
+        if stage.checkpoint and not force:
+            saved = await asyncio.to_thread(self._read_checkpoint, path)
+            if saved and saved.get("fingerprint") == fingerprint:
+                return "restored", saved["outputs"]
+
+        if inspect.iscoroutinefunction(stage.func):
+            returned = await stage.func(**inputs)
+        else:
+            returned = await asyncio.to_thread(stage.func, **inputs)
+
+        if len(stage.outputs) == 1:
+            outputs = {stage.outputs[0]: returned}
+        elif isinstance(returned, dict) and all(name in returned for name in stage.outputs):
+            outputs = {name: returned[name] for name in stage.outputs}
+        else:
+            raise TypeError(f"ステージ {stage.name} は {', '.join(stage.outputs)} をキーとする辞書を返す必要があります")
+
+        if stage.checkpoint:
+            checkpoint = {
+                "stage": stage.name,
+                "fingerprint": fingerprint,
+                "completed_at": datetime.now().isoformat(),
+                "outputs": outputs
+            }
+            await asyncio.to_thread(write_atomic, path, dumps(checkpoint))
+        return "completed", outputs
+
+    async def run(self, params: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None,
+                  force: Iterable[str] = (), max_concurrency: Optional[int] = None) -> PipelineRun:
+        """
+        パイプラインを実行
+
+        ステージが失敗した場合、実行中の他のステージは最後まで実行し（チェックポイントを残す）、
+        新しいステージは開始しない。失敗したステージに依存するステージは未実行になる。
+
+        Args:
+            params (Dict): 初期値（ステージの入力として使える）
+            run_id (str): 実行ID（同じIDで再実行すると保存済みの出力を再利用、省略時は新規）
+            force: チェックポイントを使わずに再実行するステージ名
+            max_concurrency (int): 同時に実行するステージ数の上限（省略時は無制限）
+
+        Returns:
+            PipelineRun: 実行結果（各ステージの状態・所要時間と、全ステージの出力）
+
+        Raises:
+            ValueError: 依存関係が不正な場合、または force に存在しないステージ名がある場合
+        """
+        params = dict(params or {})
+        order = self.validate(params)
+        force = set(force)
+        unknown = force - set(self.stages)
+        if unknown:
+            raise ValueError(f"存在しないステージです: {', '.join(sorted(unknown))}")
+
+        run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_dir = self.run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+
+        pipeline_run = PipelineRun(name=self.name, run_id=run_id, run_dir=run_dir, values=params)
+        values = pipeline_run.values
+        pending = list(order)
+        running: Dict[asyncio.Task, Tuple[Stage, float]] = {}
+        failed = False
+        started = time.perf_counter()
+
+        while pending or running:
+            if not failed:
+                for name in list(pending):
+                    if max_concurrency is not None and len(running) >= max_concurrency:
+                        break
+                    stage = self.stages[name]
+                    if all(input_name in values for input_name in stage.inputs):
+                        pending.remove(name)
+                        inputs = {input_name: values[input_name] for input_name in stage.inputs}
+                        task = asyncio.create_task(self._execute(stage, inputs, run_dir, name in force))
+                        running[task] = (stage, time.perf_counter())
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage, stage_started = running.pop(task)
+                result = StageResult(name=stage.name, status="completed",
+                                     started=stage_started - started,
+                                     duration=time.perf_counter() - stage_started)
+                try:
+                    result.status, outputs = task.result()
+                    values.update(outputs)
+                    print(f"   {'♻️' if result.status == 'restored' else '✅'} {stage.name}: "
+                          f"{STATUS_LABELS[result.status]} ({result.duration:.2f}秒)")
+                except Exception as e:
+                    result.status = "failed"
+                    result.error = f"{type(e).__name__}: {e}"
+                    failed = True
+                    print(f"   ❌ {stage.name}: 失敗 - {result.error}")
+                pipeline_run.results.append(result)
+
+        pipeline_run.results.extend(StageResult(name=name, status="skipped") for name in pending)
+        pipeline_run.duration = time.perf_counter() - started
+        return pipeline_run
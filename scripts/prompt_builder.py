@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+トークン予算ベースのプロンプト構築
+
+固定文字数での切り詰め（full_text[:800] 等）の代わりに、
+Qwen3のトークナイザでトークン数を数え、呼び出し種別ごとの
+予算いっぱいまで記事情報を詰め込みます。
+切り詰めは文境界で行い、使用した予算はレポートとして記録します。
+"""
+
+import json
+import math
+import os
+import re
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
+
+# HuggingFace tokenizersのインポート（フォールバック対応）
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+
+# 呼び出し種別ごとのデフォルトのプロンプト予算（トークン）
+DEFAULT_PROMPT_BUDGETS = {
+    "article_summary": 1024,
+    "batch_analysis": 6144,
+    "weekly_summary": 3072,
+    "news_weekly_summary": 3072
+}
+
+# Ollamaのモデル名 → HuggingFaceのトークナイザ名
+# Qwen3系は全サイズで同じトークナイザを共有している
+DEFAULT_TOKENIZER_MAP = {
+    "qwen3": "Qwen/Qwen3-8B"
+}
+
+# 文境界（日本語の句点・感嘆符と英語の終止符）
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[。！？!?\n])|(?<=\.)(?=\s)')
+
+# トークナイザが利用できない場合の概算用パターン
+_CJK_PATTERN = re.compile(r'[぀-ゟ゠-ヿ一-龯＀-￯]')
+_WORD_PATTERN = re.compile(r'[A-Za-z0-9]+')
+_SYMBOL_PATTERN = re.compile(r'[^\sA-Za-z0-9぀-ゟ゠-ヿ一-龯＀-￯]')
+
+# 読み込み済みトークナイザ（プロセス内で共有）
+_tokenizer_cache: Dict[str, Any] = {}
+
+
+@dataclass
+class PromptBudgetReport:
+    """プロンプト予算の使用状況"""
+    call_type: str
+    budget: int
+    used_tokens: int
+    template_tokens: int
+    items_total: int
+    items_included: int
+    items_truncated: int
+    tokenizer: str
+
+    @property
+    def utilization(self) -> float:
+        """予算使用率"""
+        return self.used_tokens / self.budget if self.budget else 0.0
+
+
+class PromptBuilder:
+    """
+    トークナイザを用いたプロンプト構築
+    """
+
+    def __init__(self, model_name: str = "qwen3:30b-a3b",
+                 budgets: Optional[Dict[str, int]] = None,
+                 tokenizer_name: Optional[str] = None,
+                 verbose: bool = True):
+        """
+        初期化
+
+        Args:
+            model_name (str): Ollamaのモデル名
+            budgets (Dict[str, int]): 呼び出し種別ごとのプロンプト予算（トークン）
+            tokenizer_name (str): tokenizer.json のパス、またはHuggingFaceのトークナイザ名
+                                  （省略時はモデル名から推定）
+            verbose (bool): 予算使用状況を表示するか
+        """
+        self.model_name = model_name
+        self.budgets = dict(DEFAULT_PROMPT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.verbose = verbose
+        self.tokenizer_name = tokenizer_name or self._resolve_tokenizer_name(model_name)
+        # トークナイザは最初にトークン数を数えるときに読み込む（Hubからの取得を初期化で待たない）
+        self._tokenizer = None
+        self._tokenizer_loaded = False
+        self.reports: Dict[str, PromptBudgetReport] = {}
+
+    @classmethod
+    def from_llm_config(cls, llm_config: Dict[str, Any], **kwargs) -> "PromptBuilder":
+        """
+        settings.jsonのlocal_llm設定から生成
+
+        Args:
+            llm_config (Dict): data_sources.local_llm の設定
+
+        Returns:
+            PromptBuilder: プロンプトビルダー
+        """
+        return cls(
+            model_name=llm_config.get("model_name", "qwen3:30b-a3b"),
+            budgets=llm_config.get("prompt_budgets", {}),
+            tokenizer_name=llm_config.get("tokenizer"),
+            **kwargs
+        )
+
+    @classmethod
+    def from_settings(cls, config_path: str = "config/settings.json", **kwargs) -> "PromptBuilder":
+        """
+        設定ファイルから生成（ファイルが無い場合はデフォルト設定）
+
+        Args:
+            config_path (str): 設定ファイルのパス
+
+        Returns:
+            PromptBuilder: プロンプトビルダー
+        """
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            llm_config = config.get("data_sources", {}).get("local_llm", {})
+        except (OSError, ValueError):
+            llm_config = {}
+        return cls.from_llm_config(llm_config, **kwargs)
+
+    def _resolve_tokenizer_name(self, model_name: str) -> Optional[str]:
+        """モデル名からトークナイザ名を推定"""
+        base_name = model_name.split("/")[-1].split(":")[0].lower()
+        return DEFAULT_TOKENIZER_MAP.get(base_name)
+
+    def _load_tokenizer(self, tokenizer_name: Optional[str]):
+        """
+        トークナイザを読み込み（失敗時は概算モード）
+
+        ローカルの tokenizer.json（またはそれを含むディレクトリ）があればそれを使い、
+        無ければHuggingFace Hubから取得する。結果はプロセス内で共有する。
+        """
+        if not tokenizer_name or not TOKENIZERS_AVAILABLE:
+            return None
+
+        if tokenizer_name in _tokenizer_cache:
+            return _tokenizer_cache[tokenizer_name]
+
+        local_path = os.path.join(tokenizer_name, "tokenizer.json") if os.path.isdir(tokenizer_name) else tokenizer_name
+        try:
+            if os.path.isfile(local_path):
+                tokenizer = Tokenizer.from_file(local_path)
+            else:
+                tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+        except Exception as e:
+            print(f"⚠️ トークナイザ読み込み失敗（概算モードを使用）: {e}")
+            tokenizer = None
+
+        _tokenizer_cache[tokenizer_name] = tokenizer
+        return tokenizer
+
+    @property
+    def tokenizer(self):
+        """トークナイザ（初回アクセス時に読み込み）"""
+        if not self._tokenizer_loaded:
+            self._tokenizer = self._load_tokenizer(self.tokenizer_name)
+            self._tokenizer_loaded = True
+        return self._tokenizer
+
+    @property
+    def tokenizer_label(self) -> str:
+        """使用中のトークナイザ名（未読み込みの場合は読み込まずに予定のものを返す）"""
+        if not self._tokenizer_loaded:
+            return self.tokenizer_name if self.tokenizer_name and TOKENIZERS_AVAILABLE else "estimate"
+        return self.tokenizer_name if self._tokenizer else "estimate"
+
+    def budget_for(self, call_type: str) -> int:
+        """呼び出し種別のプロンプト予算を取得"""
+        return int(self.budgets.get(call_type, DEFAULT_PROMPT_BUDGETS["article_summary"]))
+
+    def count_tokens(self, text: str) -> int:
+        """
+        テキストのトークン数を数える
+
+        Args:
+            text (str): 対象テキスト
+
+        Returns:
+            int: トークン数
+        """
+        if not text:
+            return 0
+
+        if self.tokenizer:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+        # 概算: CJK文字は1文字1トークン、英数字は4文字で1トークン、記号は1トークン
+        cjk_tokens = len(_CJK_PATTERN.findall(text))
+        word_tokens = sum(math.ceil(len(word) / 4) for word in _WORD_PATTERN.findall(text))
+        symbol_tokens = len(_SYMBOL_PATTERN.findall(text))
+        return cjk_tokens + word_tokens + symbol_tokens
+
+    def split_sentences(self, text: str) -> List[str]:
+        """テキストを文単位に分割"""
+        return [s for s in SENTENCE_BOUNDARY_PATTERN.split(text) if s and s.strip()]
+
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> Tuple[str, bool]:
+        """
+        文境界でトークン数上限まで切り詰める
+
+        Args:
+            text (str): 対象テキスト
+            max_tokens (int): 最大トークン数
+
+        Returns:
+            Tuple[str, bool]: 切り詰め後テキストと、切り詰めが発生したか
+        """
+        text = (text or "").strip()
+        if max_tokens <= 0:
+            return "", bool(text)
+        if self.count_tokens(text) <= max_tokens:
+            return text, False
+
+        kept = []
+        used = 0
+        for sentence in self.split_sentences(text):
+            sentence_tokens = self.count_tokens(sentence)
+            if used + sentence_tokens > max_tokens:
+                break
+            kept.append(sentence)
+            used += sentence_tokens
+
+        if kept:
+            return "".join(kept).strip(), True
+
+        # 先頭の1文だけで上限を超える場合は文字単位で二分探索
+        first_sentence = self.split_sentences(text)[0]
+        low, high = 0, len(first_sentence)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count_tokens(first_sentence[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return first_sentence[:low].strip(), True
+
+    def fill(self, call_type: str, template: str, slot: str, text: str) -> str:
+        """
+        テンプレートの1スロットを予算いっぱいまで埋める
+
+        Args:
+            call_type (str): 呼び出し種別（予算キー）
+            template (str): {スロット名} を含むテンプレート
+            slot (str): 埋めるスロット名
+            text (str): スロットに入れるテキスト
+
+        Returns:
+            str: 完成したプロンプト
+        """
+        budget = self.budget_for(call_type)
+        template_tokens = self.count_tokens(self._render(template, slot, ""))
+        fitted, truncated = self.truncate_to_tokens(text, budget - template_tokens)
+        prompt = self._render(template, slot, fitted)
+
+        self._record(PromptBudgetReport(
+            call_type=call_type,
+            budget=budget,
+            used_tokens=template_tokens + self.count_tokens(fitted),
+            template_tokens=template_tokens,
+            items_total=1,
+            items_included=1 if fitted else 0,
+            items_truncated=1 if truncated else 0,
+            tokenizer=self.tokenizer_label
+        ))
+        return prompt
+
+    def pack(self, call_type: str, template: str, slot: str,
+             items: List[Tuple[str, str]], separator: str = "\n",
+             mode: str = "fair", min_body_tokens: int = 8) -> Tuple[str, int]:
+        """
+        複数の記事をテンプレートの1スロットに予算いっぱいまで詰め込む
+
+        各アイテムは (見出し, 本文) の組で、見出しは切り詰めず本文のみ文境界で切り詰める。
+
+        Args:
+            call_type (str): 呼び出し種別（予算キー）
+            template (str): {スロット名} を含むテンプレート
+            slot (str): 埋めるスロット名
+            items (List[Tuple[str, str]]): (見出し, 本文) のリスト（優先順）
+            separator (str): アイテム間の区切り
+            mode (str): "fair" = 全アイテムを含め本文予算を均等配分
+                        （見出しだけで予算を超える場合は "greedy" と同じ扱い）,
+                        "greedy" = 優先順に入るだけ含める
+            min_body_tokens (int): 本文を含める最小トークン数
+
+        Returns:
+            Tuple[str, int]: 完成したプロンプトと、含めたアイテム数
+        """
+        budget = self.budget_for(call_type)
+        template_tokens = self.count_tokens(self._render(template, slot, ""))
+        separator_tokens = self.count_tokens(separator)
+        available = budget - template_tokens
+
+        head_tokens = [self.count_tokens(head) + separator_tokens for head, _ in items]
+        body_tokens = [self.count_tokens(body) for _, body in items]
+
+        if mode == "fair" and sum(head_tokens) <= available:
+            included = len(items)
+            allotments = self._water_fill(body_tokens, available - sum(head_tokens))
+        else:
+            included = 0
+            allotments = []
+            remaining = available
+            for head_cost, body_cost in zip(head_tokens, body_tokens):
+                if remaining < head_cost + min(body_cost, min_body_tokens):
+                    break
+                allotment = min(body_cost, remaining - head_cost)
+                allotments.append(allotment)
+                remaining -= head_cost + allotment
+                included += 1
+
+        entries = []
+        truncated_count = 0
+        for (head, body), body_cost, allotment in zip(items[:included], body_tokens, allotments):
+            fitted_body = ""
+            if allotment > 0 and allotment >= min(body_cost, min_body_tokens):
+                fitted_body, truncated = self.truncate_to_tokens(body, allotment)
+                truncated_count += 1 if truncated else 0
+            elif body:
+                truncated_count += 1
+            entries.append(head + fitted_body)
+
+        filled = separator.join(entries)
+        prompt = self._render(template, slot, filled)
+
+        self._record(PromptBudgetReport(
+            call_type=call_type,
+            budget=budget,
+            used_tokens=template_tokens + self.count_tokens(filled),
+            template_tokens=template_tokens,
+            items_total=len(items),
+            items_included=included,
+            items_truncated=truncated_count,
+            tokenizer=self.tokenizer_label
+        ))
+        return prompt, included
+
+    def _render(self, template: str, slot: str, value: str) -> str:
+        """テンプレートのスロットを置換（JSON例などの波括弧はそのまま残す）"""
+        return template.replace("{" + slot + "}", value)
+
+    def _water_fill(self, demands: List[int], capacity: int) -> List[int]:
+        """
+        予算を均等配分し、短いアイテムの余りを長いアイテムへ回す
+
+        Args:
+            demands (List[int]): 各アイテムの本文トークン数
+            capacity (int): 本文に使える合計トークン数
+
+        Returns:
+            List[int]: 各アイテムへの割当トークン数
+        """
+        allotments = [0] * len(demands)
+        remaining = max(capacity, 0)
+        pending = sorted(range(len(demands)), key=lambda i: demands[i])
+
+        while pending:
+            share = remaining // len(pending)
+            index = pending[0]
+            if demands[index] <= share:
+                allotments[index] = demands[index]
+                remaining -= demands[index]
+                pending.pop(0)
+            else:
+                for index in pending:
+                    allotments[index] = share
+                break
+
+        return allotments
+
+    def _record(self, report: PromptBudgetReport) -> None:
+        """予算使用状況を記録"""
+        self.reports[report.call_type] = report
+        if self.verbose:
+            print(f"📏 プロンプト予算 [{report.call_type}]: {report.used_tokens}/{report.budget} tokens "
+                  f"(記事 {report.items_included}/{report.items_total}件, 切り詰め {report.items_truncated}件, "
+                  f"{report.tokenizer})")
+
+    def get_budget_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        直近の予算使用状況を取得
+
+        Returns:
+            Dict: 呼び出し種別ごとの使用状況
+        """
+        return {
+            call_type: dict(asdict(report), utilization=round(report.utilization, 3))
+            for call_type, report in self.reports.items()
+        }
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KVキャッシュを活かすプロンプトテンプレートと呼び出し種別ごとのOllamaオプション
+
+Ollamaは直前の呼び出しとプロンプトの先頭が一致する部分のKVキャッシュを再利用します。
+そのため各テンプレートは「静的な指示（共有プレフィックス）→ 可変データ → 静的な回答誘導」
+の順に並べ、記事テキストなどの可変部分が指示の途中に入らないようにしています。
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+
+# Qwen3Llmで全呼び出し共通のシステムプロンプト（常に先頭に置かれる）
+JAPANESE_SYSTEM_PROMPT = "必ず日本語で回答してください。英語や中国語は使用しないでください。"
+
+# モデルをメモリに保持する時間（フェーズ間で30Bモデルがアンロードされないように）
+DEFAULT_KEEP_ALIVE = "30m"
+
+# 呼び出し種別ごとのOllamaオプション
+# 注意: num_ctxが変わるとOllamaはモデルを再ロードするため、同一モデルでは値を揃えておく
+DEFAULT_CALL_PROFILES = {
+    "default": {"num_ctx": 8192, "num_predict": 1024, "temperature": 0.7},
+    "article_summary": {
+        "num_ctx": 8192, "num_predict": 80, "temperature": 0.3, "top_p": 0.9,
+        "top_k": 40, "repeat_penalty": 1.15, "seed": 42
+    },
+    "weekly_summary": {
+        "num_ctx": 8192, "num_predict": 400, "temperature": 0.4, "top_p": 0.9,
+        "repeat_penalty": 1.1
+    },
+    "batch_analysis": {"num_ctx": 8192, "num_predict": 2048, "temperature": 0.3},
+    "news_weekly_summary": {"num_ctx": 8192, "num_predict": 600, "temperature": 0.5},
+    "decomposition": {"num_ctx": 8192, "num_predict": 1024, "temperature": 0.5},
+    "reasoning": {"num_ctx": 8192, "num_predict": 1024, "temperature": 0.5},
+    "verification": {"num_ctx": 8192, "num_predict": 768, "temperature": 0.3},
+    "synthesis": {"num_ctx": 8192, "num_predict": 1024, "temperature": 0.5},
+    "cross_reference": {"num_ctx": 8192, "num_predict": 768, "temperature": 0.3},
+    "fact_check": {"num_ctx": 8192, "num_predict": 768, "temperature": 0.2}
+}
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    共有プレフィックス型のプロンプトテンプレート
+
+    Attributes:
+        call_type (str): 呼び出し種別（オプションプロファイル・予算のキー）
+        instructions (str): 静的な指示（全呼び出しで共通のプレフィックス）
+        sections (Tuple[Tuple[str, str], ...]): 可変データの (キー, 見出し) の並び
+        cue (str): 可変データの後に置く静的な回答誘導
+    """
+    call_type: str
+    instructions: str
+    sections: Tuple[Tuple[str, str], ...]
+    cue: str = ""
+
+    def render(self, **data: str) -> str:
+        """
+        可変データを埋めてプロンプトを生成
+
+        Returns:
+            str: 完成したプロンプト
+        """
+        parts = [self.instructions.strip()]
+        for key, label in self.sections:
+            parts.append(f"{label}:\n{data.get(key, '')}")
+        if self.cue:
+            parts.append(self.cue)
+        return "\n\n".join(parts)
+
+    def slot(self, key: str, **data: str) -> str:
+        """
+        1つのセクションを {key} のまま残したテンプレートを生成（PromptBuilder用）
+
+        Args:
+            key (str): 空けておくセクションのキー
+
+        Returns:
+            str: {key} を含むテンプレート
+        """
+        return self.render(**dict(data, **{key: "{" + key + "}"}))
+
+
+ARTICLE_SUMMARY = PromptTemplate(
+    call_type="article_summary",
+    instructions="""You are a professional Japanese business news summarizer.
+
+Task: Create a concise Japanese summary (max 50 characters) of the article below that includes:
+1. What happened (具体的な出来事)
+2. Who is involved (関係者・企業名)
+3. Key impact (重要な影響)
+
+Requirements:
+- Output ONLY the Japanese summary
+- No thinking, no explanation, no analysis
+- Direct answer only""",
+    sections=(("article", "Article"),),
+    cue="Japanese summary:"
+)
+
+WEEKLY_SUMMARY = PromptTemplate(
+    call_type="weekly_summary",
+    instructions="""以下は今週のAI業界ニュースです。全体的なトレンドと重要なポイントを日本語で300文字以内でまとめてください。
+業界全体の動向、主要企業の動き、注目すべき技術トレンドを含めて週間サマリーを作成してください。""",
+    sections=(("articles", "今週のニュース"),),
+    cue="週間サマリー:"
+)
+
+BATCH_ANALYSIS = PromptTemplate(
+    call_type="batch_analysis",
+    instructions="""以下のニュース記事群を分析し、各記事について以下の形式でJSONで回答してください：
+
+{
+  "analyses": [
+    {
+      "index": 0,
+      "importance_score": 5.5,
+      "japanese_summary": "記事の詳細要約（80-120文字程度）"
+    }
+  ]
+}
+
+評価基準：
+- AI/機械学習の技術革新: +2点
+- 大手企業の重要発表: +1.5点
+- 業界への影響度: +1点
+- 実用性・商用化: +1点""",
+    sections=(("articles", "記事一覧"),)
+)
+
+NEWS_WEEKLY_SUMMARY = PromptTemplate(
+    call_type="news_weekly_summary",
+    instructions="""以下のAI・テクノロジーニュースから週次サマリーを300-400文字で生成してください。
+
+要求：
+- 全体的なトレンドや傾向を分析
+- 主要企業の動向を含める
+- ビジネスへの影響を考慮
+- 読みやすく簡潔に
+- 必ず300-400文字以内""",
+    sections=(("articles", "今週の主要ニュース"), ("company_stats", "企業別ニュース数"))
+)
+
+DECOMPOSITION = PromptTemplate(
+    call_type="decomposition",
+    instructions="""あなたは高度な分析エキスパートです。末尾のトピックを体系的に分解してください。
+
+以下の構造で分解してください：
+1. 主要な分析軸（3-5個）
+2. 各軸での具体的質問
+3. 必要な情報源
+4. 分析の優先順位
+
+回答は以下のJSON形式で：
+{
+    "analysis_axes": [
+        {
+            "axis": "技術的側面",
+            "questions": ["具体的な技術は何か？", "革新性は？"],
+            "priority": 1
+        }
+    ],
+    "information_sources": ["ニュース記事", "技術文書"],
+    "complexity_level": "高",
+    "estimated_depth": 3
+}""",
+    sections=(("topic", "トピック"), ("context", "コンテキスト"))
+)
+
+AXIS_REASONING = PromptTemplate(
+    call_type="reasoning",
+    instructions="""末尾の分析軸について、列挙された質問を段階的に推論してください。
+
+推論プロセス:
+1. 各質問に対する初期回答
+2. 回答間の関連性分析
+3. 矛盾点の特定と解決
+4. 統合された結論
+
+回答は以下のJSON形式で（axis_nameには分析軸名をそのまま入れる）：
+{
+    "axis_name": "分析軸名",
+    "initial_answers": {"質問1": "回答1"},
+    "relationships": ["関連性1", "関連性2"],
+    "contradictions": ["矛盾点1"],
+    "integrated_conclusion": "統合結論",
+    "confidence": 0.8,
+    "reasoning_chain": ["推論ステップ1", "推論ステップ2"]
+}""",
+    sections=(("axis_name", "分析軸"), ("questions", "質問"))
+)
+
+CONSISTENCY_VERIFICATION = PromptTemplate(
+    call_type="verification",
+    instructions="""末尾の分析結果の一貫性と品質を検証してください。
+
+検証項目:
+1. 各軸の結論間に矛盾はないか？
+2. 信頼度スコアは適切か？
+3. 追加で必要な分析はあるか？
+4. 結論の根拠は十分か？
+
+検証結果をJSON形式で：
+{
+    "consistency_score": 0.8,
+    "contradictions_found": [],
+    "quality_issues": [],
+    "improvement_suggestions": [],
+    "verified_conclusions": {},
+    "overall_confidence": 0.8
+}""",
+    sections=(("axis_results", "分析結果"),)
+)
+
+SYNTHESIS = PromptTemplate(
+    call_type="synthesis",
+    instructions="""末尾の検証済み分析結果から最終的な回答を統合してください。
+
+要求:
+1. 各軸の結論を統合した包括的回答
+2. 信頼度の高い情報を優先
+3. 矛盾点は明記
+4. 300-500文字で簡潔に
+
+回答をJSON形式で：
+{
+    "answer": "統合された最終回答",
+    "confidence": 0.8,
+    "key_points": ["要点1", "要点2"],
+    "limitations": ["制限事項1"],
+    "synthesis_reasoning": ["統合理由1", "統合理由2"]
+}""",
+    sections=(("axis_results", "分析結果"), ("verification", "検証結果"))
+)
+
+CROSS_REFERENCE = PromptTemplate(
+    call_type="cross_reference",
+    instructions="""末尾の主張について、クロスリファレンス分析を実行してください。
+
+分析項目:
+1. この主張を支持する証拠・情報源
+2. この主張に矛盾する証拠・情報源
+3. 関連する既知の事実
+4. 検証に必要な追加情報
+
+回答をJSON形式で：
+{
+    "supporting_evidence": ["支持する証拠1", "支持する証拠2"],
+    "contradicting_evidence": ["矛盾する証拠1"],
+    "related_facts": ["関連事実1", "関連事実2"],
+    "sources": ["情報源1", "情報源2"],
+    "confidence": 0.8,
+    "analysis_summary": "分析の要約"
+}""",
+    sections=(("claim", "主張"), ("context", "コンテキスト"))
+)
+
+FACT_CHECK = PromptTemplate(
+    call_type="fact_check",
+    instructions="""末尾の主張のファクトチェックを実行してください。
+
+ファクトチェック項目:
+1. 主張の具体的な要素の検証
+2. 数値・日付・人名・企業名の正確性
+3. 論理的整合性
+4. 既知の事実との照合
+
+回答をJSON形式で：
+{
+    "fact_check_status": "accurate|partially_accurate|inaccurate|unverifiable",
+    "accuracy_score": 0.8,
+    "verified_facts": ["検証済み事実1"],
+    "disputed_facts": ["争点のある事実1"],
+    "logical_consistency": 0.9,
+    "fact_check_summary": "ファクトチェック要約"
+}""",
+    sections=(("claim", "主張"), ("supporting", "支持する証拠"), ("contradicting", "矛盾する証拠"))
+)
+
+
+class CallProfiles:
+    """
+    呼び出し種別ごとのOllamaオプションとkeep_alive設定
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                 keep_alive: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            profiles (Dict): 呼び出し種別ごとのオプション（デフォルトに上書きマージ）
+            keep_alive (str): Ollamaのkeep_alive値（例: "30m", "-1"で常駐）
+        """
+        self.profiles = {name: dict(options) for name, options in DEFAULT_CALL_PROFILES.items()}
+        for name, options in (profiles or {}).items():
+            self.profiles.setdefault(name, {}).update(options)
+        self.keep_alive = keep_alive or DEFAULT_KEEP_ALIVE
+
+    @classmethod
+    def from_llm_config(cls, llm_config: Dict[str, Any]) -> "CallProfiles":
+        """
+        settings.jsonのlocal_llm設定から生成
+
+        Args:
+            llm_config (Dict): data_sources.local_llm の設定
+
+        Returns:
+            CallProfiles: 呼び出しプロファイル
+        """
+        return cls(
+            profiles=llm_config.get("call_profiles", {}),
+            keep_alive=llm_config.get("keep_alive")
+        )
+
+    @classmethod
+    def from_settings(cls, config_path: str = "config/settings.json") -> "CallProfiles":
+        """
+        設定ファイルから生成（ファイルが無い場合はデフォルト設定）
+
+        Args:
+            config_path (str): 設定ファイルのパス
+
+        Returns:
+            CallProfiles: 呼び出しプロファイル
+        """
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            llm_config = config.get("data_sources", {}).get("local_llm", {})
+        except (OSError, ValueError):
+            llm_config = {}
+        return cls.from_llm_config(llm_config)
+
+    def options(self, call_type: str, **overrides) -> Dict[str, Any]:
+        """
+        呼び出し種別のOllamaオプションを取得
+
+        Args:
+            call_type (str): 呼び出し種別
+            **overrides: 個別に上書きするオプション
+
+        Returns:
+            Dict: Ollamaの options パラメータ
+        """
+        options = dict(self.profiles.get(call_type, self.profiles["default"]))
+        options.update(overrides)
+        return options
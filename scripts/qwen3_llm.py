@@ -2,6 +2,10 @@ import requests
 import json
 import re
 
+from prompt_templates import CallProfiles, JAPANESE_SYSTEM_PROMPT
+from llm_router import check_response, get_shared_router
+from instrumentation import annotate, record_ollama_usage
+
 class Qwen3Llm:
     """
     Qwen3 LLMラッパークラス
@@ -10,18 +14,29 @@ class Qwen3Llm:
     - Qwen3のthinking機能は"think": Falseパラメータで無効化
     - 生成速度の向上とレスポンスの簡潔化を実現
     - <think>タグが含まれる場合は正規表現で除去
+    
+    🔧 KVキャッシュ: 日本語指示はsystemに固定し、呼び出し間で共通のプレフィックスにする
+    - call_typeごとのnum_ctx/num_predictとkeep_aliveを送信
+    
+    🔧 負荷分散: settings.jsonのbackendsが設定されていれば共有ルーター経由で複数ホストに分散
+    - 未設定の場合はapi_urlのホストのみを使用
     """
-    def __init__(self, model="ollama/qwen3:30b-a3b", api_url="http://localhost:11434/api/generate"):
+    def __init__(self, model="ollama/qwen3:30b-a3b", api_url="http://localhost:11434/api/generate",
+                 call_profiles=None, router=None, request_timeout=(10, 300)):
         self.model = model
         self.api_url = api_url
+        base_url, _, api_path = api_url.partition("/api/")
+        self.api_path = "/api/" + api_path
+        self.router = router or get_shared_router(default_url=base_url)
+        self.request_timeout = request_timeout
+        self.call_profiles = call_profiles or CallProfiles.from_settings()
+        self.last_metrics = {}
 
-    async def generate_content_async(self, prompt, agent_name=None, show_progress=True, progress_callback=None, **kwargs):
+    async def generate_content_async(self, prompt, agent_name=None, show_progress=True, progress_callback=None,
+                                     call_type="default", **kwargs):
         import asyncio
         
         def sync_request():
-            # 日本語応答を強制するプロンプト指示を追加
-            enhanced_prompt = f"{prompt}\n\n※必ず日本語で回答してください。英語や中国語は使用しないでください。"
-            
             # 進捗表示開始
             if show_progress and agent_name:
                 print(f"🤖 {agent_name}が回答を生成中", end="", flush=True)
@@ -32,39 +47,68 @@ class Qwen3Llm:
                 if progress_callback:
                     progress_callback("🤖 AI回答を生成中")
             
-            response = requests.post(
-                self.api_url,
-                json={
-                    "model": self.model.split("/")[-1],
-                    "prompt": enhanced_prompt,
-                    "stream": True,
-                    "think": False,
-                    **kwargs
-                },
-                stream=True
-            )
+            # 日本語応答の指示はsystemに置き、プロンプト先頭を呼び出し間で共通にする
+            payload = {
+                "model": self.model.split("/")[-1],
+                "system": JAPANESE_SYSTEM_PROMPT,
+                "prompt": prompt,
+                "stream": True,
+                "think": False,
+                "keep_alive": self.call_profiles.keep_alive,
+                **kwargs
+            }
+            payload["options"] = self.call_profiles.options(call_type, **kwargs.get("options", {}))
             
-            full_response = ""
-            dot_count = 0
-            
-            try:
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            chunk = json.loads(line.decode('utf-8'))
-                            if 'response' in chunk:
-                                full_response += chunk['response']
+            def stream_from(backend):
+                """1台のバックエンドからストリーミング受信（フェイルオーバー時は最初から再受信）"""
+                with requests.post(
+                    f"{backend.url}{self.api_path}",
+                    json=payload,
+                    stream=True,
+                    timeout=self.request_timeout
+                ) as response:
+                    annotate(call_type=call_type, status=response.status_code)
+                    # 404（モデル未取得）・5xxは例外にして別ホストへフェイルオーバーする
+                    check_response(response)
+                    
+                    full_response = ""
+                    dot_count = 0
+                    received = 0
+                    
+                    for line in response.iter_lines():
+                        received += len(line)
+                        if line:
+                            try:
+                                chunk = json.loads(line.decode('utf-8'))
+                                if 'response' in chunk:
+                                    full_response += chunk['response']
                                 
-                                # 進捗表示（ドット追加）
-                                if show_progress:
-                                    dot_count += 1
-                                    if dot_count % 10 == 0:  # 10チャンクごとにドットを表示
-                                        print(".", end="", flush=True)
+                                    # 進捗表示（ドット追加）
+                                    if show_progress:
+                                        dot_count += 1
+                                        if dot_count % 10 == 0:  # 10チャンクごとにドットを表示
+                                            print(".", end="", flush=True)
                                 
-                                if chunk.get('done', False):
-                                    break
-                        except json.JSONDecodeError:
-                            continue
+                                    if chunk.get('done', False):
+                                        # プロンプト評価時間などの計測値を保持
+                                        self.last_metrics = {
+                                            "call_type": call_type,
+                                            "backend": backend.name,
+                                            "prompt_eval_count": chunk.get('prompt_eval_count', 0),
+                                            "prompt_eval_duration": chunk.get('prompt_eval_duration', 0),
+                                            "eval_count": chunk.get('eval_count', 0),
+                                            "eval_duration": chunk.get('eval_duration', 0),
+                                            "load_duration": chunk.get('load_duration', 0)
+                                        }
+                                        record_ollama_usage(chunk)
+                                        break
+                            except json.JSONDecodeError:
+                                continue
+                    annotate(bytes=received)
+                return full_response
+            
+            try:
+                full_response = self.router.call(stream_from, model=payload["model"], span_name="ollama.generate")
             finally:
                 # 完了メッセージ
                 if show_progress:
@@ -83,5 +127,5 @@ class Qwen3Llm:
             
             return full_response.strip()
         
-        # 非同期実行
-        return await asyncio.get_event_loop().run_in_executor(None, sync_request) 
\ No newline at end of file
+        # 非同期実行（to_threadは呼び出し元のスパンを引き継ぐ）
+        return await asyncio.to_thread(sync_request) 
\ No newline at end of file
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+レポートテンプレートのコンパイルとキャッシュ
+
+templates/report/ のテンプレートをプロセス内で1回だけ読み込み・コンパイルし、
+以降のレンダリングではコンパイル済みのものを使い回します。
+部門別ブリーフなど多数のバリエーションを生成しても、テンプレートの解析は初回のみです。
+
+- Jinja2でコンパイル（.html / .html.j2 はHTMLを自動エスケープ）
+- 空白制御は trim_blocks / lstrip_blocks / keep_trailing_newline
+
+値の整形（通貨・増減率・アイコン）はテンプレートではなくビューモデル（report_view）で行うため、
+テンプレートではフィルタを使わない。エスケープ済みの値は SafeText で渡す。
+"""
+
+import os
+import threading
+from typing import Any, Dict
+
+import jinja2
+
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'templates', 'report')
+
+# 自動エスケープするテンプレートの拡張子
+AUTOESCAPE_EXTENSIONS = ("html", "html.j2")
+
+
+class SafeText(str):
+    """
+    エスケープ済みの文字列（自動エスケープの対象外）
+
+    markupsafe と同じ __html__ プロトコルを実装しているため、Jinja2でもそのまま出力される。
+    """
+
+    def __html__(self) -> str:
+        return self
+
+
+class TemplateRegistry:
+    """
+    テンプレートディレクトリ単位のコンパイル済みテンプレート置き場
+    """
+
+    def __init__(self, template_dir: str = DEFAULT_TEMPLATE_DIR):
+        """
+        初期化
+
+        Args:
+            template_dir (str): テンプレートディレクトリ
+        """
+        self.template_dir = template_dir
+        self._templates: Dict[str, jinja2.Template] = {}
+        self._lock = threading.Lock()
+        self.environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(template_dir),
+            autoescape=jinja2.select_autoescape(enabled_extensions=AUTOESCAPE_EXTENSIONS,
+                                                default_for_string=False),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+            auto_reload=False  # 実行中にテンプレートを読み直さない
+        )
+
+    def get(self, name: str) -> jinja2.Template:
+        """
+        コンパイル済みテンプレートを取得（初回のみ読み込み・コンパイル）
+
+        Args:
+            name (str): テンプレートのファイル名
+
+        Returns:
+            jinja2.Template: コンパイル済みテンプレート
+        """
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                template = self.environment.get_template(name)
+                self._templates[name] = template
+            return template
+
+    def render(self, name: str, **context: Any) -> str:
+        """
+        テンプレートをレンダリング
+
+        Args:
+            name (str): テンプレートのファイル名
+            **context: テンプレート変数
+
+        Returns:
+            str: レンダリング結果
+        """
+        return self.get(name).render(**context)
+
+
+_registries: Dict[str, TemplateRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_template_registry(template_dir: str = DEFAULT_TEMPLATE_DIR) -> TemplateRegistry:
+    """
+    プロセス内で共有するテンプレート置き場を取得
+
+    Args:
+        template_dir (str): テンプレートディレクトリ
+
+    Returns:
+        TemplateRegistry: 共有のテンプレート置き場
+    """
+    key = os.path.abspath(template_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = TemplateRegistry(template_dir)
+            _registries[key] = registry
+        return registry
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+週次レポートのビューモデル
+
+統合データ（data/integrated_data.json）から、Markdown・HTML・Web用JSONで共通に使う
+表示用の値（通貨表記・増減率・アイコン・CSSクラス等）を1回だけ組み立てます。
+各出力形式は同じビューモデルをテンプレート（templates/report/）に渡すだけで、
+整形ロジックは持たない。
+
+整形は設定ファイルやLLM・外部APIに依存しないため、統合データさえあれば
+ネットワークに触れずにレポートを生成できる。
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from report_templates import get_template_registry
+
+
+MARKDOWN_TEMPLATE = "weekly-brief.md.j2"
+HTML_TEMPLATE = "weekly-brief.html.j2"
+
+# レポートに載せる主要ニュースの件数
+MAX_REPORT_ARTICLES = 8
+
+STOCK_NAMES = {
+    "N225": "日経平均株価",
+    "SPY": "S&P 500",
+    "RECRUIT": "リクルートHD"
+}
+# 円ではなくポイントで表示する指数
+POINT_TICKERS = {"SPY"}
+
+# Online Platform は万円まで表示し、グロスレベニューである旨とデータへのリンクを添える
+ONLINE_PLATFORM = "Online Platform"
+ONLINE_PLATFORM_DATA_URL = "https://idash.sandbox.indeed.net/workspace/88687/queries/2/visualizations/1"
+
+
+def format_japanese_currency(amount: int, detailed: bool = False) -> str:
+    """
+    日本円を日本式表記（億円、万円）でフォーマット
+
+    Args:
+        amount (int): 金額（円）
+        detailed (bool): 詳細表示（万円まで表示）
+
+    Returns:
+        str: フォーマットされた金額文字列
+    """
+    if amount >= 100000000:  # 1億円以上
+        oku = amount / 100000000
+        if detailed:
+            # 詳細表示：37億7,244万円のような形式
+            oku_part = int(amount // 100000000)
+            man_part = int((amount % 100000000) // 10000)
+            if man_part > 0:
+                return f"{oku_part}億{man_part:,}万円"
+            return f"{oku_part}億円"
+        # 通常表示
+        if oku >= 10:
+            return f"{oku:.0f}億円"
+        return f"{oku:.1f}億円"
+    elif amount >= 10000:  # 1万円以上
+        man = amount / 10000
+        if man >= 100:
+            return f"{man:.0f}万円"
+        return f"{man:.1f}万円"
+    return f"{amount:,}円"
+
+
+def _trend(value: float) -> str:
+    """増減の向き（CSSクラス名として使う）"""
+    return "positive" if value > 0 else "negative" if value < 0 else ""
+
+
+def _trend_icon(value: float) -> str:
+    """増減のアイコン"""
+    return "📈" if value > 0 else "📉" if value < 0 else "➡️"
+
+
+@dataclass
+class ServiceView:
+    """サービス実績の表示用の値"""
+    name: str
+    metric_type: str
+    period: str
+    current_value: Any
+    display_value: str
+    yoy_change: float
+    weekly_change: float
+    yoy_display: str
+    weekly_display: str
+    yoy_trend: str
+    weekly_trend: str
+    yoy_icon: str
+    weekly_icon: str
+    yoy_note: str
+    data_url: str
+
+
+@dataclass
+class StockView:
+    """株価の表示用の値"""
+    ticker: str
+    name: str
+    price_display: str
+    change_display: str
+    trend: str
+    icon: str
+
+
+@dataclass
+class ArticleView:
+    """主要ニュースの表示用の値"""
+    index: int
+    title: str
+    company: str
+    published_at: str
+    score_display: str
+    summary_jp: str
+    url: str
+
+
+@dataclass
+class ReportView:
+    """週次レポート全体のビューモデル"""
+    period: str
+    generated_at: str
+    services: List[ServiceView]
+    stocks: List[StockView]
+    news_summary: str
+    articles: List[ArticleView]
+    schedule: List[Dict[str, Any]]
+    source: Dict[str, Any] = field(repr=False)
+
+
+def build_service_view(service: Dict[str, Any],
+                       format_currency: Callable[..., str] = format_japanese_currency) -> ServiceView:
+    """
+    サービス実績1件の表示用の値を作成
+
+    Args:
+        service (Dict): 統合データの business_data.services の要素
+        format_currency (Callable): 金額の日本式表記（amount, detailed=False）
+
+    Returns:
+        ServiceView: 表示用の値
+    """
+    name = service['name']
+    is_online_platform = name == ONLINE_PLATFORM
+
+    if service['metric_type'] == '内定数':
+        display_value = f"{service['current_value']:,}件"
+    else:
+        display_value = format_currency(service['current_value'], detailed=is_online_platform)
+        if is_online_platform:
+            display_value += " ※グロスレベニュー"
+
+    yoy_change = service['yoy_change']
+    weekly_change = service['weekly_change']
+    return ServiceView(
+        name=name,
+        metric_type=service['metric_type'],
+        period=service.get('period', ''),
+        current_value=service['current_value'],
+        display_value=display_value,
+        yoy_change=yoy_change,
+        weekly_change=weekly_change,
+        yoy_display=f"{yoy_change:+.1f}%",
+        weekly_display=f"{weekly_change:+.1f}%",
+        yoy_trend=_trend(yoy_change),
+        weekly_trend=_trend(weekly_change),
+        yoy_icon=_trend_icon(yoy_change),
+        weekly_icon=_trend_icon(weekly_change),
+        yoy_note=" ※昨年のPPCと比較" if is_online_platform else "",
+        data_url=ONLINE_PLATFORM_DATA_URL if is_online_platform else ""
+    )
+
+
+def build_report_view(data: Dict[str, Any], format_currency: Callable[..., str] = format_japanese_currency,
+                      max_articles: int = MAX_REPORT_ARTICLES) -> ReportView:
+    """
+    統合データからビューモデルを作成
+
+    Args:
+        data (Dict): 統合データ
+        format_currency (Callable): 金額の日本式表記（amount, detailed=False）
+        max_articles (int): レポートに載せる主要ニュースの件数
+
+    Returns:
+        ReportView: ビューモデル
+    """
+    services = [build_service_view(service, format_currency) for service in data['business_data']['services']]
+
+    stocks = []
+    for ticker, stock_info in data['stock_data'].items():
+        if stock_info['status'] != 'success':
+            continue
+        price = stock_info['current_price']
+        stocks.append(StockView(
+            ticker=ticker,
+            name=STOCK_NAMES.get(ticker, ticker),
+            price_display=f"{price:,.0f}" if ticker in POINT_TICKERS else f"¥{price:,.0f}",
+            change_display=f"{stock_info['change_percent']:+.2f}%",
+            trend=_trend(stock_info['change']),
+            icon=_trend_icon(stock_info['change'])
+        ))
+
+    articles = [
+        ArticleView(
+            index=i,
+            title=article['title'],
+            company=article['company'].title(),
+            published_at=article['published_at'],
+            score_display=f"{article['score']:.1f}",
+            summary_jp=article['summary_jp'],
+            url=article['url']
+        )
+        for i, article in enumerate(data['news_data']['articles'][:max_articles], 1)
+    ]
+
+    return ReportView(
+        period=data['metadata']['data_period'],
+        generated_at=data['metadata']['generated_at'],
+        services=services,
+        stocks=stocks,
+        news_summary=data['news_data']['summary'],
+        articles=articles,
+        schedule=data['schedule_data'],
+        source=data
+    )
+
+
+def render_markdown(view: ReportView) -> str:
+    """Markdownレポートをレンダリング"""
+    return get_template_registry().render(MARKDOWN_TEMPLATE, report=view)
+
+
+def render_html(view: ReportView) -> str:
+    """Web用HTMLレポートをレンダリング"""
+    return get_template_registry().render(HTML_TEMPLATE, report=view)
+
+
+def to_web_json(view: ReportView) -> Dict[str, Any]:
+    """
+    Web用JSONデータ（web/news-data.json）を作成
+
+    Args:
+        view (ReportView): ビューモデル
+
+    Returns:
+        Dict: ローカルサーバー用のJSONデータ
+    """
+    data = view.source
+    return {
+        "metadata": data['metadata'],
+        "businessData": {
+            "services": [
+                {
+                    "name": service.name,
+                    "metricType": service.metric_type,
+                    "period": service.period,
+                    "currentValue": service.current_value,
+                    "yoyChange": service.yoy_change,
+                    "weeklyChange": service.weekly_change,
+                    "yoyNote": service.yoy_note,
+                    "displayValue": service.display_value
+                }
+                for service in view.services
+            ]
+        },
+        "stockData": data['stock_data'],
+        "newsData": {
+            "summary": view.news_summary,
+            "articles": data['news_data']['articles']
+        },
+        "scheduleData": data['schedule_data']
+    }
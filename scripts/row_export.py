@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行単位のストリーミングエクスポート（CSV / JSON Lines / Parquet）
+
+分析履歴・思考ステップのような大きな表を、全件をメモリに載せずに1行ずつ書き出します。
+BIツールに全期間のデータを渡すためのもので、行はイテレータで受け取ります。
+
+- CSV・JSON Lines は batch_size 行ごとに文字列のチャンクとして出力する
+  （ファイルへの書き込みとHTTPのストリーミング応答で同じ処理を使う）
+- Parquet はpyarrowがあれば batch_size 行ごとに1つの行グループとして書き込む
+- ファイルへの書き込みは同じディレクトリの一時ファイルに書いてから置き換える
+"""
+
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from atomic_io import atomic_path, open_atomic
+from cache_store import dumps
+
+# pyarrowのインポート（フォールバック対応）
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+# ストリーミング応答できる形式（Parquetはファイル末尾にメタデータを書くため不可）
+STREAMING_FORMATS = ("csv", "jsonl")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 列定義: (列名, 型) 。型は "string" / "int" / "float"
+Column = Tuple[str, str]
+
+
+def _check_format(format_type: str) -> None:
+    """エクスポート形式の確認"""
+    if format_type not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {format_type}")
+    if format_type == "parquet" and not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet形式でエクスポートするには pyarrow が必要です")
+
+
+def iter_text_chunks(rows: Iterable[Dict[str, Any]], columns: Sequence[Column], format_type: str,
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """
+    行をCSV・JSON Linesのテキストに変換（batch_size 行ごとに1チャンク）
+
+    CSVは先頭にヘッダー行を付ける。列定義にないキーは出力しない。
+
+    Args:
+        rows: 行（列名 → 値）のイテレータ
+        columns: 列定義
+        format_type (str): "csv" または "jsonl"
+        batch_size (int): 1チャンクあたりの行数
+
+    Yields:
+        str: テキストのチャンク
+
+    Raises:
+        ValueError: ストリーミングできない形式の場合
+    """
+    if format_type not in STREAMING_FORMATS:
+        raise ValueError(f"Unsupported streaming format: {format_type}")
+
+    names = [name for name, _ in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if format_type == "csv" else None
+    if writer is not None:
+        writer.writerow(names)
+
+    pending = 0
+    for row in rows:
+        if writer is not None:
+            writer.writerow([row.get(name) for name in names])
+        else:
+            buffer.write(dumps({name: row.get(name) for name in names}).decode("utf-8"))
+            buffer.write("\n")
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+def _arrow_schema(columns: Sequence[Column]) -> "pyarrow.Schema":
+    """列定義からArrowのスキーマを作成"""
+    types = {"string": pyarrow.string(), "int": pyarrow.int64(), "float": pyarrow.float64()}
+    return pyarrow.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _write_parquet(path: str, rows: Iterable[Dict[str, Any]], columns: Sequence[Column], batch_size: int) -> None:
+    """Parquetファイルに書き込み（batch_size 行ごとに1つの行グループ）"""
+    schema = _arrow_schema(columns)
+    names = [name for name, _ in columns]
+    written = False
+    with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch: Dict[str, List[Any]] = {name: [] for name in names}
+        pending = 0
+        for row in rows:
+            for name in names:
+                batch[name].append(row.get(name))
+            pending += 1
+            if pending >= batch_size:
+                writer.write_table(pyarrow.table(batch, schema=schema))
+                written = True
+                batch = {name: [] for name in names}
+                pending = 0
+        if pending or not written:
+            # 0行でもスキーマだけのファイルを作る
+            writer.write_table(pyarrow.table(batch, schema=schema))
+
+
+def write_rows(output_path: str, rows: Iterable[Dict[str, Any]], columns: Sequence[Column],
+               format_type: str = "csv", batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    行をファイルに書き出す（書き込み完了まで出力先は置き換えない）
+
+    Args:
+        output_path (str): 出力先
+        rows: 行（列名 → 値）のイテレータ
+        columns: 列定義
+        format_type (str): "csv" / "jsonl" / "parquet"
+        batch_size (int): まとめて書き込む行数
+
+    Returns:
+        int: 書き出した行数
+
+    Raises:
+        ValueError: 未対応の形式の場合
+        RuntimeError: Parquetでpyarrowが無い場合
+    """
+    _check_format(format_type)
+
+    counted = 0
+
+    def counting(source: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal counted
+        for row in source:
+            counted += 1
+            yield row
+
+    if format_type == "parquet":
+        with atomic_path(output_path) as tmp_path:
+            _write_parquet(tmp_path, counting(rows), columns, batch_size)
+    else:
+        with open_atomic(output_path, 'w', newline='') as f:
+            for chunk in iter_text_chunks(counting(rows), columns, format_type, batch_size):
+                f.write(chunk)
+    return counted
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite接続管理
+
+接続をプールして使い回し、WALモードと各種PRAGMAを設定します。
+
+- WAL: 書き込み中も読み取り（ステータス・履歴API）がブロックされない
+- synchronous=NORMAL: WALでは安全性を保ったままfsync回数を削減
+- 接続を使い回すため、sqlite3のステートメントキャッシュ（cached_statements）で
+  同じSQL文字列のプリペアドステートメントが再利用される
+- 書き込みは専用の1接続で行い、プロセス内のロックで直列化してBEGIN IMMEDIATEで開始する
+
+Flaskのスレッドサーバーはリクエストごとにスレッドを作るため、
+スレッドローカルではなくプール（LIFOキュー）で接続を共有する。
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # 負の値はKiB単位（約16MB）
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000
+}
+
+
+class SQLiteStore:
+    """
+    読み取り用接続プールと書き込み専用接続を持つSQLiteデータベース
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None,
+                 pool_size: int = 8, cached_statements: int = 256, timeout: float = 30.0):
+        """
+        初期化
+
+        Args:
+            db_path (str): データベースファイルのパス
+            pragmas (Dict): 追加・上書きするPRAGMA
+            pool_size (int): 保持する読み取り用接続の最大数
+            cached_statements (int): 接続ごとのプリペアドステートメントキャッシュ数
+            timeout (float): ロック待ちのタイムアウト（秒）
+        """
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(pragmas or {})
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """新しい接続を作成してPRAGMAを適用"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            isolation_level=None,  # トランザクションは write() で明示的に管理
+            check_same_thread=False  # 同時に使うのは常に1スレッドのみ（プール・ロックで保証）
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """
+        読み取り用の接続をプールから借りる（WALのため書き込み中でもブロックされない）
+
+        Yields:
+            sqlite3.Connection: 接続
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        書き込みトランザクション（成功時コミット、例外時ロールバック）
+
+        Yields:
+            sqlite3.Connection: 書き込み専用の接続
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+
+            if conn.in_transaction:
+                # 同一スレッド内の入れ子の write() は外側のトランザクションに含める
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def migrate(self, migrations: List[Tuple[int, List[Any]]]) -> int:
+        """
+        スキーマのマイグレーションを適用（PRAGMA user_version で適用済みバージョンを管理）
+
+        Args:
+            migrations (List[Tuple[int, List]]): (バージョン, 手順のリスト) のリスト（昇順）。
+                手順はSQL文字列か、接続を受け取る関数（データ移行用）
+
+        Returns:
+            int: 適用後のスキーマバージョン
+        """
+        with self.write() as conn:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, statements in migrations:
+                if version <= current:
+                    continue
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                current = version
+        return current
+
+    def close(self) -> None:
+        """プール中の接続と書き込み接続を閉じる"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_stores: Dict[str, SQLiteStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path: str, **kwargs) -> SQLiteStore:
+    """
+    データベースファイルごとに共有するSQLiteStoreを取得
+
+    Args:
+        db_path (str): データベースファイルのパス
+
+    Returns:
+        SQLiteStore: 共有ストア
+    """
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = SQLiteStore(db_path, **kwargs)
+            _stores[key] = store
+        return store
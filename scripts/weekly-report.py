@@ -2,6 +2,10 @@
 """
 週次レポート統合スクリプト
 データ収集 → レポート生成の一連の流れを実行
+
+データ収集は PipelineDAG のステージ（business / stocks / news / schedule → integrate → render）
+として実行し、互いに依存しない収集ステージは並行して実行する。
+各ステージの出力は cache/pipeline/weekly_report/<run_id>/ に保存し、--resume で続きから再開できる。
 """
 
 import os
@@ -13,6 +17,9 @@ from datetime import datetime
 # 既存のモジュールをインポート
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from pipeline_dag import PipelineDAG
+from instrumentation import add_instrumentation_arguments, configure_tracing, profiling
+
 # データ収集とレポート生成のクラスをインポート
 exec(open('scripts/data-collector.py').read())
 exec(open('scripts/report-generator.py').read())
@@ -28,13 +35,43 @@ class WeeklyReportPipeline:
         self.collector = DataCollector(cache_hours=cache_hours)
         self.generator = ReportGenerator()
     
-    async def run_full_pipeline(self, force_refresh=False, output_prefix="週次レポート_テスト"):
+    def build_dag(self, use_cache=False):
+        """
+        パイプラインのステージを宣言
+        
+        ファイルを書き出す integrate・render はチェックポイントを使わず毎回実行する。
+        
+        Args:
+            use_cache (bool): 有効な統合データのキャッシュがあれば収集ステージを省略する
+        
+        Returns:
+            PipelineDAG: ステージを登録したパイプライン
+        """
+        dag = PipelineDAG("weekly_report")
+        if use_cache:
+            dag.add_stage("load_cache", self.collector.load_cached_data, outputs=("data",), checkpoint=False)
+        else:
+            dag.add_stage("business", self.collector._collect_business_data, outputs=("business_data",))
+            dag.add_stage("stocks", self.collector._collect_stock_data, outputs=("stock_data",))
+            dag.add_stage("news", self.collector._collect_news_data, outputs=("news_data",))
+            dag.add_stage("schedule", self.collector._collect_schedule_data, outputs=("schedule_data",))
+            dag.add_stage("integrate", self.collector.integrate_data,
+                          inputs=("business_data", "stock_data", "news_data", "schedule_data"),
+                          outputs=("data",), checkpoint=False)
+        dag.add_stage("render", self.generator.generate_all_reports, inputs=("output_prefix", "data"),
+                      outputs=("generated_files",), checkpoint=False)
+        return dag
+    
+    async def run_full_pipeline(self, force_refresh=False, output_prefix="週次レポート_テスト",
+                                run_id=None, force_stages=()):
         """
         完全なパイプラインを実行
         
         Args:
             force_refresh (bool): データ強制更新フラグ
             output_prefix (str): レポートファイル名プレフィックス
+            run_id (str): 再開する実行ID（省略時は新規実行）
+            force_stages: チェックポイントを使わずに再実行するステージ名
         
         Returns:
             dict: 実行結果
@@ -42,58 +79,68 @@ class WeeklyReportPipeline:
         print("🚀 週次レポートパイプライン開始")
         print("="*60)
         
-        start_time = datetime.now()
+        # 再開時は途中までの出力を使うため、統合データのキャッシュは見ない
+        use_cache = not force_refresh and run_id is None and self.collector.is_cache_valid()
+        if use_cache:
+            print("✅ キャッシュが有効です - データ収集をスキップ")
         
         try:
-            # Phase 1: データ収集
-            print("\n📊 Phase 1: データ収集")
-            print("-" * 30)
-            
-            data = await self.collector.collect_all_data(force_refresh=force_refresh)
-            
-            # Phase 2: レポート生成
-            print("\n📄 Phase 2: レポート生成")
-            print("-" * 30)
-            
-            generated_files = self.generator.generate_all_reports(output_prefix=output_prefix)
-            
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            
-            # 結果サマリー
-            print("\n" + "="*60)
-            print("✅ 週次レポートパイプライン完了")
-            print("="*60)
-            print(f"⏱️  実行時間: {duration:.2f}秒")
-            print(f"📅 データ期間: {data['metadata']['data_period']}")
-            print(f"📊 ビジネスサービス: {len(data['business_data']['services'])}件")
-            print(f"📈 株価銘柄: {len(data['stock_data'])}件")
-            print(f"📰 ニュース記事: {len(data['news_data']['articles'])}件")
-            print(f"📅 スケジュール: {len(data['schedule_data'])}件")
-            print("\n📄 生成ファイル:")
-            for format_type, file_path in generated_files.items():
-                print(f"   ✅ {format_type}: {file_path}")
-            print("="*60)
-            
-            return {
-                "success": True,
-                "duration": duration,
-                "data_summary": {
-                    "period": data['metadata']['data_period'],
-                    "business_services": len(data['business_data']['services']),
-                    "stock_tickers": len(data['stock_data']),
-                    "news_articles": len(data['news_data']['articles']),
-                    "schedule_items": len(data['schedule_data'])
-                },
-                "generated_files": generated_files
-            }
-            
+            dag = self.build_dag(use_cache=use_cache)
+            run = await dag.run(params={"output_prefix": output_prefix}, run_id=run_id, force=force_stages)
         except Exception as e:
             print(f"\n❌ パイプライン実行エラー: {e}")
             return {
                 "success": False,
                 "error": str(e)
             }
+        
+        print("\n⏱️ ステージ別所要時間")
+        print(run.timing_table())
+        
+        if not run.success:
+            failed = run.failed_stages[0]
+            print(f"\n❌ パイプライン実行エラー: {failed.name} - {failed.error}")
+            print(f"🔁 続きから実行: python scripts/weekly-report.py --resume {run.run_id}")
+            return {
+                "success": False,
+                "error": failed.error,
+                "failed_stage": failed.name,
+                "run_id": run.run_id
+            }
+        
+        data = run.values["data"]
+        generated_files = run.values["generated_files"]
+        duration = run.duration
+        
+        # 結果サマリー
+        print("\n" + "="*60)
+        print("✅ 週次レポートパイプライン完了")
+        print("="*60)
+        print(f"⏱️  実行時間: {duration:.2f}秒")
+        print(f"📅 データ期間: {data['metadata']['data_period']}")
+        print(f"📊 ビジネスサービス: {len(data['business_data']['services'])}件")
+        print(f"📈 株価銘柄: {len(data['stock_data'])}件")
+        print(f"📰 ニュース記事: {len(data['news_data']['articles'])}件")
+        print(f"📅 スケジュール: {len(data['schedule_data'])}件")
+        print("\n📄 生成ファイル:")
+        for format_type, file_path in generated_files.items():
+            print(f"   ✅ {format_type}: {file_path}")
+        print("="*60)
+        
+        return {
+            "success": True,
+            "duration": duration,
+            "run_id": run.run_id,
+            "stage_timings": {result.name: round(result.duration, 3) for result in run.results},
+            "data_summary": {
+                "period": data['metadata']['data_period'],
+                "business_services": len(data['business_data']['services']),
+                "stock_tickers": len(data['stock_data']),
+                "news_articles": len(data['news_data']['articles']),
+                "schedule_items": len(data['schedule_data'])
+            },
+            "generated_files": generated_files
+        }
 
 async def main():
     """メイン実行関数"""
@@ -103,38 +150,50 @@ async def main():
     parser.add_argument('--prefix', default='週次レポート_テスト', help='レポートファイル名プレフィックス')
     parser.add_argument('--data-only', action='store_true', help='データ収集のみ実行')
     parser.add_argument('--report-only', action='store_true', help='レポート生成のみ実行')
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                        help='前回の実行を続きから再開（RUN_ID省略時は直近の実行）')
+    parser.add_argument('--rerun', action='append', default=[], metavar='STAGE',
+                        help='チェックポイントを使わずに再実行するステージ（複数指定可）')
+    add_instrumentation_arguments(parser)
     
     args = parser.parse_args()
+    configure_tracing(args.trace)
     
     if args.data_only and args.report_only:
         print("❌ --data-only と --report-only は同時に指定できません")
         sys.exit(1)
     
     try:
-        if args.data_only:
-            # データ収集のみ
-            print("📊 データ収集のみ実行")
-            collector = DataCollector(cache_hours=args.cache_hours)
-            data = await collector.collect_all_data(force_refresh=args.force)
-            print("✅ データ収集完了")
+        with profiling(args.profile):
+            if args.data_only:
+                # データ収集のみ
+                print("📊 データ収集のみ実行")
+                collector = DataCollector(cache_hours=args.cache_hours)
+                data = await collector.collect_all_data(force_refresh=args.force)
+                print("✅ データ収集完了")
             
-        elif args.report_only:
-            # レポート生成のみ
-            print("📄 レポート生成のみ実行")
-            generator = ReportGenerator()
-            generated_files = generator.generate_all_reports(output_prefix=args.prefix)
-            print("✅ レポート生成完了")
+            elif args.report_only:
+                # レポート生成のみ
+                print("📄 レポート生成のみ実行")
+                generator = ReportGenerator()
+                generated_files = generator.generate_all_reports(output_prefix=args.prefix)
+                print("✅ レポート生成完了")
             
-        else:
-            # 完全パイプライン
-            pipeline = WeeklyReportPipeline(cache_hours=args.cache_hours)
-            result = await pipeline.run_full_pipeline(
-                force_refresh=args.force,
-                output_prefix=args.prefix
-            )
+            else:
+                # 完全パイプライン
+                pipeline = WeeklyReportPipeline(cache_hours=args.cache_hours)
+                run_id = args.resume
+                if run_id == 'latest':
+                    run_id = pipeline.build_dag().latest_run_id()
+                result = await pipeline.run_full_pipeline(
+                    force_refresh=args.force,
+                    output_prefix=args.prefix,
+                    run_id=run_id,
+                    force_stages=args.rerun
+                )
             
-            if not result["success"]:
-                sys.exit(1)
+                if not result["success"]:
+                    sys.exit(1)
     
     except KeyboardInterrupt:
         print("\n⚠️ ユーザーによる中断")